@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+agency_matcher.py
+
+مطابقة فلاتر الوكالات (AGENCIES_ALLOW / AGENCIES_EXCLUDE) على نص الصفحة كاملاً:
+- قوائم السماح والاستبعاد تُجمع مرة واحدة في آلة Aho-Corasick واحدة (text_match.AhoCorasick)،
+  فكلفة الفحص تعتمد على طول الصفحة لا على عدد الوكالات
+- توحيد عربي/فرنسي/لاتيني: حذف التشكيل والنبرات (é/è/ï)، أشكال الألف والتاء المربوطة،
+  وتقارب كتابات النقل الحرفي الشائعة (dj/j، ou/w/u، q/k، ch/sh، gu/g)
+- فلتر السماح المطابق تماماً لاسم ولاية أو رقمها يشمل كل أسمائها (WILAYAS: الولايات الـ 58
+  بالفرنسية والعربية): "Alger" أو "16" تطابق "الجزائر" و "Algiers". الرقم نفسه لا يُضاف للأنماط
+  (أرقام الصفحة كثيرة)، والأسماء البديلة ("Alger Centre"، "BBA") والعبارات الأطول تُطابق كما كُتبت
+- الاستبعاد حرفي افتراضياً: "Alger" المستبعدة لا ترفض كل صفحة فيها "الجزائر" (expand_exclude لتفعيله)
+- المطابقة على حدود الكلمات فقط، وتعيد موضع كل تطابق في النص الأصلي والعنصر الذي يحتويه
+
+    matcher = compile_filters(("Alger", "Oran"), ("Blida",))
+    hits = matcher.find(text, nodes)       # nodes: [[بداية، نهاية، وصف العنصر], ...] من probe_dom
+    ok, labels = matcher.decide(hits)
+
+قياس الأداء:
+    python .\\agency_matcher.py --bench --agencies 500
+"""
+
+import re
+import sys
+import time
+import random
+import argparse
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import compress
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from text_match import AhoCorasick, normalize_char_text
+
+# (الرقم، الاسم الفرنسي، الاسم العربي، أسماء بديلة)
+WILAYAS = [
+    ("01", "Adrar", "أدرار", ()),
+    ("02", "Chlef", "الشلف", ("Ech Cheliff", "El Asnam")),
+    ("03", "Laghouat", "الأغواط", ()),
+    ("04", "Oum El Bouaghi", "أم البواقي", ()),
+    ("05", "Batna", "باتنة", ()),
+    ("06", "Béjaïa", "بجاية", ("Bougie", "Bgayet")),
+    ("07", "Biskra", "بسكرة", ()),
+    ("08", "Béchar", "بشار", ()),
+    ("09", "Blida", "البليدة", ()),
+    ("10", "Bouira", "البويرة", ()),
+    ("11", "Tamanrasset", "تمنراست", ("Tamanghasset",)),
+    ("12", "Tébessa", "تبسة", ()),
+    ("13", "Tlemcen", "تلمسان", ()),
+    ("14", "Tiaret", "تيارت", ()),
+    ("15", "Tizi Ouzou", "تيزي وزو", ()),
+    ("16", "Alger", "الجزائر", ("Algiers", "El Djazair", "Alger Centre")),
+    ("17", "Djelfa", "الجلفة", ()),
+    ("18", "Jijel", "جيجل", ()),
+    ("19", "Sétif", "سطيف", ()),
+    ("20", "Saïda", "سعيدة", ()),
+    ("21", "Skikda", "سكيكدة", ()),
+    ("22", "Sidi Bel Abbès", "سيدي بلعباس", ()),
+    ("23", "Annaba", "عنابة", ("Bône",)),
+    ("24", "Guelma", "قالمة", ()),
+    ("25", "Constantine", "قسنطينة", ("Qacentina",)),
+    ("26", "Médéa", "المدية", ()),
+    ("27", "Mostaganem", "مستغانم", ()),
+    ("28", "M'Sila", "المسيلة", ()),
+    ("29", "Mascara", "معسكر", ("Mouaskar",)),
+    ("30", "Ouargla", "ورقلة", ()),
+    ("31", "Oran", "وهران", ("Wahran",)),
+    ("32", "El Bayadh", "البيض", ()),
+    ("33", "Illizi", "إليزي", ()),
+    ("34", "Bordj Bou Arréridj", "برج بوعريريج", ("BBA",)),
+    ("35", "Boumerdès", "بومرداس", ()),
+    ("36", "El Tarf", "الطارف", ()),
+    ("37", "Tindouf", "تندوف", ()),
+    ("38", "Tissemsilt", "تيسمسيلت", ()),
+    ("39", "El Oued", "الوادي", ()),
+    ("40", "Khenchela", "خنشلة", ()),
+    ("41", "Souk Ahras", "سوق أهراس", ()),
+    ("42", "Tipaza", "تيبازة", ()),
+    ("43", "Mila", "ميلة", ()),
+    ("44", "Aïn Defla", "عين الدفلى", ()),
+    ("45", "Naâma", "النعامة", ()),
+    ("46", "Aïn Témouchent", "عين تموشنت", ()),
+    ("47", "Ghardaïa", "غرداية", ()),
+    ("48", "Relizane", "غليزان", ()),
+    ("49", "Timimoun", "تيميمون", ()),
+    ("50", "Bordj Badji Mokhtar", "برج باجي مختار", ()),
+    ("51", "Ouled Djellal", "أولاد جلال", ()),
+    ("52", "Béni Abbès", "بني عباس", ()),
+    ("53", "In Salah", "عين صالح", ()),
+    ("54", "In Guezzam", "عين قزام", ()),
+    ("55", "Touggourt", "تقرت", ()),
+    ("56", "Djanet", "جانت", ()),
+    ("57", "El M'Ghair", "المغير", ()),
+    ("58", "El Meniaa", "المنيعة", ("El Goléa",)),
+]
+
+# تقارب الكتابة اللاتينية لنفس الاسم العربي (تُطبق على النص والأنماط معاً)
+_DIGRAPHS = {"dj": "j", "ou": "u", "ch": "sh", "gu": "g"}
+_SINGLE = {"w": "u", "q": "k"}
+_DIGRAPH_FIRST = {pair[0] for pair in _DIGRAPHS}
+
+# المسار السريع: كل حرف يُترجم إلى حرف واحد بنفس الطول، والمحذوف يُعلَّم بـ \x00 ثم يُزال مرة واحدة
+_DROP = "\x00"
+_DIGRAPH_RE = re.compile("|".join(f"{pair[0]}{_DROP}*{pair[1]}" for pair in _DIGRAPHS))
+_SPACE_RUN = re.compile(" [ \x00]+")
+_LEADING = re.compile("^[ \x00]+")
+_SINGLE_TABLE = str.maketrans(_SINGLE)
+_CHAR_TABLE: Dict[int, str] = {}
+_MULTI: set = set()          # حروف تتوسع لأكثر من حرف (مثل الحروف المركبة ﻻ) -> المسار البطيء
+
+
+@lru_cache(maxsize=None)
+def _fold_char(ch: str) -> str:
+    """حرف واحد -> شكله الموحّد (قد يكون فارغاً أو حرفين)، وكل ما ليس حرفاً/رقماً -> مسافة."""
+    out = []
+    for c in normalize_char_text(unicodedata.normalize("NFKD", ch)):
+        if unicodedata.combining(c):
+            continue
+        out.append(c if c.isalnum() else " ")
+    return "".join(out)
+
+
+def _fold_slow(text: str) -> Tuple[str, List[int]]:
+    chars: List[str] = []
+    offsets: List[int] = []
+    for i, ch in enumerate(text):
+        for c in _fold_char(ch):
+            if c == " " and (not chars or chars[-1] == " "):
+                continue
+            chars.append(c)
+            offsets.append(i)
+    out: List[str] = []
+    out_offsets: List[int] = []
+    i, n = 0, len(chars)
+    while i < n:
+        c = chars[i]
+        pair = _DIGRAPHS.get(c + chars[i + 1]) if i + 1 < n and c in _DIGRAPH_FIRST else None
+        if pair:
+            out.extend(pair)
+            out_offsets.extend(offsets[i:i + len(pair)])
+            i += 2
+            continue
+        out.append(_SINGLE.get(c, c))
+        out_offsets.append(offsets[i])
+        i += 1
+    return "".join(out), out_offsets
+
+
+def _mark_digraph(m) -> str:
+    # الحرف الناتج في موضع أول حرفي الزوج (كما في _fold_slow) والباقي محذوف
+    found = m.group()
+    pair = _DIGRAPHS[found[0] + found[-1]]
+    return pair[0] + _DROP * (len(found) - len(pair)) + pair[1:]
+
+
+def fold(text: str) -> Tuple[str, List[int]]:
+    """
+    توحيد النص للمطابقة، مع موضع كل حرف ناتج في النص الأصلي.
+    كل ما ليس حرفاً أو رقماً يصبح مسافة واحدة.
+    """
+    present = set(text)
+    for ch in present.difference(map(chr, _CHAR_TABLE)).difference(_MULTI):
+        folded = _fold_char(ch)
+        if len(folded) > 1:
+            _MULTI.add(ch)
+        else:
+            _CHAR_TABLE[ord(ch)] = folded or _DROP
+    if not present.isdisjoint(_MULTI):
+        return _fold_slow(text)
+    marked = text.translate(_CHAR_TABLE)
+    marked = _LEADING.sub(lambda m: _DROP * len(m.group()), marked)
+    marked = _SPACE_RUN.sub(lambda m: " " + _DROP * (len(m.group()) - 1), marked)
+    marked = _DIGRAPH_RE.sub(_mark_digraph, marked).translate(_SINGLE_TABLE)
+    if _DROP not in marked:
+        return marked, list(range(len(marked)))
+    return marked.replace(_DROP, ""), list(compress(range(len(marked)), map(_DROP.__ne__, marked)))
+
+
+def fold_pattern(text: str) -> str:
+    return fold(text)[0].strip()
+
+
+class AgencyHit(NamedTuple):
+    label: str        # الاسم كما كُتب في الفلتر
+    kind: str         # allow أو exclude
+    start: int        # الموضع في النص الأصلي
+    end: int
+    matched: str      # النص المطابق كما في الصفحة
+    element: str      # وصف العنصر (من probe_dom) أو ""
+
+
+def _wilaya_aliases() -> Dict[str, List[str]]:
+    """الاسم الفرنسي/العربي أو الرقم موحّداً -> كل أسماء تلك الولاية. الأسماء البديلة ليست مفاتيح."""
+    table = {}
+    for code, fr, ar, extra in WILAYAS:
+        names = [fr, ar, *extra]
+        for key in (code, str(int(code)), fr, ar):
+            table[fold_pattern(key)] = names
+    return table
+
+
+_WILAYA_ALIASES = _wilaya_aliases()
+
+
+class AgencyMatcher:
+    def __init__(self, allow: Sequence[str] = (), exclude: Sequence[str] = (),
+                 expand_allow: bool = True, expand_exclude: bool = False):
+        self.allow = list(allow)
+        self.exclude = list(exclude)
+        patterns = []
+        for kind, entries, expand in (("allow", self.allow, expand_allow), ("exclude", self.exclude, expand_exclude)):
+            for entry in entries:
+                forms = {fold_pattern(entry)}
+                if expand:
+                    # مطابقة تامة للمفتاح فقط: "Alger Centre" أو "Agence Alger" لا تتوسع
+                    forms.update(fold_pattern(name) for name in _WILAYA_ALIASES.get(fold_pattern(entry), ()))
+                for form in forms:
+                    if form:
+                        patterns.append((form, (entry, kind)))
+        self.automaton = AhoCorasick(patterns)
+
+    def find(self, text: str, nodes: Sequence[Sequence] = None) -> List[AgencyHit]:
+        """
+        كل التطابقات في النص (مرور واحد). nodes اختيارية: [بداية، نهاية، وصف] لكل كتلة نصية
+        مرتبة حسب البداية، لتحديد العنصر الذي يحتوي كل تطابق.
+        """
+        folded, offsets = fold(text)
+        starts = [n[0] for n in nodes] if nodes else []
+        hits = []
+        for start, end, (label, kind) in self.automaton.iter_matches(folded):
+            # حدود الكلمات: "Mila" لا تطابق داخل "Kamila"
+            if start > 0 and folded[start - 1] != " ":
+                continue
+            if end < len(folded) and folded[end] != " ":
+                continue
+            # النهاية: موضع الفاصل التالي في الأصل، فلا يضيع آخر حرف من زوج مثل "ou" في Ouzou
+            o_start = offsets[start]
+            o_end = offsets[end] if end < len(offsets) else len(text)
+            element = ""
+            if starts:
+                k = bisect_right(starts, o_start) - 1
+                if k >= 0 and o_start < nodes[k][1]:
+                    element = nodes[k][2]
+            hits.append(AgencyHit(label, kind, o_start, o_end, text[o_start:o_end], element))
+        return hits
+
+    def decide(self, hits: List[AgencyHit]) -> Tuple[bool, List[str]]:
+        """
+        (مقبول، أسماء السماح المطابقة بترتيب ظهورها).
+        أي تطابق استبعاد يرفض الصفحة؛ ومع وجود قائمة سماح يجب أن يطابق منها اسم واحد على الأقل.
+        """
+        if any(h.kind == "exclude" for h in hits):
+            return False, []
+        matches = list(dict.fromkeys(h.label for h in hits if h.kind == "allow"))
+        if self.allow and not matches:
+            return False, []
+        return True, matches
+
+
+@lru_cache(maxsize=32)
+def compile_filters(allow: Tuple[str, ...] = (), exclude: Tuple[str, ...] = ()) -> AgencyMatcher:
+    """نفس الفلاتر في كل دورة فحص -> نفس الآلة المبنية."""
+    return AgencyMatcher(allow, exclude)
+
+
+# ---------- قياس الأداء ----------
+
+def _naive(allow: List[str], exclude: List[str], text: str) -> Tuple[bool, List[str]]:
+    """الطريقة القديمة: in لكل اسم مع تحويل النص لحروف صغيرة كل مرة."""
+    matches = [a for a in allow if a.lower() in text.lower()]
+    if any(a.lower() in text.lower() for a in exclude):
+        return False, []
+    return (not allow or bool(matches)), matches
+
+
+def bench(n_agencies: int = 500, pages: int = 50, page_kb: int = 50):
+    rnd = random.Random(1)
+    allow = [f"Agence {fr} {k}" for _, fr, _, _ in WILAYAS for k in range(max(1, n_agencies // 58))]
+    allow += [fr for _, fr, _, _ in WILAYAS]
+    exclude = [f"Annexe {k}" for k in range(20)]
+    words = ["rendez-vous", "agence", "disponible", "موعد", "الوكالة", "créneau", "lundi", "mardi"]
+    texts = []
+    for _ in range(pages):
+        body = " ".join(rnd.choice(words) for _ in range(page_kb * 1024 // 8))
+        texts.append(body + " Agence Oran 3 وهران")
+    matcher = AgencyMatcher(allow, exclude)
+
+    start = time.perf_counter()
+    for t in texts:
+        _naive(allow, exclude, t)
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for t in texts:
+        matcher.decide(matcher.find(t))
+    compiled = time.perf_counter() - start
+
+    print(f"{len(allow)} اسم سماح، {len(exclude)} استبعاد، {pages} صفحة × {page_kb} KB")
+    print(f"in لكل اسم   : {naive / pages * 1000:9.1f} ms/صفحة")
+    print(f"Aho-Corasick : {compiled / pages * 1000:9.1f} ms/صفحة  (x{naive / compiled:.1f})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="مطابقة فلاتر الوكالات")
+    parser.add_argument("--bench", action="store_true")
+    parser.add_argument("--agencies", type=int, default=500)
+    parser.add_argument("--allow", default="", help="أسماء مفصولة بفواصل")
+    parser.add_argument("--exclude", default="")
+    parser.add_argument("text", nargs="*")
+    args = parser.parse_args(argv)
+    if args.bench:
+        bench(args.agencies)
+        return 0
+    split = lambda s: tuple(a.strip() for a in s.split(",") if a.strip())
+    matcher = compile_filters(split(args.allow), split(args.exclude))
+    text = " ".join(args.text)
+    hits = matcher.find(text)
+    for h in hits:
+        print(f"{h.kind:8} {h.label:20} [{h.start}:{h.end}] {h.matched}")
+    print(matcher.decide(hits))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""
+alerts.py
+
+توزيع تنبيهات FOUND من minha_bot على كل المشتركين في بوت تليجرام (tepm.py):
+- المشتركون وفلاتر الوكالات الخاصة بهم في ملف JSON مشترك (SUBSCRIBERS_FILE) يديره البوت
+  عبر /subscribe و /unsubscribe؛ التعديل تحت قفل ملف (file_lock.py) مع إعادة قراءة داخله،
+  فلا يضيع اشتراك كتبته عملية أخرى (بوت تليجرام و minha_bot يحذف من حظر البوت)
+- الإرسال غير متزامن عبر طابور وعدد من العمال يتشاركون عميل HTTP واحداً (اتصالات مُعاد استخدامها)
+- محدد معدل token bucket يحترم حدود Bot API (ALERT_RATE رسالة/ث، افتراضياً 30؛
+  البث المدفوع في تليجرام يسمح بأكثر)
+- إعادة المحاولة مع تراجع أسي، واحترام retry_after عند 429، وحذف من حظر البوت (403)
+
+    stats = asyncio.run(AlertFanout.from_env().broadcast(AlertEvent(url, matches, snippet)))
+    AlertFanout.from_env().broadcast_in_background(event)   # دون إيقاف حلقة الفحص
+
+httpx يُستورد عند الحاجة فقط: بدونه (أو بدون TELEGRAM_BOT_TOKEN) يعيد from_env() القيمة None.
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import metrics
+from agency_matcher import compile_filters
+from file_lock import file_lock
+
+SUBSCRIBERS_FILE = os.getenv("SUBSCRIBERS_FILE", "subscribers.json")
+
+
+class AlertEvent(NamedTuple):
+    url: str
+    matches: List[str]
+    snippet: str
+    # نص الصفحة كاملاً (probe_dom) لفلاتر المشتركين؛ المقتطف وحده أول 400 حرف فقط
+    page_text: str = ""
+
+    def text(self) -> str:
+        lines = ["🔔 المواعيد متاحة الآن!", self.url]
+        if self.matches:
+            lines.append("الوكالات: " + "، ".join(self.matches))
+        if self.snippet:
+            lines.append(self.snippet[:300])
+        return "\n".join(lines)
+
+
+class SubscriberStore:
+    """chat_id -> {"allow": [...], "exclude": [...]} في ملف JSON، يُعاد تحميله إن تغيّر على القرص."""
+
+    def __init__(self, path: str = SUBSCRIBERS_FILE):
+        self.path = path
+        self._data: Dict[str, dict] = {}
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def _reload(self, force: bool = False):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            self._data, self._mtime = {}, None
+            return
+        # force: داخل قفل الملف لا نثق بـ mtime (دقته قد تخفي كتابتين في نفس اللحظة)
+        if force or mtime != self._mtime:
+            try:
+                with open(self.path, encoding="utf-8") as f:
+                    self._data = json.load(f)
+            except (OSError, ValueError):
+                self._data = {}
+            self._mtime = mtime
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+        self._mtime = os.path.getmtime(self.path)
+
+    def all(self) -> Dict[str, dict]:
+        with self._lock:
+            self._reload()
+            return dict(self._data)
+
+    def subscribe(self, chat_id: int, allow: List[str] = None, exclude: List[str] = None):
+        with self._lock, file_lock(self.path + ".lock"):
+            self._reload(force=True)
+            self._data[str(chat_id)] = {"allow": allow or [], "exclude": exclude or []}
+            self._save()
+
+    def unsubscribe(self, chat_id: int) -> bool:
+        with self._lock, file_lock(self.path + ".lock"):
+            self._reload(force=True)
+            removed = self._data.pop(str(chat_id), None) is not None
+            if removed:
+                self._save()
+            return removed
+
+    def get(self, chat_id: int) -> Optional[dict]:
+        return self.all().get(str(chat_id))
+
+
+def wants(prefs: dict, event: AlertEvent, cache: Dict[Tuple, bool] = None) -> bool:
+    """
+    هل يطابق الحدث فلاتر المشترك؟ نفس مطابقة فلاتر البوت (agency_matcher): نص الصفحة كاملاً،
+    حدود الكلمات ("Mila" لا تطابق "Kamila") وتوحيد الكتابة ("Wahran" = "Oran").
+    cache: قرار كل مجموعة فلاتر مختلفة مرة واحدة لكل حدث (مشتركون كثيرون بنفس الفلاتر).
+    """
+    key = (tuple(prefs.get("allow") or ()), tuple(prefs.get("exclude") or ()))
+    if not key[0] and not key[1]:
+        return True
+    if cache is not None and key in cache:
+        return cache[key]
+    matcher = compile_filters(*key)
+    text = event.page_text or " ".join([*event.matches, event.snippet])
+    ok = matcher.decide(matcher.find(text))[0]
+    if cache is not None:
+        cache[key] = ok
+    return ok
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class AlertFanout:
+    def __init__(self, token: str, store: SubscriberStore, rate: float = 30, workers: int = 50,
+                 max_retries: int = 5, api_base: str = "https://api.telegram.org"):
+        self.token = token
+        self.store = store
+        self.rate = rate
+        self.workers = workers
+        self.max_retries = max_retries
+        self.api_base = api_base.rstrip("/")
+        # بث واحد في كل مرة: بثان متزامنان يتجاوزان حد المعدل معاً
+        self._sending = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["AlertFanout"]:
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except ImportError:
+            pass
+        token = os.getenv("TELEGRAM_BOT_TOKEN")
+        if not token or os.getenv("ALERTS", "1") != "1":
+            return None
+        try:
+            import httpx  # noqa: F401
+        except ImportError:
+            print("تنبيهات تليجرام معطلة: مطلوب تثبيت httpx (pip install httpx)")
+            return None
+        return cls(token, SubscriberStore(),
+                   rate=float(os.getenv("ALERT_RATE", "30")),
+                   workers=int(os.getenv("ALERT_WORKERS", "50")),
+                   api_base=os.getenv("TELEGRAM_API_BASE", "https://api.telegram.org"))
+
+    async def _send_one(self, http: "httpx.AsyncClient", bucket: TokenBucket, chat_id: str, text: str) -> str:
+        """يعيد sent أو removed أو failed."""
+        import httpx
+        url = f"{self.api_base}/bot{self.token}/sendMessage"
+        delay = 1.0
+        for _ in range(self.max_retries):
+            await bucket.acquire()
+            try:
+                response = await http.post(url, json={"chat_id": chat_id, "text": text})
+            except httpx.HTTPError:
+                response = None
+            metrics.inc("bots_upstream_requests_total", target="telegram",
+                        status=str(response.status_code) if response is not None else "error")
+            if response is not None:
+                if response.status_code == 200:
+                    return "sent"
+                if response.status_code == 403:
+                    # المستخدم حظر البوت أو حذف المحادثة
+                    self.store.unsubscribe(int(chat_id))
+                    return "removed"
+                if response.status_code == 429:
+                    try:
+                        retry_after = response.json()["parameters"]["retry_after"]
+                    except (ValueError, KeyError, TypeError):
+                        retry_after = delay
+                    await asyncio.sleep(retry_after)
+                    continue
+                if response.status_code < 500:
+                    return "failed"
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, 30)
+        return "failed"
+
+    async def broadcast(self, event: AlertEvent) -> dict:
+        import httpx
+        start = time.perf_counter()
+        decisions = {}
+        targets = [cid for cid, prefs in self.store.all().items() if wants(prefs, event, decisions)]
+        stats = {"subscribers": len(targets), "sent": 0, "removed": 0, "failed": 0}
+        if not targets:
+            return stats
+        text = event.text()
+        queue: asyncio.Queue = asyncio.Queue()
+        for cid in targets:
+            queue.put_nowait(cid)
+        bucket = TokenBucket(self.rate)
+        n_workers = min(self.workers, len(targets))
+        limits = httpx.Limits(max_connections=n_workers, max_keepalive_connections=n_workers)
+
+        async with httpx.AsyncClient(timeout=httpx.Timeout(10.0), limits=limits) as http:
+            async def worker():
+                while True:
+                    try:
+                        cid = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    stats[await self._send_one(http, bucket, cid, text)] += 1
+
+            await asyncio.gather(*(worker() for _ in range(n_workers)))
+        stats["seconds"] = round(time.perf_counter() - start, 2)
+        return stats
+
+    def broadcast_in_background(self, event: AlertEvent) -> threading.Thread:
+        """
+        البث في خيط مستقل حتى لا تتوقف حلقة الفحص أثناء الإرسال (آلاف المشتركين = دقائق).
+        الخيط ليس daemon: عند إنهاء البرنامج يكتمل البث الجاري أولاً.
+        """
+        def run():
+            with self._sending:
+                try:
+                    print("تنبيهات تليجرام:", asyncio.run(self.broadcast(event)))
+                except Exception as e:
+                    print("تعذر إرسال تنبيهات تليجرام:", e)
+
+        thread = threading.Thread(target=run, name="alerts-broadcast")
+        thread.start()
+        return thread
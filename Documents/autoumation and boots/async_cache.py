@@ -0,0 +1,73 @@
+"""
+async_cache.py
+
+كاش غير متزامن بمدة صلاحية (TTL) وحد أقصى للعناصر مع إخراج الأقدم استخداماً (LRU)،
+ودمج الطلبات المتزامنة: إذا طُلب نفس المفتاح أثناء جلبه ينتظر الجميع نفس الطلب الخارجي.
+
+    cache = TTLCache(ttl=600, maxsize=256)
+    data = await cache.get_or_fetch("riyadh", lambda: fetch_weather("Riyadh"))
+"""
+
+import time
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class TTLCache:
+    def __init__(self, ttl: float = 600, maxsize: int = 256, cache_none: bool = False):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        # لا نخزن None (فشل الجلب) افتراضياً حتى يُعاد المحاولة في الطلب التالي
+        self.cache_none = cache_none
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires, value = item
+        if expires < time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # الجلب مهمة مستقلة: إلغاء أول طالب (مهلة أو انقطاع) لا يُلغيه ولا يصل للمنتظرين معه
+            task = self._inflight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+            # نمنع تحذير "exception was never retrieved" إن أُلغي كل المنتظرين
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+            if value is not None or self.cache_none:
+                self.set(key, value)
+            return value
+        finally:
+            del self._inflight[key]
+
+    def __len__(self):
+        return len(self._data)
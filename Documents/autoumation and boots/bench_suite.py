@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+bench_suite.py
+
+قياس أداء المسارات الحقيقية للبوتات بدون إنترنت:
+- خادم محلي (local_server.py) يقدم صفحات مسجلة من fixtures/ (صفحة minha مفتوحة ومغلقة،
+  BBC عربي، الصفحة الرئيسية لويكيبيديا) وبدائل OpenWeather و quotable و Telegram Bot API
+- كل الوحدات توجَّه إليه عبر متغيرات البيئة (TELEGRAM_API_BASE، WEATHER_API_BASE، QUOTES_URL)
+- يقيس: check_appointment_open (المسار الموحد JS_PROBE والقديم)، جمع_العناوين، استخراج
+  ويكيبيديا، مجمّع العناوين، جامع الطقس، ومعالجات تليجرام من التحديث حتى وصول sendMessage
+- المجموعات التي تنقصها متطلبات (Chrome، httpx، python-telegram-bot) تُسجل كمتخطاة
+- النتائج تُحفظ في bench_results/ وتُقارن بخط الأساس فتظهر التراجعات كفروق
+
+تشغيل:
+    python .\\bench_suite.py                       # كل المجموعات، مقارنة بـ bench_results/baseline.json
+    python .\\bench_suite.py --only wiki telegram --repeat 50
+    python .\\bench_suite.py --save-baseline       # اعتماد النتيجة الحالية خطاً للأساس
+    python .\\bench_suite.py --compare bench_results/a.json bench_results/b.json
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import statistics
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from local_server import Request, Response, ServerThread, json_response
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(HERE, "fixtures")
+RESULTS_DIR = os.path.join(HERE, "bench_results")
+TOKEN = "123456:BENCH"
+
+PAGES = {
+    "/minha/open": "minha_open.html",
+    "/minha/closed": "minha_closed.html",
+    "/arabic": "bbc_arabic.html",
+    "/wiki/Main_Page": "wiki_main.html",
+}
+
+
+class Skip(Exception):
+    """متطلب غير متوفر لهذه المجموعة."""
+
+
+class FixtureSite:
+    """الصفحات المسجلة وبدائل الواجهات الخارجية على خادم واحد. ?delay=ثوانٍ يؤخر أي رد."""
+
+    def __init__(self, api_latency: float = 0.0):
+        self.api_latency = api_latency
+        self.pages = {}
+        for path, name in PAGES.items():
+            with open(os.path.join(FIXTURES, name), "rb") as f:
+                self.pages[path] = f.read()
+        self.sent_messages = 0
+        self.server = None
+
+    def start(self) -> "FixtureSite":
+        self.server = ServerThread(self.handle).start()
+        return self
+
+    @property
+    def url(self) -> str:
+        return self.server.url
+
+    def stop(self):
+        self.server.stop()
+
+    async def handle(self, req: Request) -> Response:
+        delay = float(req.query.get("delay", ["0"])[0])
+        if delay:
+            await asyncio.sleep(delay)
+        page = self.pages.get(req.path)
+        if page is not None:
+            return Response(200, page, "text/html; charset=utf-8")
+        if self.api_latency:
+            await asyncio.sleep(self.api_latency)
+        if req.path.startswith("/data/2.5/"):
+            return self._weather(req)
+        if req.path == "/quotes/random":
+            limit = int(req.query.get("limit", ["20"])[0])
+            return json_response([{"content": f"اقتباس تجريبي رقم {i}", "author": "Bench"} for i in range(limit)])
+        if req.path.startswith("/bot"):
+            return self._telegram(req)
+        return Response(404, b"not found")
+
+    def _weather(self, req: Request) -> Response:
+        def city(name: str, city_id: int = 0) -> dict:
+            rnd = random.Random(name)
+            return {"id": city_id, "name": name, "dt": int(time.time()),
+                    "main": {"temp": round(rnd.uniform(-5, 40), 2), "feels_like": round(rnd.uniform(-5, 40), 2),
+                             "humidity": rnd.randint(5, 95)},
+                    "weather": [{"description": "سماء صافية"}], "wind": {"speed": round(rnd.uniform(0, 12), 2)}}
+
+        if req.path.endswith("/group"):
+            ids = [int(i) for i in req.query.get("id", [""])[0].split(",") if i]
+            return json_response({"cnt": len(ids), "list": [city(f"City {i}", i) for i in ids]})
+        return json_response(city(req.query.get("q", ["Riyadh"])[0]))
+
+    def _telegram(self, req: Request) -> Response:
+        method = req.path.rsplit("/", 1)[-1]
+        if method == "getMe":
+            return json_response({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}})
+        if method == "sendMessage":
+            data = req.form()
+            self.sent_messages += 1
+            return json_response({"ok": True, "result": {
+                "message_id": self.sent_messages, "date": int(time.time()),
+                "chat": {"id": int(data["chat_id"]), "type": "private"}, "text": data.get("text", "")}})
+        return json_response({"ok": True, "result": True})
+
+
+# ---------- القياس ----------
+
+def summarize(samples: List[float]) -> dict:
+    ordered = sorted(samples)
+    return {"n": len(samples),
+            "min_ms": round(ordered[0] * 1000, 3),
+            "median_ms": round(statistics.median(ordered) * 1000, 3),
+            "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+            "mean_ms": round(statistics.fmean(ordered) * 1000, 3)}
+
+
+def measure(fn: Callable[[int], object], repeat: int, warmup: int = 1) -> dict:
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+async def measure_async(fn, repeat: int, warmup: int = 1) -> dict:
+    for i in range(warmup):
+        await fn(i)
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        await fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+# ---------- المجموعات ----------
+
+def bench_wiki(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    import wiki_headlines
+    html = site.pages["/wiki/Main_Page"].decode("utf-8")
+    results = {"wiki.extract.html_parser": measure(
+        lambda i: wiki_headlines.extract_headlines(html, backend="html.parser"), repeat)}
+    if wiki_headlines.etree is not None:
+        results["wiki.extract.lxml"] = measure(
+            lambda i: wiki_headlines.extract_headlines(html, backend="lxml"), repeat)
+    try:
+        import requests
+    except ImportError:
+        return results
+    with requests.Session() as session:
+        url = site.url + "/wiki/Main_Page"
+        results["wiki.fetch"] = measure(
+            lambda i: wiki_headlines.fetch_headlines(url, wiki_headlines.WIKI_SELECTOR, session=session), repeat)
+    return results
+
+
+def bench_aggregator(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    try:
+        import headline_aggregator as agg
+    except ImportError as e:
+        raise Skip(str(e))
+    # 50 مصدراً كل منها يتأخر 200ms: المجموع يجب أن يقارب أبطأ مصدر لا مجموعها
+    sources = [agg.Source(f"s{i}", f"{site.url}/arabic?delay=0.2&i={i}", "h3", 5) for i in range(50)]
+    aggregator = agg.HeadlineAggregator(per_host=50, js_fallback=False)
+    return {"aggregator.50_sources_200ms": measure(
+        lambda i: asyncio.run(aggregator.collect(sources)), max(3, repeat // 10))}
+
+
+def bench_weather(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    try:
+        import weather_collector as wc
+    except ImportError as e:
+        raise Skip(str(e))
+    try:
+        import httpx  # noqa: F401
+    except ImportError as e:
+        raise Skip(str(e))
+    collector = wc.WeatherCollector(api_key="bench", concurrency=20, api_base=site.url + "/data/2.5")
+    names = [f"City{i}" for i in range(200)]
+    ids = list(range(1, 201))
+    results = {
+        "weather.collect_200_names": measure(lambda i: asyncio.run(collector.collect(names)), max(3, repeat // 10)),
+        "weather.collect_200_ids": measure(lambda i: asyncio.run(collector.collect(ids)), max(3, repeat // 10)),
+    }
+    store = wc.WeatherStore(tempfile.mkdtemp(prefix="bench_weather_"))
+    rows = asyncio.run(collector.collect(names))
+    for day in range(50):
+        store.append(rows, ts=time.time() - day * 3600)
+    results["weather.city_stats_10k_rows"] = measure(lambda i: store.city_stats("temp"), repeat)
+    return results
+
+
+def _selenium_available():
+    try:
+        import selenium  # noqa: F401
+    except ImportError as e:
+        raise Skip(str(e))
+
+
+def bench_minha(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    _selenium_available()
+    from minha_bot import MinhaBot
+    try:
+        # ملف تعريف خاص بالقياس: لا يتشارك مجلد البوت العامل ولا يلوث كاشه
+        bot = MinhaBot(headless=True, profile="bench")
+    except Exception as e:
+        raise Skip(f"Chrome: {e}")
+    results = {}
+    try:
+        for state, expected in (("open", True), ("closed", False)):
+            url = f"{site.url}/minha/{state}"
+            results[f"minha.open_page.{state}"] = measure(lambda i: bot.open_page(url), repeat)
+            for probe, label in ((True, "js_probe"), (False, "legacy")):
+                bot.use_js_probe = probe
+                found = bot.check_appointment_open()[0]
+                stats = measure(lambda i: bot.check_appointment_open(), repeat)
+                stats["correct"] = found == expected
+                results[f"minha.check.{label}.{state}"] = stats
+    finally:
+        bot.close()
+    return results
+
+
+def bench_news(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    _selenium_available()
+    from browser import بوت_الأخبار
+    try:
+        bot = بوت_الأخبار()
+    except Exception as e:
+        raise Skip(f"Chrome: {e}")
+    try:
+        url = site.url + "/arabic"
+        return {"news.collect_headlines": measure(lambda i: bot.جمع_العناوين(url), max(3, repeat // 5))}
+    finally:
+        bot.إغلاق()
+
+
+def _update(update_id: int, text: str) -> dict:
+    message = {"message_id": update_id, "date": int(time.time()), "text": text,
+               "chat": {"id": 1000 + update_id % 50, "type": "private"},
+               "from": {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "Bench"}}
+    if text.startswith("/"):
+        message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return {"update_id": update_id, "message": message}
+
+
+async def _telegram(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    from telegram import Update
+    import tepm
+
+    bot = tepm.بوت_تليجرام_المتقدم()
+    app = bot.application
+    await app.initialize()
+    await bot.عند_البدء(app)
+    # انتظار أول دفعة اقتباسات من quotable البديل
+    for _ in range(100):
+        if bot.اقتباسات.fresh:
+            break
+        await asyncio.sleep(0.02)
+
+    counter = iter(range(1, 10 ** 9))
+    cases = {
+        "start": lambda i: "/start",
+        "help": lambda i: "/help",
+        "weather_cold": lambda i: f"/weather Bench{next(counter)}",
+        "weather_cached": lambda i: "/weather Riyadh",
+        "quote": lambda i: "/quote",
+        "message": lambda i: "مرحبا كيف حالك",
+        "subscribe": lambda i: "/subscribe الجزائر, -وهران",
+    }
+    results = {}
+    try:
+        for name, text in cases.items():
+            before = site.sent_messages
+
+            async def handle(i, text=text):
+                await app.process_update(Update.de_json(_update(next(counter), text(i)), app.bot))
+
+            stats = await measure_async(handle, repeat)
+            stats["replies"] = site.sent_messages - before
+            results[f"telegram.{name}"] = stats
+    finally:
+        await app.shutdown()
+        await bot.عند_الإيقاف(app)
+    return results
+
+
+def bench_telegram(site: FixtureSite, repeat: int) -> Dict[str, dict]:
+    try:
+        import telegram  # noqa: F401
+        import httpx  # noqa: F401
+    except ImportError as e:
+        raise Skip(str(e))
+    return asyncio.run(_telegram(site, repeat))
+
+
+GROUPS = {
+    "wiki": bench_wiki,
+    "aggregator": bench_aggregator,
+    "weather": bench_weather,
+    "minha": bench_minha,
+    "news": bench_news,
+    "telegram": bench_telegram,
+}
+
+
+def configure_env(site: FixtureSite, workdir: str):
+    """توجيه كل الوحدات إلى الخادم المحلي وملفات مؤقتة (قبل استيرادها)."""
+    os.environ.update({
+        "TELEGRAM_BOT_TOKEN": TOKEN,
+        "TELEGRAM_API_BASE": site.url,
+        "WEATHER_API_BASE": site.url + "/data/2.5",
+        "WEATHER_API_KEY": "bench",
+        "QUOTES_URL": site.url + "/quotes/random",
+        "QUOTES_FILE": os.path.join(workdir, "quotes.json"),
+        "SUBSCRIBERS_FILE": os.path.join(workdir, "subscribers.json"),
+        "HEADLINE_STORE": os.path.join(workdir, "headline_store"),
+        "RESULTS_FILE": os.path.join(workdir, "results.jsonl"),
+        "ALERTS": "0",
+        "HEADLESS": "1",
+    })
+
+
+# ---------- الحفظ والمقارنة ----------
+
+def compare(baseline: dict, current: dict, threshold: float) -> Tuple[List[str], int]:
+    """أسطر الفروق وعدد التراجعات؛ التراجع = زيادة الوسيط بأكثر من threshold."""
+    lines, regressions = [], 0
+    old, new = baseline.get("results", {}), current.get("results", {})
+    for name in sorted(set(old) | set(new)):
+        if name not in new:
+            lines.append(f"  - {name:40} (غير موجود الآن)")
+            continue
+        if name not in old:
+            lines.append(f"  + {name:40} {new[name]['median_ms']:10.3f} ms (جديد)")
+            continue
+        a, b = old[name]["median_ms"], new[name]["median_ms"]
+        change = (b - a) / a if a else 0.0
+        mark = "  "
+        if change > threshold:
+            mark, regressions = "▲ ", regressions + 1
+        elif change < -threshold:
+            mark = "▼ "
+        lines.append(f"{mark}{name:40} {a:10.3f} → {b:10.3f} ms  ({change:+.0%})")
+        if new[name].get("correct") is False:
+            lines.append(f"  ⚠️ {name}: نتيجة الفحص غير صحيحة")
+    lines.append(f"تراجعات أكبر من {threshold:.0%}: {regressions}")
+    return lines, regressions
+
+
+def run(groups: List[str], repeat: int, api_latency: float) -> dict:
+    site = FixtureSite(api_latency).start()
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    configure_env(site, workdir)
+    sys.path.insert(0, HERE)
+    report = {"timestamp": datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(), "platform": platform.platform(),
+              "repeat": repeat, "api_latency": api_latency, "results": {}, "skipped": {}}
+    try:
+        for name in groups:
+            start = time.perf_counter()
+            try:
+                results = GROUPS[name](site, repeat)
+            except Skip as e:
+                report["skipped"][name] = str(e)
+                print(f"⏭️  {name}: {e}")
+                continue
+            report["results"].update(results)
+            print(f"✓ {name} ({time.perf_counter() - start:.1f} ث)")
+            for key, stats in results.items():
+                print(f"    {key:40} median {stats['median_ms']:10.3f} ms  p95 {stats['p95_ms']:10.3f} ms")
+    finally:
+        site.stop()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="قياس أداء البوتات بدون إنترنت")
+    parser.add_argument("--only", nargs="+", choices=sorted(GROUPS), help="مجموعات محددة")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--api-latency", type=float, default=0.0, help="تأخير الواجهات البديلة بالثواني")
+    parser.add_argument("--baseline", default=os.path.join(RESULTS_DIR, "baseline.json"))
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.2, help="نسبة التراجع المسموحة للوسيط")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="مقارنة ملفي نتائج فقط")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0], encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.compare[1], encoding="utf-8") as f:
+            new = json.load(f)
+        lines, regressions = compare(old, new, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+
+    report = run(args.only or list(GROUPS), args.repeat, args.api_latency)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    path = os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    for target in (path, os.path.join(RESULTS_DIR, "latest.json")):
+        with open(target, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"✓ النتائج: {path}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✓ خط الأساس: {args.baseline}")
+        return 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            lines, regressions = compare(json.load(f), report, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,75 +1,79 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import time
+from driver_cache import start_chrome
+from page_wait import open_and_wait
+from lean_mode import LeanMode, format_stats
+import metrics
 import os
 import sys
 class بوت_الأخبار:
     def __init__(self):
+        # وضع التصفح الخفيف: لا نحتاج الصور والخطوط لقراءة العناوين (lean_mode.py)
+        self.خفيف = LeanMode.from_env()
+        # مخزن العناوين يُنشأ مرة واحدة (إنشاؤه يقرأ كل التاريخ لبناء فهرس التكرار)
+        self.مخزن = None
         self.إعداد_المتصفح()
     
     # ...existing code...
     def إعداد_المتصفح(self):
         """إعداد متصفح Chrome تلقائياً"""
-        الخيارات = webdriver.ChromeOptions()
-        # جعل الوضع الخفي قابل للتعطيل عبر متغير بيئة HEADLESS (0 = عرض المتصفح)
-        if os.getenv("HEADLESS", "1") == "1":
-            الخيارات.add_argument('--headless')
-        الخيارات.add_argument('--no-sandbox')
-        
-        # استخدام برنامج تشغيل محلي إذا عُيّن مسار عبر متغير بيئة CHROME_DRIVER_PATH
-        محلي = os.getenv("CHROME_DRIVER_PATH")
-        # إذا عَُيّن NO_DOWNLOAD=1 سنمنع التنزيل التلقائي (مفيدة عند اتصال بطيء)
-        NO_DOWNLOAD = os.getenv("NO_DOWNLOAD", "0") == "1"
+        def الخيارات_الإضافية(الخيارات):
+            # جعل الوضع الخفي قابل للتعطيل عبر متغير بيئة HEADLESS (0 = عرض المتصفح)
+            if os.getenv("HEADLESS", "1") == "1":
+                الخيارات.add_argument('--headless')
+            الخيارات.add_argument('--no-sandbox')
+            if self.خفيف:
+                self.خفيف.configure(الخيارات)
+
+        # CHROME_DRIVER_PATH و NO_DOWNLOAD ما زالا مدعومين؛ بدونهما يُنزَّل chromedriver مرة واحدة
+        # ويُخزَّن مساره، ويُستخدم ملف تعريف دائم لإقلاع أسرع (انظر driver_cache.py)
         try:
-            if محلي and os.path.exists(محلي):
-                print(f"استخدام ChromeDriver محلي: {محلي}")
-                self.متصفح = webdriver.Chrome(
-                    service=Service(محلي),
-                    options=الخيارات
-                )
-            else:
-                if NO_DOWNLOAD:
-                    raise RuntimeError(
-                        "لم يتم العثور على ChromeDriver محلي و NO_DOWNLOAD=1. "
-                        "اضبط متغير البيئة CHROME_DRIVER_PATH إلى مسار chromedriver.exe أو أوقف NO_DOWNLOAD."
-                    )
-                print("لا يوجد ChromeDriver محلي، سيتم تنزيله تلقائياً (قد يستغرق وقتاً)...")
-                # fallback: تنزيل تلقائي (قد يستغرق وقتاً حسب الشبكة)
-                self.متصفح = webdriver.Chrome(
-                    service=Service(ChromeDriverManager().install()),
-                    options=الخيارات
-                )
+            self.متصفح = start_chrome(الخيارات_الإضافية, profile="news")
+            if self.خفيف:
+                self.خفيف.enable(self.متصفح)
         except Exception as e:
             print("خطأ أثناء إعداد ChromeDriver:", e)
             raise
 # ...existing code...
     
-    def جمع_العناوين(self, الرابط):
-        """يجلب عناوين الأخبار من موقع"""
-        self.متصفح.get(الرابط)
-        time.sleep(3)  # انتظار تحميل الصفحة
+    @metrics.span("news.collect_headlines")
+    def جمع_العناوين(self, الرابط, المحدد='h3', العدد=5):
+        """يجلب عناوين الأخبار من موقع (المحدد: CSS، افتراضياً h3)"""
+        # انتظار جاهزية الصفحة (ظهور العناوين أو هدوء الشبكة) بدل انتظار ثابت
+        @metrics.span("news.page_load")
+        def تحميل():
+            return open_and_wait(self.متصفح, الرابط, selectors=[المحدد])
+        if self.خفيف:
+            زمن, إحصاءات = self.خفيف.navigate(self.متصفح, الرابط, تحميل)
+            if إحصاءات:
+                print(format_stats(إحصاءات))
+        else:
+            زمن = تحميل()
+        print(f"الصفحة جاهزة خلال {زمن:.2f} ث")
         
         # البحث عن عناصر الأخبار (تختلف حسب الموقع)
-        عناوين = self.متصفح.find_elements(By.TAG_NAME, 'h3')
-        
+        from selenium.webdriver.common.by import By
+        عناوين = self.متصفح.find_elements(By.CSS_SELECTOR, المحدد)
+
         الأخبار = []
-        for عنوان in عناوين[:5]:  # أول 5 أخبار
+        for عنوان in عناوين[:العدد]:  # أول 5 أخبار افتراضياً
             if عنوان.text.strip():
                 الأخبار.append(عنوان.text)
         
         return الأخبار
     
-    def حفظ_الأخبار(self, الأخبار, اسم_الملف='الأخبار.txt'):
-        """حفظ الأخبار في ملف"""
+    @metrics.span("news.save")
+    def حفظ_الأخبار(self, الأخبار, اسم_الملف='الأخبار.txt', المصدر='bbc-arabic'):
+        """حفظ الأخبار في ملف، وإلحاق الجديد منها في المخزن التراكمي (headline_store.py)"""
         with open(اسم_الملف, 'w', encoding='utf-8') as ملف:
             ملف.write("آخر الأخبار:\n")
             ملف.write("=" * 30 + "\n")
             for i, خبر in enumerate(الأخبار, 1):
                 ملف.write(f"{i}. {خبر}\n")
-        
-        print(f"✓ تم حفظ {len(الأخبار)} خبر في {اسم_الملف}")
+
+        if self.مخزن is None:
+            from headline_store import HeadlineStore
+            self.مخزن = HeadlineStore()
+        جديد = self.مخزن.add_many(الأخبار, source=المصدر)
+        print(f"✓ تم حفظ {len(الأخبار)} خبر في {اسم_الملف} ({len(جديد)} جديد)")
     
     def إغلاق(self):
         """إغلاق المتصفح"""
@@ -81,6 +85,8 @@ def main():
     # HEADLESS=0  -> لعرض نافذة المتصفح أثناء التجريب
     # CHROME_DRIVER_PATH=C:\path\to\chromedriver.exe  -> لتجنب التنزيل
     # NO_DOWNLOAD=1 -> إذا لم ترغب بتنزيل chromedriver تلقائياً
+    # METRICS_PORT=9109 -> زمن كل مرحلة على /metrics (metrics.py)
+    metrics.serve_from_env()
     بوت = بوت_الأخبار()
     try:
         أخبار = بوت.جمع_العناوين('https://www.bbc.com/arabic')
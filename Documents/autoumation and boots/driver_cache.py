@@ -0,0 +1,199 @@
+"""
+driver_cache.py
+
+إقلاع سريع لبوتات Selenium عند إعادة التشغيل المتكرر:
+- تحديد مسار chromedriver مرة واحدة وتثبيته في ملف كاش (مع فحص تطابق الإصدار الرئيسي مع Chrome)
+  بدل استدعاء ChromeDriverManager().install() في كل تشغيل
+- مجلد بيانات مستخدم (user-data-dir) دائم لكل بوت بحجم أقصى، ليبقى كاش HTTP والكوكيز بين التشغيلات؛
+  المجلد مقفل (file_lock.py) طوال عمر العملية، وعملية ثانية بنفس الاسم تأخذ مجلداً مؤقتاً
+  بدل مشاركته (Chrome لا يقبل مجلداً واحداً من عمليتين)
+- استيراد selenium و webdriver_manager عند الحاجة فقط
+- تقرير بزمن كل مرحلة من مراحل الإقلاع
+
+متغيرات البيئة:
+    CHROME_DRIVER_PATH   مسار chromedriver محلي (له الأولوية)
+    NO_DOWNLOAD=1        منع التنزيل التلقائي
+    BOTS_CACHE_DIR       مجلد الكاش (افتراضياً ~/.cache/minha_bots)
+    PERSIST_PROFILE=0    تعطيل المجلد الدائم والعودة لملف تعريف مؤقت
+    PROFILE_MAX_MB       الحجم الأقصى لمجلد التعريف (افتراضياً 300)
+"""
+
+import os
+import re
+import json
+import time
+import atexit
+import shutil
+import tempfile
+import subprocess
+from contextlib import contextmanager
+from typing import IO, Callable, Dict, Optional
+
+from file_lock import acquire
+
+CACHE_DIR = os.getenv("BOTS_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "minha_bots")
+DRIVER_CACHE_FILE = os.path.join(CACHE_DIR, "chromedriver.json")
+
+# مجلدات كاش داخل ملف التعريف يمكن حذفها بأمان عند تجاوز الحجم
+_PRUNABLE = ["Cache", "Code Cache", "GPUCache", os.path.join("Service Worker", "CacheStorage")]
+
+# مجلدات التعريف التي تملكها هذه العملية -> ملف قفلها المفتوح (يُحرر عند خروج العملية)
+_PROFILE_LOCKS: Dict[str, IO] = {}
+
+_CHROME_BINARIES = [
+    "google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome",
+    r"C:\Program Files\Google\Chrome\Application\chrome.exe",
+    r"C:\Program Files (x86)\Google\Chrome\Application\chrome.exe",
+]
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self) -> str:
+        total = sum(t for _, t in self.phases)
+        parts = " | ".join(f"{name} {t:.2f}s" for name, t in self.phases)
+        return f"زمن الإقلاع: {parts} | المجموع {total:.2f}s"
+
+
+def _version_of(binary: str) -> Optional[str]:
+    try:
+        out = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    m = re.search(r"(\d+)\.\d+\.\d+(\.\d+)?", out)
+    return m.group(0) if m else None
+
+
+def browser_binary() -> Optional[str]:
+    for name in _CHROME_BINARIES:
+        path = shutil.which(name) or (name if os.path.isfile(name) else None)
+        if path:
+            return path
+    return None
+
+
+def _mtime(path: Optional[str]) -> Optional[float]:
+    try:
+        return os.path.getmtime(path) if path else None
+    except OSError:
+        return None
+
+
+def _major(v: Optional[str]) -> Optional[str]:
+    return v.split(".")[0] if v else None
+
+
+def _load_cache() -> dict:
+    try:
+        with open(DRIVER_CACHE_FILE, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(data: dict):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(DRIVER_CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def resolve_driver() -> str:
+    """مسار chromedriver: المحلي، ثم المثبت في الكاش إن طابق إصدار Chrome، ثم التنزيل مرة واحدة."""
+    local = os.getenv("CHROME_DRIVER_PATH")
+    if local and os.path.exists(local):
+        return local
+
+    cached = _load_cache()
+    binary = browser_binary()
+    if binary and binary == cached.get("browser_path") and _mtime(binary) == cached.get("browser_mtime"):
+        # Chrome لم يتغير منذ آخر تشغيل -> لا حاجة لتشغيل chrome --version
+        browser = cached.get("browser_version")
+    else:
+        browser = _version_of(binary) if binary else None
+    if cached.get("path") and os.path.exists(cached["path"]):
+        # إن تعذر معرفة إصدار Chrome نثق بالكاش؛ وإلا نشترط تطابق الإصدار الرئيسي
+        if browser is None or _major(browser) == _major(cached.get("driver_version")):
+            if binary and _mtime(binary) != cached.get("browser_mtime"):
+                cached.update(browser_path=binary, browser_mtime=_mtime(binary), browser_version=browser)
+                _save_cache(cached)
+            return cached["path"]
+        print(f"إصدار chromedriver المخزن ({cached.get('driver_version')}) لا يطابق Chrome ({browser}).")
+
+    if os.getenv("NO_DOWNLOAD", "0") == "1":
+        raise RuntimeError("لم يُعثر على chromedriver محلي أو مخزن و NO_DOWNLOAD=1.")
+    from webdriver_manager.chrome import ChromeDriverManager
+    print("تنزيل chromedriver تلقائياً (مرة واحدة ثم يُخزَّن مساره)...")
+    path = ChromeDriverManager().install()
+    _save_cache({"path": path, "driver_version": _version_of(path), "browser_path": binary,
+                 "browser_mtime": _mtime(binary), "browser_version": browser})
+    return path
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def prepare_profile(name: str, max_mb: float = None) -> str:
+    """
+    مجلد تعريف دائم للبوت name؛ يُقلَّم كاشه (أو يُعاد إنشاؤه) إذا تجاوز max_mb.
+    إن كان مقفلاً من عملية أخرى يعاد مجلد مؤقت يُحذف عند الخروج.
+    """
+    if max_mb is None:
+        max_mb = float(os.getenv("PROFILE_MAX_MB", "300"))
+    path = os.path.join(CACHE_DIR, f"profile-{name}")
+    if path not in _PROFILE_LOCKS:
+        lock = acquire(path + ".lock", blocking=False)
+        if lock is None:
+            temp = tempfile.mkdtemp(prefix=f"profile-{name}-")
+            atexit.register(shutil.rmtree, temp, True)
+            print(f"ملف التعريف {path} مستخدم من عملية أخرى -> ملف تعريف مؤقت")
+            return temp
+        _PROFILE_LOCKS[path] = lock
+    limit = max_mb * 1024 * 1024
+    if os.path.isdir(path) and _dir_size(path) > limit:
+        for sub in _PRUNABLE:
+            shutil.rmtree(os.path.join(path, "Default", sub), ignore_errors=True)
+        if _dir_size(path) > limit:
+            shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def start_chrome(configure: Callable, profile: str, timer: StartupTimer = None):
+    """
+    إنشاء webdriver.Chrome مع قياس كل مرحلة.
+    configure(options) يضيف خيارات البوت (headless، no-sandbox ...).
+    """
+    timer = timer or StartupTimer()
+    with timer.phase("import"):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+    with timer.phase("options"):
+        opts = webdriver.ChromeOptions()
+        configure(opts)
+    with timer.phase("driver"):
+        path = resolve_driver()
+    if os.getenv("PERSIST_PROFILE", "1") == "1":
+        with timer.phase("profile"):
+            opts.add_argument(f"--user-data-dir={prepare_profile(profile)}")
+    with timer.phase("launch"):
+        driver = webdriver.Chrome(service=Service(path), options=opts)
+    print(timer.report())
+    return driver
@@ -0,0 +1,71 @@
+"""
+file_lock.py
+
+قفل ملفات بين العمليات (fcntl على لينكس/ماك، msvcrt على ويندوز) لملفات يكتبها أكثر من بوت:
+- file_lock(path): قفل حصري حول قراءة-تعديل-كتابة (آخر رقم ثم إلحاق، قائمة المشتركين ...)
+- acquire(path, blocking=False): قفل يبقى مع صاحبه (مثل مجلد ملف تعريف Chrome)، أو None إن كان مأخوذاً
+
+القفل على ملف جانبي مستقل (path) لا على ملف البيانات نفسه، فيمكن استبدال ملف البيانات ذرياً (os.replace).
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import IO, Optional
+
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:  # ويندوز
+    fcntl = None
+    import msvcrt
+
+
+def _try(f: IO) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def acquire(path: str, blocking: bool = True, poll: float = 0.05) -> Optional[IO]:
+    """فتح ملف القفل وأخذه؛ يعيد الملف المفتوح (يُمرر إلى release) أو None إن كان مأخوذاً و blocking=False."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    f = open(path, "a+")
+    if fcntl is not None and blocking:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        return f
+    while not _try(f):
+        if not blocking:
+            f.close()
+            return None
+        # msvcrt لا ينتظر بلا حد (LK_LOCK يستسلم بعد ~10 ثوان) -> إعادة المحاولة
+        time.sleep(poll)
+    return f
+
+
+def release(f: IO):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    finally:
+        f.close()
+
+
+@contextmanager
+def file_lock(path: str):
+    f = acquire(path)
+    try:
+        yield
+    finally:
+        release(f)
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+headline_aggregator.py
+
+جمع العناوين من مصادر كثيرة في وقت واحد:
+- كل المصادر تُجلب بالتوازي عبر عميل httpx واحد مشترك (اتصالات مُعاد استخدامها)
+- حد للطلبات المتزامنة لكل مضيف (PER_HOST، افتراضياً 4) حتى لا نُثقل موقعاً واحداً
+- الاستخراج تدفقي بنفس محلل wiki_headlines ويغلق الاتصال فور جمع العدد المطلوب
+- المصادر التي تحتاج JavaScript فعلاً ("js": true، أو صفحة ثابتة بلا نتائج مع JS_FALLBACK=1)
+  تمر عبر Chrome في browser.py في خيط منفصل، بالتوازي مع جلب الصفحات الأخرى
+- توحيد النصوص وحذف المكرر بين المصادر، وإلحاق الجديد منها في headline_store
+
+ملف المصادر (SOURCES_FILE أو --sources) قائمة JSON:
+    [{"name": "wiki", "url": "https://en.wikipedia.org/wiki/Main_Page",
+      "selector": "#mp-upper ul li a", "limit": 5},
+     {"name": "bbc", "url": "https://www.bbc.com/arabic", "selector": "h3", "js": true}]
+
+تشغيل:
+    python .\\headline_aggregator.py --sources sources.json --out headlines.json
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from headline_store import HeadlineStore, headline_key
+from wiki_headlines import HEADERS, WIKI_SELECTOR, WIKI_URL, HeadlineExtractor
+
+PER_HOST = int(os.getenv("PER_HOST", "4"))
+JS_FALLBACK = os.getenv("JS_FALLBACK", "1") == "1"
+
+
+class Source(NamedTuple):
+    name: str
+    url: str
+    selector: str = "h3"
+    limit: int = 5
+    js: bool = False
+
+
+DEFAULT_SOURCES = [
+    Source("wikipedia", WIKI_URL, WIKI_SELECTOR, 5),
+    Source("bbc-arabic", "https://www.bbc.com/arabic", "h3", 5),
+]
+
+
+def load_sources(path: str) -> List[Source]:
+    with open(path, encoding="utf-8") as f:
+        items = json.load(f)
+    return [Source(item.get("name") or item["url"], item["url"], item.get("selector", "h3"),
+                   int(item.get("limit", 5)), bool(item.get("js", False))) for item in items]
+
+
+class SourceResult(NamedTuple):
+    source: Source
+    headlines: List[str]
+    seconds: float
+    via: str
+    error: Optional[str] = None
+
+
+class HeadlineAggregator:
+    def __init__(self, per_host: int = PER_HOST, timeout: float = 10.0, js_fallback: bool = JS_FALLBACK,
+                 max_connections: int = 100):
+        self.per_host = per_host
+        self.timeout = timeout
+        self.js_fallback = js_fallback
+        self.max_connections = max_connections
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+        self._browser = None
+        self._browser_lock = None
+
+    async def _fetch_static(self, http: httpx.AsyncClient, source: Source) -> List[str]:
+        extractor = HeadlineExtractor(source.selector, source.limit)
+        async with self._host_limits[urlsplit(source.url).netloc]:
+            async with http.stream("GET", source.url) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_text():
+                    if extractor.feed(chunk):
+                        # الخروج من الكتلة يغلق الاتصال دون تنزيل بقية الصفحة
+                        break
+        return extractor.close()
+
+    def _collect_js(self, source: Source) -> List[str]:
+        # Chrome واحد يُنشأ عند أول حاجة ويخدم مصادر JS بالتتابع (السائق لا يقبل أوامر متوازية)
+        if self._browser is None:
+            from browser import بوت_الأخبار
+            self._browser = بوت_الأخبار()
+        return self._browser.جمع_العناوين(source.url, source.selector, source.limit)
+
+    async def _fetch_js(self, source: Source) -> List[str]:
+        async with self._browser_lock:
+            return await asyncio.to_thread(self._collect_js, source)
+
+    async def _fetch(self, http: httpx.AsyncClient, source: Source) -> SourceResult:
+        start = time.perf_counter()
+        via = "browser" if source.js else "http"
+        try:
+            if source.js:
+                headlines = await self._fetch_js(source)
+            else:
+                headlines = await self._fetch_static(http, source)
+                if not headlines and self.js_fallback:
+                    via = "browser"
+                    headlines = await self._fetch_js(source)
+        except Exception as e:
+            return SourceResult(source, [], time.perf_counter() - start, via, str(e) or type(e).__name__)
+        return SourceResult(source, headlines, time.perf_counter() - start, via)
+
+    async def collect(self, sources: List[Source]) -> List[SourceResult]:
+        self._browser_lock = asyncio.Lock()
+        self._host_limits = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        limits = httpx.Limits(max_connections=self.max_connections,
+                              max_keepalive_connections=self.max_connections)
+        try:
+            async with httpx.AsyncClient(headers=HEADERS, timeout=httpx.Timeout(self.timeout), limits=limits,
+                                         follow_redirects=True) as http:
+                return await asyncio.gather(*(self._fetch(http, s) for s in sources))
+        finally:
+            if self._browser is not None:
+                try:
+                    self._browser.إغلاق()
+                except Exception:
+                    pass
+                self._browser = None
+
+
+def merge(results: List[SourceResult]) -> List[dict]:
+    """دمج النتائج بترتيب المصادر مع حذف العناوين المكررة بعد التوحيد."""
+    seen = set()
+    merged = []
+    for result in results:
+        for title in result.headlines:
+            title = " ".join(title.split())
+            key = headline_key(title)
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged.append({"title": title, "source": result.source.name, "url": result.source.url})
+    return merged
+
+
+def aggregate(sources: List[Source], **kwargs) -> List[dict]:
+    return merge(asyncio.run(HeadlineAggregator(**kwargs).collect(sources)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="جمع العناوين من عدة مصادر بالتوازي")
+    parser.add_argument("--sources", default=os.getenv("SOURCES_FILE"), help="ملف JSON بالمصادر")
+    parser.add_argument("--out", default="headlines.json")
+    parser.add_argument("--per-host", type=int, default=PER_HOST)
+    args = parser.parse_args(argv)
+
+    sources = load_sources(args.sources) if args.sources else DEFAULT_SOURCES
+    start = time.perf_counter()
+    results = asyncio.run(HeadlineAggregator(per_host=args.per_host).collect(sources))
+    elapsed = time.perf_counter() - start
+
+    for r in results:
+        status = f"❌ {r.error}" if r.error else f"{len(r.headlines)} عنوان"
+        print(f"{r.source.name:20} {r.via:8} {r.seconds:6.2f} ث  {status}")
+    headlines = merge(results)
+    slowest = max((r.seconds for r in results), default=0.0)
+    print(f"المجموع: {len(headlines)} عنوان فريد من {len(sources)} مصدر خلال {elapsed:.2f} ث "
+          f"(أبطأ مصدر {slowest:.2f} ث)")
+
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"timestamp": datetime.now().isoformat(), "headlines": headlines},
+                  f, indent=4, ensure_ascii=False)
+    store = HeadlineStore()
+    new = sum(len(store.add_many(r.headlines, r.source.name, r.source.url)) for r in results)
+    print(f"🆕 {new} عنوان جديد في المخزن (آخر رقم {store.last_seq})")
+    return 0 if headlines else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+headline_store.py
+
+مخزن عناوين تراكمي بدل الكتابة فوق الملف في كل تشغيل:
+- إلحاق فقط: كل عنوان جديد سجل JSONL برقم تسلسلي متزايد (seq) في مقطع (segment) نشط
+- فهرس بصمات (blake2b للنص الموحّد) في الذاكرة: فحص التكرار O(1) ولا يُكتب العنوان مرتين
+- عدة عمليات على نفس المجلد: الإلحاق والدمج تحت قفل (file_lock.py)، وقبل الإلحاق يُقرأ ما أضافته
+  العمليات الأخرى منذ آخر قراءة (آخر مقطع فقط) فلا يتكرر رقم seq ولا عنوان
+- المقطع النشط يُغلق عند تجاوز SEGMENT_KB، والمقاطع المغلقة الصغيرة تُدمج دورياً في مقاطع
+  مضغوطة (gzip) مع حذف ما تجاوز HEADLINES_RETAIN_DAYS (0 = بلا حذف)
+- قراءة "الجديد منذ المؤشر": since(cursor) يقفز مباشرة إلى المقطع الذي يحتوي المؤشر،
+  و read_new(consumer) يحفظ مؤشر كل مستهلك فلا يعالج إلا ما لم يره
+
+    store = HeadlineStore()
+    store.add_many(["عنوان 1", "عنوان 2"], source="bbc-arabic")   # -> العناوين الجديدة فقط
+    records, cursor = store.since(cursor)
+
+استعلام:
+    python .\\headline_store.py --since 120
+    python .\\headline_store.py --consumer telegram      # الجديد منذ آخر قراءة لهذا المستهلك
+    python .\\headline_store.py --compact
+
+متغيرات البيئة: HEADLINE_STORE، SEGMENT_KB، HEADLINES_RETAIN_DAYS
+"""
+
+import os
+import re
+import sys
+import glob
+import gzip
+import json
+import argparse
+import datetime
+import hashlib
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from file_lock import file_lock
+from results_log import TS_FORMAT, now_ts
+from text_match import normalize_arabic
+
+HEADLINE_STORE = os.getenv("HEADLINE_STORE", "headline_store")
+_PUNCT = re.compile(r"[^\w\s]")
+_SEGMENT = re.compile(r"seg-(\d+)\.jsonl(\.gz)?$")
+
+
+def headline_key(title: str) -> str:
+    """نص المقارنة: موحّد بلا علامات ترقيم (نفس العنوان بعلامات مختلفة = عنوان واحد)."""
+    return " ".join(_PUNCT.sub(" ", normalize_arabic(title)).split())
+
+
+def content_hash(title: str) -> str:
+    return hashlib.blake2b(headline_key(title).encode("utf-8"), digest_size=12).hexdigest()
+
+
+def _open_segment(path: str):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8")
+
+
+def _read_segment(path: str) -> Iterator[dict]:
+    with _open_segment(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # سطر أخير ناقص بعد انقطاع مفاجئ
+                continue
+
+
+class HeadlineStore:
+    def __init__(self, directory: str = HEADLINE_STORE, segment_bytes: int = None, retain_days: float = None,
+                 compact_every: int = 8):
+        self.directory = directory
+        self.segment_bytes = segment_bytes or int(os.getenv("SEGMENT_KB", "256")) * 1024
+        self.retain_days = float(os.getenv("HEADLINES_RETAIN_DAYS", "0")) if retain_days is None else retain_days
+        # عدد المقاطع المغلقة غير المضغوطة الذي يطلق الدمج
+        self.compact_every = compact_every
+        os.makedirs(directory, exist_ok=True)
+        self.index = set()
+        self.last_seq = 0
+        self._active = None
+        # (المسار، الحجم) لآخر مقطع قُرئ: إن لم يتغير فلم تضف عملية أخرى شيئاً
+        self._tail = None
+        self._load()
+
+    # ---------- الملفات ----------
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(أول seq، المسار) لكل مقطع مرتبة تصاعدياً."""
+        found = []
+        for path in glob.glob(os.path.join(self.directory, "seg-*.jsonl*")):
+            m = _SEGMENT.search(os.path.basename(path))
+            if m:
+                found.append((int(m.group(1)), path))
+        return sorted(found)
+
+    def _segment_path(self, first_seq: int, compressed: bool = False) -> str:
+        name = f"seg-{first_seq:010d}.jsonl" + (".gz" if compressed else "")
+        return os.path.join(self.directory, name)
+
+    def _lock(self):
+        return file_lock(os.path.join(self.directory, "store.lock"))
+
+    def _load(self, segments: List[Tuple[int, str]] = None):
+        segments = self.segments() if segments is None else segments
+        for _, path in segments:
+            for rec in _read_segment(path):
+                self.index.add(rec["hash"])
+                self.last_seq = max(self.last_seq, rec["seq"])
+        self._active = None
+        self._tail = None
+        if segments:
+            path = segments[-1][1]
+            size = os.path.getsize(path)
+            self._tail = (path, size)
+            if not path.endswith(".gz") and size < self.segment_bytes:
+                self._active = path
+
+    def _refresh(self):
+        """(تحت القفل) قراءة ما ألحقته عمليات أخرى: المقاطع التي قد تحتوي seq > last_seq فقط."""
+        segments = self.segments()
+        if not segments:
+            self._active = self._tail = None
+            return
+        path = segments[-1][1]
+        if self._tail == (path, os.path.getsize(path)):
+            return
+        start = 0
+        for i, (first_seq, _) in enumerate(segments):
+            if first_seq <= self.last_seq:
+                start = i
+        self._load(segments[start:])
+
+    def _write(self, records: List[dict]):
+        if self._active is None:
+            self._active = self._segment_path(records[0]["seq"])
+        with open(self._active, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+            f.flush()
+            os.fsync(f.fileno())
+        size = os.path.getsize(self._active)
+        self._tail = (self._active, size)
+        if size >= self.segment_bytes:
+            self._active = None
+            sealed = [p for _, p in self.segments() if not p.endswith(".gz")]
+            if len(sealed) >= self.compact_every:
+                self._compact()
+
+    # ---------- الكتابة ----------
+
+    def __contains__(self, title: str) -> bool:
+        return content_hash(title) in self.index
+
+    def add_many(self, titles: Iterable[str], source: str = "", url: str = "") -> List[dict]:
+        """إلحاق العناوين غير الموجودة فقط؛ يعيد السجلات الجديدة."""
+        ts = now_ts()
+        titles = [" ".join(title.split()) for title in titles]
+        with self._lock():
+            self._refresh()
+            new = []
+            for title in titles:
+                if not title:
+                    continue
+                digest = content_hash(title)
+                if digest in self.index:
+                    continue
+                self.index.add(digest)
+                self.last_seq += 1
+                rec = {"seq": self.last_seq, "ts": ts, "source": source, "title": title, "hash": digest}
+                if url:
+                    rec["url"] = url
+                new.append(rec)
+            if new:
+                self._write(new)
+        return new
+
+    def add(self, title: str, source: str = "", url: str = "") -> Optional[dict]:
+        new = self.add_many([title], source, url)
+        return new[0] if new else None
+
+    # ---------- القراءة ----------
+
+    def since(self, cursor: int = 0, limit: int = None) -> Tuple[List[dict], int]:
+        """السجلات ذات seq > cursor، والمؤشر الجديد (آخر seq مُعاد)."""
+        segments = self.segments()
+        # أول مقطع قد يحتوي seq > cursor: آخر مقطع يبدأ عند cursor أو قبله
+        start = 0
+        for i, (first_seq, _) in enumerate(segments):
+            if first_seq <= cursor:
+                start = i
+        records = []
+        for _, path in segments[start:]:
+            for rec in _read_segment(path):
+                if rec["seq"] > cursor:
+                    records.append(rec)
+                    if limit and len(records) >= limit:
+                        return records, rec["seq"]
+        return records, (records[-1]["seq"] if records else cursor)
+
+    def _cursors_path(self) -> str:
+        return os.path.join(self.directory, "cursors.json")
+
+    def _load_cursors(self) -> dict:
+        try:
+            with open(self._cursors_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def read_new(self, consumer: str, limit: int = None) -> List[dict]:
+        """الجديد منذ آخر قراءة لهذا المستهلك، مع حفظ مؤشره."""
+        with self._lock():
+            cursors = self._load_cursors()
+            records, cursor = self.since(cursors.get(consumer, 0), limit)
+            if records:
+                cursors[consumer] = cursor
+                tmp = self._cursors_path() + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(cursors, f)
+                os.replace(tmp, self._cursors_path())
+        return records
+
+    # ---------- الدمج ----------
+
+    def compact(self, target_bytes: int = None):
+        """
+        دمج المقاطع المغلقة في مقاطع مضغوطة بحجم target_bytes تقريباً (افتراضياً 16 ضعف المقطع)،
+        وحذف السجلات الأقدم من retain_days. أرقام seq لا تتغير فتبقى مؤشرات المستهلكين صالحة.
+        """
+        with self._lock():
+            self._refresh()
+            self._compact(target_bytes)
+
+    def _compact(self, target_bytes: int = None):
+        target_bytes = target_bytes or self.segment_bytes * 16
+        cutoff = None
+        if self.retain_days:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.retain_days)).strftime(TS_FORMAT)
+        sealed = [(s, p) for s, p in self.segments() if p != self._active]
+        if not sealed:
+            return
+
+        groups, current, size = [], [], 0
+        for first_seq, path in sealed:
+            current.append(path)
+            size += os.path.getsize(path)
+            if size >= target_bytes:
+                groups.append(current)
+                current, size = [], 0
+        if current:
+            groups.append(current)
+
+        for group in groups:
+            if len(group) == 1 and group[0].endswith(".gz") and cutoff is None:
+                continue
+            records = [r for path in group for r in _read_segment(path)]
+            kept = [r for r in records if cutoff is None or r["ts"] >= cutoff]
+            for r in records:
+                if cutoff is not None and r["ts"] < cutoff:
+                    self.index.discard(r["hash"])
+            if kept:
+                out = self._segment_path(kept[0]["seq"], compressed=True)
+                tmp = out + ".tmp"
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in kept))
+                os.replace(tmp, out)
+                for path in group:
+                    if path != out:
+                        os.remove(path)
+            else:
+                for path in group:
+                    os.remove(path)
+        segments = self.segments()
+        if segments:
+            self._tail = (segments[-1][1], os.path.getsize(segments[-1][1]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="مخزن العناوين التراكمي")
+    parser.add_argument("--dir", default=HEADLINE_STORE)
+    parser.add_argument("--since", type=int, default=None, help="عرض السجلات بعد هذا الرقم")
+    parser.add_argument("--consumer", help="عرض الجديد منذ آخر قراءة لهذا المستهلك")
+    parser.add_argument("--compact", action="store_true")
+    args = parser.parse_args(argv)
+
+    store = HeadlineStore(args.dir)
+    if args.compact:
+        store.compact()
+        print(f"✓ {len(store.segments())} مقطع، {len(store.index)} عنوان")
+        return 0
+    if args.consumer:
+        records = store.read_new(args.consumer)
+    else:
+        records, _ = store.since(args.since or 0)
+    for r in records:
+        print(f"{r['seq']:>6}  {r['ts']}  [{r['source']}] {r['title']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
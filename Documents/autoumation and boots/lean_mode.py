@@ -0,0 +1,147 @@
+"""
+lean_mode.py
+
+وضع تصفح خفيف للبوتات: فحوصنا تقرأ النصوص والأزرار والنماذج فقط، لذلك:
+- حظر أنواع موارد (صور، خطوط، وسائط، متتبعات، ...) وأنماط روابط أثناء التنقل عبر DevTools
+  (Network.setBlockedURLs)
+- استراتيجية تحميل الصفحة (pageLoadStrategy) افتراضياً eager: لا ننتظر الموارد الفرعية
+- تقرير لكل صفحة: عدد الطلبات والبايتات المنقولة والطلبات المحظورة، ومقدار التوفير
+  مقارنة بتحميل مرجعي واحد بدون حظر لكل مضيف (LEAN_BASELINE=1)
+
+ملاحظة: حظر stylesheet غير مفعل افتراضياً لأن فحص الظهور (is_displayed / getComputedStyle)
+يعتمد على CSS؛ بدونه قد يبدو زر مخفي ظاهراً.
+
+متغيرات البيئة:
+    LEAN=0                   تعطيل الوضع الخفيف
+    LEAN_BLOCK               أنواع الموارد المحظورة (افتراضياً image,font,media,tracker)
+    LEAN_PATTERNS            أنماط روابط إضافية مفصولة بفواصل (مثال: *ads*,*.gif)
+    PAGE_LOAD_STRATEGY       normal | eager | none
+    LEAN_BASELINE=1          قياس تحميل مرجعي بدون حظر مرة لكل مضيف لحساب التوفير
+    LEAN_STATS=0             عدم طلب سجل الأداء (لا إحصاءات)؛ التبويبات المتعددة (TARGETS_FILE) تعطله
+                             افتراضياً لأنها لا تقرأه، وسجل غير مقروء يتراكم في ذاكرة chromedriver
+"""
+
+import os
+import json
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+RESOURCE_PATTERNS: Dict[str, List[str]] = {
+    "image": ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico", "*.bmp"],
+    "font": ["*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"],
+    "stylesheet": ["*.css"],
+    "media": ["*.mp4", "*.webm", "*.m3u8", "*.mp3", "*.ogg", "*.wav"],
+    "tracker": [
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*facebook.net*", "*connect.facebook.com*",
+        "*hotjar.com*", "*scorecardresearch.com*", "*chartbeat.com*", "*chartbeat.net*",
+        "*permutive.com*", "*optimizely.com*", "*newrelic.com*", "*nr-data.net*",
+    ],
+}
+DEFAULT_BLOCK = ["image", "font", "media", "tracker"]
+
+
+class LeanMode:
+    def __init__(self, block_types: List[str] = None, extra_patterns: List[str] = None,
+                 page_load_strategy: str = "eager", baseline: bool = False, stats: bool = True):
+        self.block_types = DEFAULT_BLOCK if block_types is None else block_types
+        self.patterns = []
+        for kind in self.block_types:
+            if kind not in RESOURCE_PATTERNS:
+                print(f"تجاهل نوع مورد غير معروف: {kind}")
+                continue
+            self.patterns.extend(RESOURCE_PATTERNS[kind])
+        self.patterns.extend(extra_patterns or [])
+        self.page_load_strategy = page_load_strategy
+        # القياس المرجعي يعتمد على الإحصاءات
+        self.stats = stats
+        self.baseline = baseline and stats
+        # host -> {"requests": n, "bytes": n} من تحميل بدون حظر
+        self.baselines: Dict[str, dict] = {}
+
+    @classmethod
+    def from_env(cls):
+        if os.getenv("LEAN", "1") != "1":
+            return None
+        block = os.getenv("LEAN_BLOCK")
+        extra = os.getenv("LEAN_PATTERNS", "")
+        return cls(
+            block_types=[b.strip() for b in block.split(",") if b.strip()] if block is not None else None,
+            extra_patterns=[p.strip() for p in extra.split(",") if p.strip()],
+            page_load_strategy=os.getenv("PAGE_LOAD_STRATEGY", "eager"),
+            baseline=os.getenv("LEAN_BASELINE", "0") == "1",
+            stats=os.getenv("LEAN_STATS", "1") == "1",
+        )
+
+    def configure(self, opts):
+        """خيارات تُضاف قبل تشغيل Chrome."""
+        opts.page_load_strategy = self.page_load_strategy
+        if "image" in self.block_types:
+            opts.add_argument("--blink-settings=imagesEnabled=false")
+        # سجل الأداء لحساب الطلبات والبايتات لكل صفحة؛ يُطلب فقط إن كان سيُقرأ (navigate)
+        if self.stats:
+            opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    def enable(self, driver, blocked: bool = True):
+        """تفعيل الحظر في التبويب الحالي (يُستدعى لكل تبويب جديد)."""
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self.patterns if blocked else []})
+
+    def wants_baseline(self, url: str) -> bool:
+        return self.baseline and (urlparse(url).hostname or url) not in self.baselines
+
+    def navigate(self, driver, url: str, open_fn: Callable):
+        """تنفيذ open_fn (التنقل والانتظار) وإرجاع (نتيجته، إحصاءات الصفحة أو {} مع LEAN_STATS=0)."""
+        if not self.stats:
+            return open_fn(), {}
+        baseline_run = self.wants_baseline(url)
+        if baseline_run:
+            self.enable(driver, blocked=False)
+        try:
+            driver.get_log("performance")  # تفريغ أحداث الصفحة السابقة
+        except Exception:
+            pass
+        result = open_fn()
+        stats = self.page_stats(driver, url, baseline_run)
+        if baseline_run:
+            self.enable(driver)
+        return result, stats
+
+    def page_stats(self, driver, url: str, baseline_run: bool = False) -> dict:
+        """
+        يقرأ سجل الأداء منذ آخر استدعاء ويعيد: requests، bytes، blocked،
+        و saved_requests/saved_bytes إن وُجد قياس مرجعي للمضيف.
+        """
+        stats = {"requests": 0, "bytes": 0, "blocked": 0}
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return stats
+        for entry in entries:
+            try:
+                msg = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = msg.get("method")
+            if method == "Network.requestWillBeSent":
+                stats["requests"] += 1
+            elif method == "Network.loadingFinished":
+                stats["bytes"] += int(msg["params"].get("encodedDataLength", 0))
+            elif method == "Network.loadingFailed" and msg["params"].get("blockedReason"):
+                stats["blocked"] += 1
+
+        host = urlparse(url).hostname or url
+        if baseline_run:
+            self.baselines[host] = {"requests": stats["requests"], "bytes": stats["bytes"]}
+        elif host in self.baselines:
+            base = self.baselines[host]
+            stats["saved_requests"] = base["requests"] - (stats["requests"] - stats["blocked"])
+            stats["saved_bytes"] = base["bytes"] - stats["bytes"]
+        return stats
+
+
+def format_stats(stats: dict) -> str:
+    line = f"طلبات: {stats['requests']} | محظورة: {stats['blocked']} | منقول: {stats['bytes'] / 1024:.0f} KB"
+    if "saved_bytes" in stats:
+        line += f" | توفير: {stats['saved_requests']} طلب، {stats['saved_bytes'] / 1024:.0f} KB"
+    return line
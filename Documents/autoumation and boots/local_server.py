@@ -0,0 +1,125 @@
+"""
+local_server.py
+
+خادم HTTP/1.1 صغير فوق asyncio بدون مكتبات خارجية، لاختبارات الحمل والقياس بدون إنترنت
+(بديل محلي لـ Bot API وصفحات ومصادر مسجلة).
+
+    async def handler(req: Request) -> Response: ...
+    server = await start(handler, port=0)       # داخل حلقة asyncio
+    server = ServerThread(handler).start()      # أو في خيط خلفي لكود متزامن (Selenium، requests)
+"""
+
+import json
+import asyncio
+import threading
+from typing import Awaitable, Callable, Dict, NamedTuple, Optional
+from urllib.parse import parse_qs, urlsplit
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    query: Dict[str, list]
+    headers: Dict[str, str]
+    body: bytes
+
+    def form(self) -> dict:
+        """جسم الطلب كقاموس سواء كان JSON أو x-www-form-urlencoded."""
+        ctype = self.headers.get("content-type", "")
+        if "json" in ctype:
+            return json.loads(self.body or b"{}")
+        return {k: v[0] for k, v in parse_qs(self.body.decode("utf-8")).items()}
+
+
+class Response(NamedTuple):
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: Optional[Dict[str, str]] = None
+
+
+def json_response(data, status: int = 200) -> Response:
+    return Response(status, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            429: "Too Many Requests", 500: "Internal Server Error"}
+
+
+async def _serve_connection(handler: Handler, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            method, target, _ = line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                h = await reader.readline()
+                if h in (b"\r\n", b"\n", b""):
+                    break
+                k, v = h.decode("latin-1").split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+            body = await reader.readexactly(int(headers.get("content-length", "0") or 0))
+            url = urlsplit(target)
+            req = Request(method, url.path, parse_qs(url.query), headers, body)
+            try:
+                resp = await handler(req)
+            except Exception as e:
+                resp = Response(500, str(e).encode("utf-8"))
+            extra = "".join(f"{k}: {v}\r\n" for k, v in (resp.headers or {}).items())
+            head = (f"HTTP/1.1 {resp.status} {_REASONS.get(resp.status, 'OK')}\r\n"
+                    f"Content-Type: {resp.content_type}\r\n"
+                    f"Content-Length: {len(resp.body)}\r\n{extra}\r\n")
+            writer.write(head.encode("latin-1") + resp.body)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start(handler: Handler, host: str = "127.0.0.1", port: int = 0) -> asyncio.AbstractServer:
+    """بدء الخادم؛ المنفذ الفعلي في server.sockets[0].getsockname()[1]."""
+    return await asyncio.start_server(lambda r, w: _serve_connection(handler, r, w), host, port)
+
+
+def server_port(server: asyncio.AbstractServer) -> int:
+    return server.sockets[0].getsockname()[1]
+
+
+class ServerThread:
+    """تشغيل الخادم في حلقة asyncio داخل خيط خلفي."""
+
+    def __init__(self, handler: Handler, host: str = "127.0.0.1", port: int = 0):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.server = self.loop.run_until_complete(start(self.handler, self.host, self.port))
+        self.port = server_port(self.server)
+        self._ready.set()
+        self.loop.run_forever()
+
+    def start(self) -> "ServerThread":
+        self._thread.start()
+        self._ready.wait()
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.server.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
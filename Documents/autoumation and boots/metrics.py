@@ -0,0 +1,195 @@
+"""
+metrics.py
+
+قياسات خفيفة داخل العملية لمعرفة أين يذهب الوقت دون أداة profiling:
+- span("minha.open_page"): مؤقت (context manager أو decorator، متزامن أو async) يسجل المدة في
+  مدرج تكراري bots_span_seconds{span=...} ويعدّ الاستثناءات في bots_span_errors_total
+- inc("bots_probes_total", status="FOUND"): عدادات بعناوين (labels)
+- gauge_fn(name, fn): قيمة تُقرأ لحظة العرض (مثل hits/misses في async_cache)
+- serve_from_env(): إن وُجد METRICS_PORT تُعرض القياسات بصيغة Prometheus على
+  http://127.0.0.1:<port>/metrics (METRICS_HOST لتغيير العنوان)
+- format_summary(): أكثر المراحل استهلاكاً للوقت كنص قصير للطباعة
+"""
+
+import os
+import time
+import bisect
+import asyncio
+import functools
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+
+# حدود المدرج بالثواني: من 1ms حتى دقيقة (تحميل الصفحات قد يطول)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_lock = threading.Lock()
+_counters: Dict[Tuple[str, tuple], float] = {}
+_histograms: Dict[Tuple[str, tuple], list] = {}
+_gauges: Dict[str, Tuple[Callable[[], float], str]] = {}
+_help: Dict[str, str] = {}
+
+
+def _key(name: str, labels: dict) -> Tuple[str, tuple]:
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name: str, amount: float = 1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name: str, value: float, **labels):
+    key = _key(name, labels)
+    with _lock:
+        h = _histograms.get(key)
+        if h is None:
+            # [عدد كل حد، المجموع، العدد الكلي]
+            h = _histograms[key] = [[0] * len(BUCKETS), 0.0, 0]
+        i = bisect.bisect_left(BUCKETS, value)
+        if i < len(BUCKETS):
+            h[0][i] += 1
+        h[1] += value
+        h[2] += 1
+
+
+def gauge_fn(name: str, fn: Callable[[], float], help_text: str = "", kind: str = "gauge"):
+    """kind="counter" لقيم تراكمية تحتفظ بها وحدة أخرى (مثل TTLCache.hits)."""
+    _gauges[name] = (fn, kind)
+    if help_text:
+        _help[name] = help_text
+
+
+class span:
+    """
+    with span("minha.check"): ...
+    @span("telegram.weather")
+    async def handler(...): ...
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe("bots_span_seconds", time.perf_counter() - self._start, span=self.name)
+        if exc_type is not None:
+            inc("bots_span_errors_total", span=self.name, error=exc_type.__name__)
+        return False
+
+    def __call__(self, fn):
+        name = self.name
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+# ---------- العرض ----------
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: tuple, extra: Tuple[str, str] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    escaped = (f'{k}="{_escape(str(v))}"' for k, v in items)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render() -> str:
+    """القياسات بصيغة Prometheus النصية."""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {k: (list(v[0]), v[1], v[2]) for k, v in _histograms.items()}
+    lines = []
+    seen_types = set()
+
+    def header(name: str, kind: str):
+        if name not in seen_types:
+            seen_types.add(name)
+            if name in _help:
+                lines.append(f"# HELP {name} {_help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        header(name, "counter")
+        lines.append(f"{name}{_labels(labels)} {value:g}")
+    for (name, labels), (buckets, total, count) in sorted(histograms.items()):
+        header(name, "histogram")
+        cumulative = 0
+        for bound, n in zip(BUCKETS, buckets):
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(labels, ('le', f'{bound:g}'))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(labels, ('le', '+Inf'))} {count}")
+        lines.append(f"{name}_sum{_labels(labels)} {total:.6f}")
+        lines.append(f"{name}_count{_labels(labels)} {count}")
+    for name, (fn, kind) in sorted(_gauges.items()):
+        try:
+            value = float(fn())
+        except Exception:
+            continue
+        header(name, kind)
+        lines.append(f"{name} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def format_summary(top: int = 10) -> str:
+    """المراحل مرتبة حسب الوقت الكلي: العدد، المتوسط، المجموع."""
+    with _lock:
+        spans = [(dict(labels).get("span", name), total, count)
+                 for (name, labels), (_, total, count) in _histograms.items() if name == "bots_span_seconds"]
+    spans.sort(key=lambda s: s[1], reverse=True)
+    rows = [f"{n:32} ×{c:<6} متوسط {t / c * 1000:9.1f} ms  مجموع {t:8.2f} ث" for n, t, c in spans[:top] if c]
+    return "\n".join(rows)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def serve_from_env() -> Optional[ThreadingHTTPServer]:
+    port = os.getenv("METRICS_PORT", "").strip()
+    if not port:
+        return None
+    server = serve(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+    print(f"القياسات: http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
@@ -5,19 +5,55 @@ minha_bot.py
 بوت بسيط يفحص صفحة المواعيد https://minha.anem.dz/pre_rendez_vous
 - يدعم استخدام chromedriver محلي عبر CHROME_DRIVER_PATH
 - يمنع التنزيل التلقائي عند NO_DOWNLOAD=1
+- يخزن مسار chromedriver ويستخدم ملف تعريف Chrome دائماً لإقلاع أسرع (driver_cache.py، BROWSER_PROFILE)
 - يمكن تشغيله في وضع مستمر (افتراضي) أو مجدول عبر TIMES env var
 - يعرض إشعار صوتي و (إن أمكن) إشعار سطح المكتب عند العثور على عنصر يدل على فتح المواعيد
+- ويرسل تنبيهاً لكل مشتركي بوت تليجرام (/subscribe في tepm.py) إن وُجد TELEGRAM_BOT_TOKEN (alerts.py)
 
 تشغيل (PowerShell):
     set CHROME_DRIVER_PATH=C:\path\to\chromedriver.exe    # اختياري
     set NO_DOWNLOAD=1                                       # لمنع التنزيل التلقائي إذا لديك chromedriver محلي
     set HEADLESS=0                                           # 0 لعرض نافذة المتصفح أثناء التجريب
+    set PRECHECK=0                                           # 0 لتعطيل الفحص المسبق عبر HTTP (page_precheck.py)
+    set LEAN=0                                               # 0 لتحميل الصور والخطوط والمتتبعات (lean_mode.py)
+    set WAIT_TIMEOUTS=minha.anem.dz=10                       # مهلة انتظار الجاهزية لكل موقع (page_wait.py)
+    set JS_PROBE=0                                           # 0 للفحص القديم (طلب لكل عنصر) بدل الفحص داخل الصفحة
     python .\minha_bot.py                                   # فحص مستمر
 
 أو لتشغيل مجدول في أوقات محددة (مثال):
     set TIMES=08:00,12:00,16:00
+    set CATCH_UP=once                                       # skip | once | all — تعويض المواعيد الفائتة (scheduler.py)
     python .\minha_bot.py
 
+أو فحص مستمر متكيّف يتعلم أوقات FOUND السابقة من سجل النتائج:
+    set ADAPTIVE=1
+    set MIN_INTERVAL=15
+    set MAX_INTERVAL=240
+    set JITTER=5                                            # تأخير عشوائي حتى 5 ثوانٍ لكل فحص
+    python .\minha_bot.py
+
+أو لمراقبة عدة صفحات في متصفح واحد (تبويب لكل صفحة، انظر minha_multi.py):
+    set TARGETS_FILE=targets.json
+    set MAX_TABS=4
+    python .\minha_bot.py
+
+أو كعامل في طابور مشترك بين عدة عمليات/أجهزة (انظر work_queue.py):
+    set WORK_QUEUE=work_queue.db                            # أو http://<المنسق>:8765
+    python .\minha_bot.py
+
+النتائج تُكتب في RESULTS_FILE (افتراضياً minha_results.jsonl) عبر results_log.py، وللاستعلام:
+    python .\\results_log.py --status FOUND --since 2025-11-03
+
+METRICS_PORT=9108 يعرض زمن كل مرحلة (فتح الصفحة، الفحص، المقتطف، التنبيه، الكتابة في السجل)
+وعدادات FOUND/NOT_FOUND/ERROR على http://127.0.0.1:9108/metrics (metrics.py)
+
+SNAPSHOTS=1 يحفظ HTML كل فحص مضغوطاً ومرة واحدة لكل محتوى في SNAPSHOT_DIR، لإعادة تقييم قواعد الكشف
+دون متصفح: python .\\snapshot_archive.py eval (snapshot_archive.py)
+
+في الفحص المستمر تُدوَّر جلسة Chrome عند تجاوز SESSION_MAX_MB أو SESSION_MAX_LOADS أو SESSION_MAX_ERRORS
+أو SESSION_MAX_HOURS، بعد تجهيز البديلة مسبقاً؛ والذاكرة تُسجل في SESSION_LOG (session_manager.py،
+SESSION_RECYCLE=0 للتعطيل)
+
 عدل دالة `check_appointment_open` لملائمة الـ DOM إذا عرفت محددات دقيقة من أدوات المطور.
 """
 
@@ -25,15 +61,19 @@ import os
 import sys
 import time
 import datetime
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-try:
-    from selenium import webdriver
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.chrome.service import Service
-except Exception as e:
-    print("مطلوب تثبيت selenium. ثبتها باستخدام: pip install selenium webdriver-manager")
-    raise
+from driver_cache import start_chrome
+from lean_mode import LeanMode, format_stats
+from alerts import AlertFanout, AlertEvent
+from page_wait import open_and_wait
+from results_log import open_results_log, now_ts
+from scheduler import Scheduler, DailySlots, AdaptiveInterval
+from agency_matcher import compile_filters
+from snapshot_archive import SnapshotArchive
+# المؤشرات في ملف خفيف يستورده snapshot_archive أيضاً دون تحميل البوت (minha_rules.py)
+from minha_rules import APPOINTMENT_XPATHS, APPOINTMENT_SELECTORS, APPOINTMENT_KEYWORDS, parse_list
+import metrics
 
 def parse_times(env_var: str = "TIMES") -> List[Tuple[int, int]]:
     s = os.getenv(env_var, "").strip()
@@ -43,132 +83,279 @@ def parse_times(env_var: str = "TIMES") -> List[Tuple[int, int]]:
     out = []
     for p in parts:
         try:
-            hh, mm = p.split(":")
-            out.append((int(hh), int(mm)))
+            hh, mm = map(int, p.split(":"))
+            # 25:00 تكسر DailySlots (datetime.time) عند الإقلاع
+            if not (0 <= hh <= 23 and 0 <= mm <= 59):
+                raise ValueError(p)
+            out.append((hh, mm))
         except Exception:
             print(f"تجاهل وقت غير صالح: {p}")
     return out
 
+SNIPPET_LEN = 400
+
+# سكربت يُنفَّذ داخل الصفحة: يعيد كل المؤشرات في نتيجة واحدة بدل عشرات طلبات WebDriver.
+# الظهور يقارب is_displayed: عنصر له صناديق عرض وغير مخفي عبر visibility/display.
+PROBE_SCRIPT = """
+const xpaths = arguments[0], selectors = arguments[1], keywords = arguments[2], maxlen = arguments[3];
+const full = arguments[4], withHtml = arguments[5];
+function visible(el) {
+    if (!el.getClientRects().length) return false;
+    const st = window.getComputedStyle(el);
+    return st.visibility !== 'hidden' && st.display !== 'none' && st.opacity !== '0';
+}
+const hits = [];
+let xpathVisible = false;
+for (const xp of xpaths) {
+    let snap;
+    try {
+        snap = document.evaluate(xp, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    } catch (e) { hits.push(0); continue; }
+    hits.push(snap.snapshotLength);
+    for (let i = 0; !xpathVisible && i < snap.snapshotLength; i++) {
+        if (visible(snap.snapshotItem(i))) xpathVisible = true;
+    }
+}
+let selectorText = false;
+for (const sel of selectors) {
+    for (const el of document.querySelectorAll(sel)) {
+        // innerText لعنصر display:none يساوي textContent؛ مثل el.text في Selenium: المخفي لا يُحتسب
+        if (!visible(el)) continue;
+        const txt = (el.innerText || '').toLowerCase();
+        if (keywords.some(k => txt.includes(k))) { selectorText = true; break; }
+    }
+    if (selectorText) break;
+}
+const body = document.body ? (document.body.innerText || '') : '';
+const result = {
+    xpath_hits: hits,
+    xpath_visible: xpathVisible,
+    selector_text: selectorText,
+    forms: document.forms.length,
+    snippet: body.split(/\\s+/).filter(Boolean).join(' ').slice(0, maxlen),
+};
+if (full && document.body) {
+    // النص الكامل لفلاتر الوكالات + موضع كل كتلة نصية والعنصر الذي يحتويها
+    const skip = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE']);
+    const desc = el => el ? el.tagName.toLowerCase() + (el.id ? '#' + el.id : '') : '';
+    const walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT);
+    const parts = [], nodes = [];
+    let pos = 0;
+    for (let n = walker.nextNode(); n; n = walker.nextNode()) {
+        const el = n.parentElement;
+        if (!el || skip.has(el.tagName)) continue;
+        const txt = n.nodeValue.split(/\\s+/).filter(Boolean).join(' ');
+        if (!txt) continue;
+        const parent = el.parentElement ? desc(el.parentElement) + ' > ' : '';
+        nodes.push([pos, pos + txt.length, parent + desc(el)]);
+        parts.push(txt);
+        pos += txt.length + 1;
+    }
+    result.text = parts.join(' ');
+    result.nodes = nodes;
+}
+if (withHtml) {
+    // لقطة للأرشيف (snapshot_archive.py) في نفس الرحلة
+    result.html = document.documentElement.outerHTML;
+    result.url = location.href;
+}
+return result;
+"""
+
 class MinhaBot:
-    def __init__(self, headless: bool = True, implicit_wait: int = 6):
+    def __init__(self, headless: bool = True, implicit_wait: int = None, use_js_probe: bool = None,
+                 profile: str = None):
         self.headless = headless
         self.driver = None
+        # ملف تعريف Chrome (driver_cache.py)؛ الجلسة البديلة في session_manager.py تأخذ ملفاً آخر
+        self.profile = profile or os.getenv("BROWSER_PROFILE", "minha")
+        # الانتظار الضمني يبطئ كل find_elements فارغ؛ الجاهزية تُنتظر صراحة في open_page
+        if implicit_wait is None:
+            implicit_wait = int(os.getenv("IMPLICIT_WAIT", "0"))
         self.implicit_wait = implicit_wait
+        self.last_ready_seconds = 0.0
+        if use_js_probe is None:
+            use_js_probe = os.getenv("JS_PROBE", "1") == "1"
+        self.use_js_probe = use_js_probe
+        # حظر الصور والخطوط والوسائط والمتتبعات (lean_mode.py)؛ LEAN=0 للتعطيل
+        self.lean = LeanMode.from_env()
+        self.last_page_stats = {}
+        # تطابقات فلاتر الوكالات في آخر فحص (agency_matcher.AgencyHit: الموضع والعنصر)
+        self.last_agency_hits = []
+        # نص الصفحة كاملاً في آخر فحص: فلاتر مشتركي التنبيهات تُطابق عليه (alerts.wants)
+        self.last_page_text = ""
+        # أرشيف لقطات HTML كاملة لإعادة تقييم القواعد دون متصفح (snapshot_archive.py، SNAPSHOTS=1)
+        self.snapshots = SnapshotArchive.from_env()
+        # آخر استثناء ابتلعه check_appointment_open (لعدّ الأخطاء المتتالية في session_manager.py)
+        self.last_check_error = None
+        # توزيع FOUND على مشتركي تليجرام إن وُجد TELEGRAM_BOT_TOKEN (ALERTS=0 للتعطيل)
+        self.alerts = AlertFanout.from_env()
         self.setup_driver()
 
     def setup_driver(self):
-        opts = webdriver.ChromeOptions()
-        # Headless قد يختلف بين إصدارات الكروم -> نستخدم الخيار المحدث إن وُجد
-        if self.headless:
-            try:
-                opts.add_argument("--headless=new")
-            except Exception:
-                opts.add_argument("--headless")
-        opts.add_argument("--no-sandbox")
-        opts.add_argument("--disable-dev-shm-usage")
-
-        path = os.getenv("CHROME_DRIVER_PATH")
-        no_download = os.getenv("NO_DOWNLOAD", "0") == "1"
+        def configure(opts):
+            # Headless قد يختلف بين إصدارات الكروم -> نستخدم الخيار المحدث إن وُجد
+            if self.headless:
+                try:
+                    opts.add_argument("--headless=new")
+                except Exception:
+                    opts.add_argument("--headless")
+            opts.add_argument("--no-sandbox")
+            opts.add_argument("--disable-dev-shm-usage")
+            if self.lean:
+                self.lean.configure(opts)
+
         try:
-            if path and os.path.exists(path):
-                print(f"استخدام chromedriver محلي: {path}")
-                self.driver = webdriver.Chrome(service=Service(path), options=opts)
-            else:
-                if no_download:
-                    raise RuntimeError("لم يُعثر على chromedriver محلي و NO_DOWNLOAD=1.")
-                # تنزيل تلقائي
-                from webdriver_manager.chrome import ChromeDriverManager
-                print("تنزيل chromedriver تلقائياً (مرة واحدة)...")
-                self.driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=opts)
+            # مسار chromedriver مخزن + ملف تعريف دائم (driver_cache.py) بدل التنزيل وملف مؤقت في كل تشغيل
+            self.driver = start_chrome(configure, profile=self.profile)
             self.driver.implicitly_wait(self.implicit_wait)
+            if self.lean:
+                self.lean.enable(self.driver)
+        except ImportError:
+            print("مطلوب تثبيت selenium. ثبتها باستخدام: pip install selenium webdriver-manager")
+            raise
         except Exception as e:
             print("خطأ أثناء إعداد المتصفح:", e)
             raise
 
+    @metrics.span("minha.open_page")
     def open_page(self, url: str):
-        self.driver.get(url)
+        # انتظار جاهزية فعلية (اكتمال المستند ثم ظهور مؤشر أو هدوء الشبكة) بدل sleep ثابت
+        def load():
+            return open_and_wait(self.driver, url, APPOINTMENT_SELECTORS + ["form"])
+        if self.lean:
+            self.last_ready_seconds, self.last_page_stats = self.lean.navigate(self.driver, url, load)
+            if self.last_page_stats:
+                print(format_stats(self.last_page_stats))
+        else:
+            self.last_ready_seconds = load()
 
+    @metrics.span("minha.check")
     def check_appointment_open(self, allow: List[str] = None, exclude: List[str] = None):
         """
         تفحص DOM لمعرفة ما إذا كانت صفحة المواعيد مفتوحة.
         نستخدم قائمة منطقية متعددة لمحاولة اكتشاف الزر/النص الصحيح.
-        عدِّل هذا لو عرفت محددات أدق من أدوات المطور في الصفحة.
+        عدِّل هذا لو عرفت محددات أدق من أدوات المطور في الصفحة.
+
+        افتراضياً تُجمع كل المؤشرات في طلب واحد عبر `probe_dom`؛
+        اضبط JS_PROBE=0 للعودة إلى المسار القديم (طلب WebDriver لكل عنصر) للمقارنة.
+        فلاتر الوكالات تُطابق على نص الصفحة كاملاً (لا المقتطف فقط) عبر agency_matcher.py.
+        """
+        self.last_agency_hits = []
+        self.last_page_text = ""
+        self.last_check_error = None
+        filtered = bool(allow or exclude)
+        # النص الكامل مطلوب لفلاتر البوت أو لفلاتر مشتركي التنبيهات
+        full_text = filtered or bool(self.alerts)
+        try:
+            page = None
+            if self.use_js_probe:
+                probe = self.probe_dom(SNIPPET_LEN, full_text=full_text, with_html=bool(self.snapshots))
+                found_flag = bool(probe['xpath_visible'] or probe['selector_text'] or probe['forms'])
+                snippet = probe['snippet']
+                text, nodes = probe.get('text'), probe.get('nodes')
+                if self.snapshots:
+                    page = (probe.get('url') or '', probe.get('html') or '')
+            else:
+                found_flag, snippet = self._check_legacy()
+                text, nodes = (self.extract_snippet(maxlen=None) if full_text else None), None
+                if self.snapshots:
+                    page = (self.driver.current_url, self.driver.page_source)
+            self.last_page_text = text or snippet
+            if not filtered:
+                result = (found_flag, [], snippet)
+            else:
+                matcher = compile_filters(tuple(allow or ()), tuple(exclude or ()))
+                self.last_agency_hits = matcher.find(text or snippet, nodes)
+                for hit in self.last_agency_hits:
+                    print(f"وكالة ({hit.kind}): {hit.matched} [{hit.start}:{hit.end}] {hit.element}")
+                result = self._apply_filters(found_flag, snippet, matcher.decide(self.last_agency_hits))
+            if page:
+                self._archive(page, result)
+            return result
+        except Exception as e:
+            metrics.inc("bots_errors_total", stage="minha.check")
+            self.last_check_error = e
+            print("خطأ أثناء فحص الصفحة:", e)
+            return False, [], ""
+
+    @metrics.span("minha.probe_dom")
+    def probe_dom(self, snippet_len: int = SNIPPET_LEN, full_text: bool = False, with_html: bool = False) -> dict:
+        """
+        تنفيذ كل مؤشرات الفحص داخل الصفحة في رحلة WebDriver واحدة.
+        يعيد: xpath_hits (عدد العناصر لكل XPath)، xpath_visible، selector_text، forms، snippet.
+        مع full_text: أيضاً text (نص الصفحة كاملاً) و nodes ([بداية، نهاية، وصف العنصر] لكل كتلة نصية).
+        مع with_html: أيضاً html (المستند المعروض كاملاً) و url.
         """
+        return self.driver.execute_script(PROBE_SCRIPT, APPOINTMENT_XPATHS, APPOINTMENT_SELECTORS,
+                                          APPOINTMENT_KEYWORDS, snippet_len, full_text, with_html)
+
+    @metrics.span("minha.snapshot")
+    def _archive(self, page: Tuple[str, str], result: tuple):
+        url, html = page
+        found, matches, _ = result
         try:
-            found_flag = False
-            # حالة 1: زر أو رابط يحوي نصاً بالفرنسية متعلقًا بـ "rendez" أو "rendez-vous"
-            xpaths = [
-                "//button[contains(translate(., 'R', 'r'), 'rendez')]",
-                "//a[contains(translate(., 'R', 'r'), 'rendez')]",
-                "//button[contains(., 'Prendre') or contains(., 'prendre')]",
-                "//button[contains(., 'حجز') or contains(., 'موعد')]",
-                "//a[contains(., 'حجز') or contains(., 'موعد')]",
-            ]
-            for xp in xpaths:
-                elems = self.driver.find_elements(By.XPATH, xp)
-                if elems:
-                    # رجع True فقط إذا العنصر ظاهر وليس مخفيًا
-                    for el in elems:
-                        try:
-                            if el.is_displayed():
-                                found_flag = True
-                                break
-                        except Exception:
+            self.snapshots.put(url, html, 'FOUND' if found else 'NOT_FOUND', matches)
+        except OSError as e:
+            print("تعذر حفظ لقطة الصفحة:", e)
+
+    @metrics.span("minha.check_legacy")
+    def _check_legacy(self) -> Tuple[bool, str]:
+        """المسار القديم: استدعاء find_elements/is_displayed/.text لكل عنصر على حدة."""
+        from selenium.webdriver.common.by import By
+        found_flag = False
+        # حالة 1: زر أو رابط يحوي نصاً بالفرنسية متعلقًا بـ "rendez" أو "rendez-vous"
+        for xp in APPOINTMENT_XPATHS:
+            elems = self.driver.find_elements(By.XPATH, xp)
+            if elems:
+                # رجع True فقط إذا العنصر ظاهر وليس مخفيًا
+                for el in elems:
+                    try:
+                        if el.is_displayed():
                             found_flag = True
                             break
-                    if found_flag:
+                    except Exception:
+                        found_flag = True
                         break
+                if found_flag:
+                    break
 
-            # حالة 2: عنصر بصنف واضح (مثال: btn, alert أو container يظهر عند فتح التسجيل)
-            selectors = [
-                "button[class*='btn']",
-                "a[class*='btn']",
-                "div.alert",
-            ]
-            for sel in selectors:
-                elems = self.driver.find_elements(By.CSS_SELECTOR, sel)
-                if elems:
-                    # تحقق من وجود نص يشير إلى فتح الموعد
-                    for el in elems:
-                        txt = el.text or ""
-                        if any(k in txt.lower() for k in ["rendez", "prendre", "حجز", "موعد"]):
-                            found_flag = True
-                            break
-                    if found_flag:
+        # حالة 2: عنصر بصنف واضح (مثال: btn, alert أو container يظهر عند فتح التسجيل)
+        for sel in APPOINTMENT_SELECTORS:
+            elems = self.driver.find_elements(By.CSS_SELECTOR, sel)
+            if elems:
+                # تحقق من وجود نص يشير إلى فتح الموعد
+                for el in elems:
+                    txt = el.text or ""
+                    if any(k in txt.lower() for k in APPOINTMENT_KEYWORDS):
+                        found_flag = True
                         break
+                if found_flag:
+                    break
 
-            # حالة 3: تحقق من وجود عناصر فورم أو حقول تتاح عند الفتح (مؤشر عام)
-            forms = self.driver.find_elements(By.TAG_NAME, 'form')
-            if forms and len(forms) > 0:
-                # إن وُجد نموذج مخصص للتسجيل، نعتبر ذلك إشارة
-                found_flag = True
-
-            # الآن جمع مقتطف نصي لتحديد الوكالات المتطابقة
-            snippet = self.extract_snippet(400)
-            matches = []
-            if allow:
-                for a in allow:
-                    if a.lower() in snippet.lower():
-                        matches.append(a)
-            if exclude:
-                for a in exclude:
-                    if a.lower() in snippet.lower():
-                        # إذا وُجد اسم مستبعد في المقتطف نعتبر النتيجة غير مطابقة
-                        return False, [], snippet
-
-            # لو وجد مؤشر عام وفلتر السماح موجود لكن لم يطابق شيء -> اعتبره غير مطابق
-            if found_flag:
-                if allow and len(matches) == 0:
-                    return False, [], snippet
-                return True, matches, snippet
-
-            return False, [], snippet
-        except Exception as e:
-            print("خطأ أثناء فحص الصفحة:", e)
-            return False, [], ""
+        # حالة 3: تحقق من وجود عناصر فورم أو حقول تتاح عند الفتح (مؤشر عام)
+        forms = self.driver.find_elements(By.TAG_NAME, 'form')
+        if forms and len(forms) > 0:
+            # إن وُجد نموذج مخصص للتسجيل، نعتبر ذلك إشارة
+            found_flag = True
 
-    def notify(self):
+        return found_flag, self.extract_snippet(SNIPPET_LEN)
+
+    @staticmethod
+    def _apply_filters(found_flag: bool, snippet: str, decision: Tuple[bool, List[str]]):
+        # decision من AgencyMatcher.decide: أي اسم مستبعد يرفض الصفحة، وقائمة السماح يجب أن يطابق منها اسم
+        ok, matches = decision
+        if found_flag and ok:
+            return True, matches, snippet
+        return False, [], snippet
+
+    @metrics.span("minha.notify")
+    def notify(self, url: str = "", matches: List[str] = None, snippet: str = ""):
         print("*** المواعيد متاحة الآن! ***)")
+        # تنبيه كل مشتركي بوت تليجرام (alerts.py) — يعمل على لينكس والخوادم أيضاً؛
+        # في الخلفية: الفحص التالي لا ينتظر انتهاء الإرسال لكل المشتركين
+        if self.alerts:
+            self.alerts.broadcast_in_background(AlertEvent(url, matches or [], snippet, self.last_page_text))
         # صوت بسيط على ويندوز
         try:
             import winsound
@@ -190,9 +377,11 @@ class MinhaBot:
         except Exception:
             pass
 
-    def extract_snippet(self, maxlen: int = 200) -> str:
-        """محاولة الحصول على مقتطف نصي مفيد من الصفحة لتضمينه في السجل."""
+    @metrics.span("minha.extract_snippet")
+    def extract_snippet(self, maxlen: Optional[int] = 200) -> str:
+        """محاولة الحصول على مقتطف نصي مفيد من الصفحة لتضمينه في السجل (maxlen=None للنص كاملاً)."""
         try:
+            from selenium.webdriver.common.by import By
             body = self.driver.find_element(By.TAG_NAME, 'body')
             txt = body.text or ""
             s = ' '.join(txt.split())
@@ -202,86 +391,109 @@ class MinhaBot:
 
 
 def run_continuous(bot: MinhaBot, url: str, interval_seconds: int = 60):
-    results_file = os.getenv('RESULTS_FILE', 'minha_results.txt')
-    # قراءة فلتر الوكالات من المتغيرات البيئية
-    allow = os.getenv('AGENCIES_ALLOW', '').strip()
-    exclude = os.getenv('AGENCIES_EXCLUDE', '').strip()
-    allow_list = [a.strip() for a in allow.split(',') if a.strip()]
-    exclude_list = [a.strip() for a in exclude.split(',') if a.strip()]
-    print(f"فحص مستمر كل {interval_seconds} ثانية — فتح: {url} — السجل: {results_file}")
+    results = open_results_log()
+    allow_list = parse_list('AGENCIES_ALLOW')
+    exclude_list = parse_list('AGENCIES_EXCLUDE')
+    print(f"فحص مستمر كل {interval_seconds} ثانية — فتح: {url} — السجل: {results.path}")
     if allow_list:
         print("فلتر السماح للوكالات:", allow_list)
     if exclude_list:
         print("فلتر استبعاد الوكالات:", exclude_list)
-    try:
-        while True:
-            try:
-                bot.open_page(url)
-                # انتظر تحميل سريع
-                time.sleep(3)
-                found, matches, snippet = bot.check_appointment_open(allow_list or None, exclude_list or None)
-                timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    detector = None
+    if os.getenv('PRECHECK', '1') == '1':
+        from page_precheck import PageChangeDetector
+        detector = PageChangeDetector(max_skips=int(os.getenv('PRECHECK_MAX_SKIPS', '10')))
+    policy = AdaptiveInterval(interval_seconds, interval_seconds, interval_seconds)
+    if os.getenv('ADAPTIVE', '0') == '1':
+        # تعلّم أوقات FOUND السابقة: فحص أسرع حولها وأبطأ في بقية اليوم
+        policy = AdaptiveInterval.from_results_log(
+            results.path, interval_seconds,
+            float(os.getenv('MIN_INTERVAL', str(max(5, interval_seconds // 4)))),
+            float(os.getenv('MAX_INTERVAL', str(interval_seconds * 4))),
+            int(os.getenv('ADAPTIVE_WINDOW', '30')))
+        print("وضع الفحص المتكيّف:", "مفعّل" if policy.intervals else "لا توجد نتائج FOUND سابقة بعد")
+    sessions = None
+    if os.getenv('SESSION_RECYCLE', '1') == '1':
+        # تدوير Chrome قبل أن تتضخم ذاكرته (session_manager.py)؛ الجلسة البديلة تُجهَّز مسبقاً
+        from session_manager import SessionManager
+        sessions = SessionManager.from_env(
+            lambda profile: MinhaBot(bot.headless, bot.implicit_wait, bot.use_js_probe, profile), bot)
+
+    def probe(at: float):
+        active = sessions.bot if sessions else bot
+        try:
+            if detector and not detector.changed(url):
+                # الصفحة لم تتغير منذ آخر فحص كامل (وكانت النتيجة NOT_FOUND) -> لا حاجة لفتح المتصفح
+                results.record('NOT_FOUND', url)
+                print(f"{now_ts()} — لا تغيير في الصفحة (فحص HTTP مسبق).")
+            else:
+                active.open_page(url)
+                found, matches, snippet = active.check_appointment_open(allow_list or None, exclude_list or None)
                 if found:
-                    bot.notify()
-                    matched_text = ','.join(matches) if matches else ''
-                    line = f"{timestamp} | FOUND | {url} | matched: {matched_text} | snippet: {snippet}\n"
-                    print("تم العثور على مؤشِّر فتح المواعيد المتطابقة مع الفلتر — سأنهي الفحص (يمكنك تعديل السلوك).")
-                    with open(results_file, 'a', encoding='utf-8') as f:
-                        f.write(line)
-                    return
-                else:
-                    line = f"{timestamp} | NOT_FOUND | {url}\n"
-                    print(f"{timestamp} — لا توجد مواعيد مناسبة بعد.")
-                    with open(results_file, 'a', encoding='utf-8') as f:
-                        f.write(line)
-            except Exception as e:
-                print("خطأ مؤقت أثناء الفحص:", e)
-            time.sleep(interval_seconds)
+                    results.record('FOUND', url, matches, snippet)
+                    active.notify(url, matches, snippet)
+                    print("تم العثور على مؤشِّر فتح المواعيد المتطابقة مع الفلتر — سأنهي الفحص (يمكنك تعديل السلوك).")
+                    return None
+                results.record('NOT_FOUND', url)
+                print(f"{now_ts()} — لا توجد مواعيد مناسبة بعد.")
+                if detector and active.last_check_error is None:
+                    # الفحص الكامل نجح -> يمكن تخطي نفس المحتوى في الدورات التالية
+                    detector.commit(url)
+                if sessions:
+                    sessions.after_probe(active.last_check_error is not None)
+        except Exception as e:
+            results.record('ERROR', url, snippet=str(e)[:200])
+            print("خطأ مؤقت أثناء الفحص:", e)
+            if sessions:
+                sessions.after_probe(error=True)
+        now = time.time()
+        return now + policy.interval(now)
+
+    scheduler = Scheduler(jitter=float(os.getenv('JITTER', '0')))
+    scheduler.add(probe, time.time())
+    try:
+        scheduler.run()
     finally:
+        results.close()
+        if sessions:
+            sessions.close()
         bot.close()
 
 
 def run_scheduled(bot: MinhaBot, url: str, times: List[Tuple[int, int]]):
-    results_file = os.getenv('RESULTS_FILE', 'minha_results.txt')
-    allow = os.getenv('AGENCIES_ALLOW', '').strip()
-    exclude = os.getenv('AGENCIES_EXCLUDE', '').strip()
-    allow_list = [a.strip() for a in allow.split(',') if a.strip()]
-    exclude_list = [a.strip() for a in exclude.split(',') if a.strip()]
-    print("وضع مجدول. الأوقات:", times, "السجل:", results_file)
+    results = open_results_log()
+    allow_list = parse_list('AGENCIES_ALLOW')
+    exclude_list = parse_list('AGENCIES_EXCLUDE')
+    print("وضع مجدول. الأوقات:", times, "السجل:", results.path)
     if allow_list:
         print("فلتر السماح للوكالات:", allow_list)
     if exclude_list:
         print("فلتر استبعاد الوكالات:", exclude_list)
-    done_today = set()
+    slots = DailySlots(times, catch_up=os.getenv('CATCH_UP', 'once'))
+
+    def probe(at: float):
+        print(f"[{datetime.datetime.now().strftime('%Y-%m-%d %H:%M')}] فتح الصفحة وفحص المواعيد...")
+        try:
+            bot.open_page(url)
+            found, matches, snippet = bot.check_appointment_open(allow_list or None, exclude_list or None)
+            if found:
+                results.record('FOUND', url, matches, snippet)
+                bot.notify(url, matches, snippet)
+            else:
+                results.record('NOT_FOUND', url)
+                print("لم تُفتح المواعيد المناسبة بعد.")
+        except Exception as e:
+            results.record('ERROR', url, snippet=str(e)[:200])
+            print("خطأ أثناء الفحص المجدول:", e)
+        return slots.after_run(at, time.time())
+
+    # النوم حتى الموعد التالي مباشرة بدل الاستيقاظ كل 15 ثانية
+    scheduler = Scheduler(jitter=float(os.getenv('JITTER', '0')))
+    scheduler.add(probe, slots.next_slot(time.time()))
     try:
-        while True:
-            now = datetime.datetime.now()
-            if now.hour == 0 and now.minute == 0:
-                done_today.clear()
-            for t in times:
-                if (now.hour, now.minute) == t and t not in done_today:
-                    print(f"[{now.strftime('%Y-%m-%d %H:%M')}] فتح الصفحة وفحص المواعيد...")
-                    try:
-                        bot.open_page(url)
-                        time.sleep(3)
-                        found, matches, snippet = bot.check_appointment_open(allow_list or None, exclude_list or None)
-                        timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                        if found:
-                            bot.notify()
-                            matched_text = ','.join(matches) if matches else ''
-                            line = f"{timestamp} | FOUND | {url} | matched: {matched_text} | snippet: {snippet}\n"
-                            with open(results_file, 'a', encoding='utf-8') as f:
-                                f.write(line)
-                        else:
-                            print("لم تُفتح المواعيد المناسبة بعد.")
-                            line = f"{timestamp} | NOT_FOUND | {url}\n"
-                            with open(results_file, 'a', encoding='utf-8') as f:
-                                f.write(line)
-                    except Exception as e:
-                        print("خطأ أثناء الفحص المجدول:", e)
-                    done_today.add(t)
-            time.sleep(15)
+        scheduler.run()
     finally:
+        results.close()
         bot.close()
 
 
@@ -290,10 +502,24 @@ def main():
     headless = os.getenv("HEADLESS", "1") == "1"
     interval = int(os.getenv("INTERVAL", "60"))
     times = parse_times("TIMES")
+    targets_file = os.getenv("TARGETS_FILE", "").strip()
+    work_queue = os.getenv("WORK_QUEUE", "").strip()
 
+    # METRICS_PORT: عرض زمن كل مرحلة وعدادات الفحص بصيغة Prometheus (metrics.py)
+    metrics.serve_from_env()
+    if targets_file and not work_queue:
+        # التبويبات المتعددة لا تمر بـ open_page فلا يُقرأ سجل الأداء (lean_mode.py)
+        os.environ.setdefault("LEAN_STATS", "0")
     bot = MinhaBot(headless=headless)
     try:
-        if times:
+        if work_queue:
+            from work_queue import open_backend, run_worker
+            run_worker(bot, open_backend(work_queue))
+        elif targets_file:
+            from minha_multi import load_targets, run_multi
+            run_multi(bot, load_targets(targets_file, interval),
+                      max_tabs=int(os.getenv("MAX_TABS", "4")))
+        elif times:
             run_scheduled(bot, url, times)
         else:
             run_continuous(bot, url, interval_seconds=interval)
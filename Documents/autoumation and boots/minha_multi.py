@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+minha_multi.py
+
+مراقبة عدة صفحات مواعيد بمتصفح Chrome واحد:
+- كل هدف (رابط + فلاتر وكالات خاصة به + فاصل فحص) يُحمَّل في تبويب من مجموعة تبويبات مشتركة
+- عدد التبويبات (أي التحميلات المتزامنة) محدود بـ MAX_TABS
+- الأهداف المستحقة تُختار بترتيب الأقدم استحقاقاً ثم الأقدم فحصاً (round-robin عادل)
+- التحميل يبدأ في كل التبويبات دفعة واحدة ثم يُفحص كل تبويب عند اكتمال صفحته
+
+ملف الأهداف (TARGETS_FILE) بصيغة JSON:
+    [
+        {"url": "https://minha.anem.dz/pre_rendez_vous", "allow": ["Alger"], "exclude": [], "interval": 60},
+        {"url": "https://minha.anem.dz/pre_rendez_vous?wilaya=31", "interval": 120}
+    ]
+
+تشغيل (PowerShell):
+    set TARGETS_FILE=targets.json
+    set MAX_TABS=4
+    python .\\minha_bot.py
+"""
+
+import json
+import time
+from typing import List
+
+from minha_bot import MinhaBot
+from page_wait import ready_stats
+from results_log import open_results_log, now_ts
+
+# وسم يوضع على المستند القديم قبل التنقل؛ اختفاؤه مع readyState=complete يعني أن الصفحة الجديدة اكتملت
+_MARK_AND_NAVIGATE = "window.__minhaPending = true; window.location.href = arguments[0];"
+_IS_READY = "return document.readyState === 'complete' && !window.__minhaPending;"
+
+
+class Target:
+    def __init__(self, url: str, allow: List[str] = None, exclude: List[str] = None, interval: int = 60):
+        self.url = url
+        self.allow = allow or []
+        self.exclude = exclude or []
+        self.interval = interval
+        self.next_due = 0.0
+        self.last_checked = 0.0
+
+    def __repr__(self):
+        return f"Target({self.url!r}, interval={self.interval})"
+
+
+def load_targets(path: str, default_interval: int = 60) -> List[Target]:
+    """تحميل قائمة الأهداف من ملف JSON (قائمة كائنات فيها url و allow/exclude/interval اختيارية)."""
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    targets = []
+    for item in raw:
+        if isinstance(item, str):
+            item = {"url": item}
+        if not item.get("url"):
+            print(f"تجاهل هدف بدون رابط: {item}")
+            continue
+        targets.append(Target(item["url"], item.get("allow"), item.get("exclude"),
+                              int(item.get("interval", default_interval))))
+    return targets
+
+
+def pick_due(targets: List[Target], now: float, limit: int) -> List[Target]:
+    """الأهداف المستحقة مرتبة: الأقدم استحقاقاً أولاً ثم الأقل فحصاً مؤخراً."""
+    due = [t for t in targets if t.next_due <= now]
+    due.sort(key=lambda t: (t.next_due, t.last_checked))
+    return due[:limit]
+
+
+def open_tabs(bot: MinhaBot, count: int) -> List[str]:
+    """تجهيز مجموعة التبويبات المشتركة (التبويب الحالي + تبويبات جديدة)."""
+    driver = bot.driver
+    handles = [driver.current_window_handle]
+    while len(handles) < count:
+        driver.switch_to.new_window('tab')
+        if bot.lean:
+            # حظر الموارد عبر DevTools يطبَّق لكل تبويب على حدة
+            bot.lean.enable(driver)
+        handles.append(driver.current_window_handle)
+    return handles
+
+
+def run_multi(bot: MinhaBot, targets: List[Target], max_tabs: int = 4, page_timeout: int = 30):
+    if not targets:
+        print("لا توجد أهداف في ملف الأهداف.")
+        return
+    results = open_results_log()
+    driver = bot.driver
+    tabs = open_tabs(bot, max(1, min(max_tabs, len(targets))))
+    print(f"مراقبة {len(targets)} هدف في {len(tabs)} تبويب — السجل: {results.path}")
+    try:
+        while True:
+            now = time.time()
+            batch = pick_due(targets, now, len(tabs))
+            if not batch:
+                wake = min(t.next_due for t in targets)
+                time.sleep(max(0.5, wake - now))
+                continue
+
+            # 1) بدء التحميل في كل التبويبات دون انتظار
+            pending = {}
+            for handle, t in zip(tabs, batch):
+                try:
+                    driver.switch_to.window(handle)
+                    driver.execute_script(_MARK_AND_NAVIGATE, t.url)
+                    pending[handle] = t
+                except Exception as e:
+                    print(f"خطأ أثناء فتح {t.url}:", e)
+                    t.last_checked = now
+                    t.next_due = now + t.interval
+
+            # 2) المرور على التبويبات بالتناوب وفحص كل صفحة فور اكتمالها
+            started = time.time()
+            deadline = started + page_timeout
+            while pending:
+                for handle in list(pending):
+                    t = pending[handle]
+                    try:
+                        driver.switch_to.window(handle)
+                        ready = driver.execute_script(_IS_READY)
+                        if not ready and time.time() < deadline:
+                            continue
+                        ready_stats.record(t.url, time.time() - started, timed_out=not ready)
+                        found, matches, snippet = bot.check_appointment_open(t.allow or None, t.exclude or None)
+                        if found:
+                            results.record('FOUND', t.url, matches, snippet)
+                            bot.notify(t.url, matches, snippet)
+                        else:
+                            results.record('NOT_FOUND', t.url)
+                        print(f"{now_ts()} | {'FOUND' if found else 'NOT_FOUND'} | {t.url}")
+                    except Exception as e:
+                        results.record('ERROR', t.url, snippet=str(e)[:200])
+                        print(f"خطأ مؤقت أثناء فحص {t.url}:", e)
+                    finished = time.time()
+                    t.last_checked = finished
+                    t.next_due = finished + t.interval
+                    del pending[handle]
+                if pending:
+                    time.sleep(0.2)
+    finally:
+        results.close()
+        bot.close()
@@ -0,0 +1,31 @@
+"""
+minha_rules.py
+
+مؤشرات فتح المواعيد (مشتركة بين المسار القديم و probe_dom في minha_bot.py والتقييم دون متصفح
+في snapshot_archive.py) وقراءة قوائم الفلاتر من البيئة، بلا اعتماديات: استيرادها لا يحمّل البوت.
+"""
+
+import os
+from typing import List
+
+
+def parse_list(env_var: str) -> List[str]:
+    """قراءة قائمة مفصولة بفواصل من متغير بيئة (مثل AGENCIES_ALLOW)."""
+    s = os.getenv(env_var, '').strip()
+    return [a.strip() for a in s.split(',') if a.strip()]
+
+
+# مؤشرات فتح المواعيد — مشتركة بين المسار القديم و probe_dom
+APPOINTMENT_XPATHS = [
+    "//button[contains(translate(., 'R', 'r'), 'rendez')]",
+    "//a[contains(translate(., 'R', 'r'), 'rendez')]",
+    "//button[contains(., 'Prendre') or contains(., 'prendre')]",
+    "//button[contains(., 'حجز') or contains(., 'موعد')]",
+    "//a[contains(., 'حجز') or contains(., 'موعد')]",
+]
+APPOINTMENT_SELECTORS = [
+    "button[class*='btn']",
+    "a[class*='btn']",
+    "div.alert",
+]
+APPOINTMENT_KEYWORDS = ["rendez", "prendre", "حجز", "موعد"]
@@ -0,0 +1,103 @@
+"""
+page_precheck.py
+
+فحص مسبق رخيص عبر HTTP قبل فتح الصفحة في Chrome:
+- طلبات شرطية (If-None-Match / If-Modified-Since) — رد 304 يعني أن الصفحة لم تتغير
+- بصمة للمحتوى بعد حذف الأجزاء المتغيرة في كل طلب (رموز csrf، nonce، مسافات)
+- لا نصعّد إلى فحص Selenium الكامل إلا عند تغيّر البصمة
+
+بما أن بعض الصفحات تُبنى بالجافاسكربت (قد لا يتغير HTML الأولي)، نفرض فحصاً كاملاً
+كل max_skips مرات تخطٍّ متتالية حتى لا يفوتنا تغيير لا يظهر في HTML.
+
+ETag/Last-Modified والبصمة الجديدة تبقى معلّقة حتى يستدعي المستدعي commit(url) بعد فحص كامل ناجح؛
+فإن فشل الفحص (خطأ في المتصفح) لا يُتخطى المحتوى الجديد في الدورات التالية.
+"""
+
+import re
+import hashlib
+from typing import Dict
+
+import requests
+
+import metrics
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/118.0.0.0 Safari/537.36"
+}
+
+# أجزاء تتغير مع كل طلب ولا تعني تغيّر حالة المواعيد
+_VOLATILE = [
+    re.compile(r'\snonce="[^"]*"', re.I),
+    re.compile(r'(<input[^>]+type="hidden"[^>]*\svalue=")[^"]*"', re.I),
+    re.compile(r'(<meta[^>]+name="csrf[^"]*"[^>]*\scontent=")[^"]*"', re.I),
+]
+_BETWEEN_TAGS = re.compile(r'>\s+<')
+_SPACES = re.compile(r'\s+')
+
+
+def fingerprint(html: str) -> str:
+    """بصمة ثابتة لمحتوى الصفحة بعد تنظيف الأجزاء المتغيرة."""
+    for rx in _VOLATILE:
+        html = rx.sub(lambda m: (m.group(1) + '"') if m.groups() else '', html)
+    html = _SPACES.sub(' ', _BETWEEN_TAGS.sub('><', html))
+    return hashlib.blake2b(html.encode('utf-8', 'replace'), digest_size=16).hexdigest()
+
+
+class PageChangeDetector:
+    def __init__(self, timeout: int = 10, max_skips: int = 10):
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        self.timeout = timeout
+        self.max_skips = max_skips
+        self.state: Dict[str, dict] = {}
+
+    def changed(self, url: str) -> bool:
+        """
+        يعيد True إذا يجب إجراء فحص Selenium الكامل (تغيّرت الصفحة، أول طلب، خطأ، أو بلغنا max_skips).
+        """
+        st = self.state.setdefault(url, {"etag": None, "last_modified": None, "fingerprint": None, "skips": 0,
+                                         "pending": None})
+        headers = {}
+        if st["etag"]:
+            headers["If-None-Match"] = st["etag"]
+        if st["last_modified"]:
+            headers["If-Modified-Since"] = st["last_modified"]
+        try:
+            with metrics.span("precheck.request"):
+                response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            metrics.inc("bots_upstream_requests_total", target="precheck", status="error")
+            print("تعذر الفحص المسبق عبر HTTP:", e)
+            return True
+        metrics.inc("bots_upstream_requests_total", target="precheck", status=str(response.status_code))
+
+        if response.status_code == 304:
+            fresh = False
+        elif response.status_code == 200:
+            validators = {"etag": response.headers.get("ETag"),
+                          "last_modified": response.headers.get("Last-Modified"),
+                          "fingerprint": fingerprint(response.text)}
+            fresh = validators["fingerprint"] != st["fingerprint"]
+            if fresh:
+                # لا تُعتمد إلا بعد فحص Selenium ناجح (commit)
+                st["pending"] = validators
+            else:
+                st.update(validators, pending=None)
+        else:
+            return True
+
+        # محتوى جديد لم يُعتمد بعد (فشل آخر فحص كامل) -> فحص كامل مرة أخرى
+        if fresh or st["pending"] or st["skips"] >= self.max_skips:
+            st["skips"] = 0
+            return True
+        st["skips"] += 1
+        metrics.inc("bots_precheck_skips_total")
+        return False
+
+    def commit(self, url: str):
+        """اعتماد المحتوى الذي أعاده آخر changed() بعد أن اكتمل الفحص الكامل دون خطأ."""
+        st = self.state.get(url)
+        if st and st["pending"]:
+            st.update(st["pending"], pending=None)
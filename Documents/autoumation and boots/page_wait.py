@@ -0,0 +1,128 @@
+"""
+page_wait.py
+
+انتظار جاهزية الصفحة بدل time.sleep ثابت:
+- document.readyState == 'complete'
+- ثم ظهور أحد المحددات المطلوبة (خروج مبكر) أو هدوء الشبكة
+  (عدد الموارد في performance ثابت لمدة idle_ms)
+- مهلة لكل موقع عبر WAIT_TIMEOUTS، مثال: minha.anem.dz=10,bbc.com=8
+- تسجيل زمن الجاهزية الفعلي لكل صفحة في ready_stats
+
+الاستخدام:
+    elapsed = open_and_wait(driver, url, selectors=["h3"])
+"""
+
+import os
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+DEFAULT_TIMEOUT = float(os.getenv("WAIT_TIMEOUT", "15"))
+IDLE_MS = int(os.getenv("WAIT_IDLE_MS", "500"))
+
+_STATE_SCRIPT = """
+const sels = arguments[0] || [];
+return [
+    document.readyState,
+    sels.some(s => { try { return document.querySelector(s) !== null; } catch (e) { return false; } }),
+    performance.getEntriesByType('resource').length,
+];
+"""
+
+
+def parse_site_timeouts(s: str) -> Dict[str, float]:
+    out = {}
+    for part in s.split(","):
+        if "=" not in part:
+            continue
+        host, value = part.split("=", 1)
+        try:
+            out[host.strip().lower()] = float(value)
+        except ValueError:
+            print(f"تجاهل مهلة غير صالحة: {part}")
+    return out
+
+
+SITE_TIMEOUTS = parse_site_timeouts(os.getenv("WAIT_TIMEOUTS", ""))
+
+
+def site_timeout(url: str) -> float:
+    """مهلة الموقع: أطول لاحقة مطابقة لاسم المضيف في WAIT_TIMEOUTS وإلا DEFAULT_TIMEOUT."""
+    host = (urlparse(url).hostname or "").lower()
+    best = None
+    for site in SITE_TIMEOUTS:
+        if (host == site or host.endswith("." + site)) and (best is None or len(site) > len(best)):
+            best = site
+    return SITE_TIMEOUTS[best] if best else DEFAULT_TIMEOUT
+
+
+class PageReadyStats:
+    """أزمنة الجاهزية لكل مضيف (آخر keep قياس)."""
+
+    def __init__(self, keep: int = 500):
+        self.keep = keep
+        self.samples: Dict[str, List[float]] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    def record(self, url: str, seconds: float, timed_out: bool = False):
+        host = urlparse(url).hostname or url
+        samples = self.samples.setdefault(host, [])
+        samples.append(seconds)
+        if len(samples) > self.keep:
+            del samples[0]
+        if timed_out:
+            self.timeouts[host] = self.timeouts.get(host, 0) + 1
+
+    def summary(self) -> Dict[str, dict]:
+        out = {}
+        for host, samples in self.samples.items():
+            ordered = sorted(samples)
+            out[host] = {
+                "count": len(ordered),
+                "mean": sum(ordered) / len(ordered),
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max": ordered[-1],
+                "timeouts": self.timeouts.get(host, 0),
+            }
+        return out
+
+
+ready_stats = PageReadyStats()
+
+
+def wait_ready(driver, url: str = "", selectors: List[str] = None, timeout: float = None,
+               idle_ms: int = IDLE_MS, poll: float = 0.05) -> bool:
+    """
+    ينتظر حتى تكتمل الصفحة ثم يظهر أحد selectors أو تهدأ الشبكة.
+    يعيد False عند انتهاء المهلة (لا يرمي استثناء؛ الفحص يكمل على ما تم تحميله).
+    """
+    if timeout is None:
+        timeout = site_timeout(url)
+    deadline = time.monotonic() + timeout
+    last_count, stable_since = -1, time.monotonic()
+    while True:
+        try:
+            state, has_selector, count = driver.execute_script(_STATE_SCRIPT, selectors or [])
+        except Exception:
+            state, has_selector, count = "loading", False, -1
+        now = time.monotonic()
+        if count != last_count:
+            last_count, stable_since = count, now
+        if state == "complete" and (has_selector or (now - stable_since) * 1000 >= idle_ms):
+            return True
+        if now >= deadline:
+            return False
+        time.sleep(poll)
+
+
+def open_and_wait(driver, url: str, selectors: List[str] = None, timeout: float = None) -> float:
+    """فتح الرابط وانتظار جاهزيته؛ يعيد الزمن الكلي بالثواني ويسجله في ready_stats."""
+    start = time.monotonic()
+    driver.get(url)
+    ok = wait_ready(driver, url, selectors, timeout)
+    elapsed = time.monotonic() - start
+    ready_stats.record(url, elapsed, timed_out=not ok)
+    if not ok:
+        print(f"انتهت مهلة انتظار جاهزية {url} بعد {elapsed:.1f} ث")
+    return elapsed
@@ -0,0 +1,111 @@
+"""
+quote_buffer.py
+
+مخزن اقتباسات في الذاكرة يُملأ في الخلفية، حتى يُجاب /quote فوراً دون طلب خارجي:
+- حلقة (ring buffer) محدودة الحجم من اقتباسات جديدة تُملأ دفعات من api.quotable.io
+  عندما تنخفض تحت low_water
+- الاقتباسات المستخدمة تُحفظ في حلقة ثانية محدودة؛ إذا نفدت الجديدة (المصدر بطيء أو متوقف)
+  ندور عليها بدل تكرار نفس الاقتباس الاحتياطي
+- الحالة تُحفظ على القرص (QUOTES_FILE) ليبدأ البوت دافئاً بعد إعادة التشغيل
+"""
+
+import os
+import json
+import asyncio
+from collections import deque
+from typing import List, Optional
+
+import metrics
+
+FALLBACK = "الحياة رحلة، استمتع بكل لحظة فيها. 🌟"
+QUOTES_URL = os.getenv("QUOTES_URL", "https://api.quotable.io/quotes/random")
+
+
+class QuoteBuffer:
+    def __init__(self, path: str = "quotes_cache.json", capacity: int = 100, batch: int = 20,
+                 low_water: int = 20, used_capacity: int = 200):
+        self.path = path
+        self.batch = batch
+        self.low_water = low_water
+        self.fresh = deque(maxlen=capacity)
+        self.used = deque(maxlen=used_capacity)
+        self._need_refill = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.fresh.extend(data.get("fresh", []))
+        self.used.extend(data.get("used", []))
+
+    def save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"fresh": list(self.fresh), "used": list(self.used)}, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def take(self) -> str:
+        """اقتباس من الذاكرة مباشرة (لا ينتظر الشبكة أبداً)."""
+        if self.fresh:
+            quote = self.fresh.popleft()
+            self.used.append(quote)
+        elif self.used:
+            # لا جديد: ندور على المستخدمة سابقاً
+            self.used.rotate(-1)
+            quote = self.used[-1]
+        else:
+            quote = FALLBACK
+        if len(self.fresh) < self.low_water:
+            self._need_refill.set()
+        return quote
+
+    async def fetch_batch(self, http) -> List[str]:
+        try:
+            response = await http.get(QUOTES_URL, params={"limit": self.batch})
+        except Exception:
+            metrics.inc("bots_upstream_requests_total", target="quotable", status="error")
+            raise
+        metrics.inc("bots_upstream_requests_total", target="quotable", status=str(response.status_code))
+        response.raise_for_status()
+        return [f"\"{q['content']}\" - {q['author']}" for q in response.json()]
+
+    async def _refill_loop(self, http):
+        delay = 5
+        while True:
+            if len(self.fresh) >= self.low_water:
+                self._need_refill.clear()
+                await self._need_refill.wait()
+            try:
+                quotes = await self.fetch_batch(http)
+            except Exception as e:
+                print("تعذر جلب الاقتباسات، سنعيد المحاولة لاحقاً:", e)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 300)
+                continue
+            delay = 5
+            known = set(self.fresh)
+            self.fresh.extend(q for q in quotes if q not in known)
+            self.save()
+            if len(self.fresh) < self.low_water:
+                # الدفعة لم تكفِ (اقتباسات مكررة أو دفعة صغيرة): مهلة قصيرة قبل الدفعة التالية
+                await asyncio.sleep(1)
+
+    def start(self, http):
+        """تشغيل الملء في الخلفية (يُستدعى من داخل حلقة asyncio الخاصة بالبوت)."""
+        if self._task is None:
+            self._need_refill.set()
+            self._task = asyncio.get_running_loop().create_task(self._refill_loop(http))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.save()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+results_log.py
+
+سجل نتائج الفحص بصيغة JSONL بدل فتح/إغلاق ملف نصي مع كل فحص:
+- ملف واحد مفتوح بكاتب مخزّن (buffered) مع fsync دوري كل fsync_interval ثانية
+- تدوير حسب الحجم أو العمر، وضغط الملفات المدوَّرة بـ gzip
+- سلسلة NOT_FOUND المتتالية لنفس الرابط تُكتب كسجل نطاق واحد:
+    {"ts": "...", "until": "...", "status": "NOT_FOUND", "url": "...", "count": 240}
+- أداة استعلام عبر الملفات المدوَّرة (وتقرأ أيضاً السجل النصي القديم minha_results.txt)
+
+استعلام (PowerShell):
+    python .\\results_log.py --status FOUND --since 2025-11-03T08:00
+    python .\\results_log.py --since 2025-11-01 --until 2025-11-04 --count
+
+متغيرات البيئة: RESULTS_FILE، RESULTS_MAX_MB، RESULTS_MAX_HOURS، RESULTS_FSYNC_SECONDS
+"""
+
+import os
+import io
+import sys
+import glob
+import gzip
+import json
+import time
+import shutil
+import argparse
+import datetime
+from typing import Iterator, List, Optional
+
+import metrics
+
+TS_FORMAT = '%Y-%m-%dT%H:%M:%S'
+ROTATED_FORMAT = '%Y%m%d-%H%M%S'
+
+
+def now_ts() -> str:
+    return datetime.datetime.now().strftime(TS_FORMAT)
+
+
+class ResultsLog:
+    def __init__(self, path: str = 'minha_results.jsonl', max_bytes: int = 10 * 1024 * 1024,
+                 max_age: float = 24 * 3600, fsync_interval: float = 5.0, buffer_size: int = 64 * 1024,
+                 max_run_seconds: float = 3600, compress: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.fsync_interval = fsync_interval
+        self.buffer_size = buffer_size
+        self.max_run_seconds = max_run_seconds
+        self.compress = compress
+        # url -> سلسلة NOT_FOUND مفتوحة لم تُكتب بعد
+        self.runs = {}
+        self._open()
+
+    def _open(self):
+        self.file = open(self.path, 'a', encoding='utf-8', buffering=self.buffer_size)
+        self.opened_at = time.time()
+        self.last_sync = time.time()
+
+    @metrics.span("results_log.record")
+    def record(self, status: str, url: str, matches: List[str] = None, snippet: str = "", ts: str = None):
+        metrics.inc("bots_probes_total", status=status)
+        ts = ts or now_ts()
+        if status == 'NOT_FOUND':
+            run = self.runs.get(url)
+            if run is None:
+                self.runs[url] = {"ts": ts, "until": ts, "status": status, "url": url, "count": 1,
+                                  "_started": time.time()}
+            else:
+                run["until"] = ts
+                run["count"] += 1
+                if time.time() - run["_started"] >= self.max_run_seconds:
+                    # لا نبقي سلسلة طويلة في الذاكرة إلى ما لا نهاية
+                    self._close_run(url)
+        else:
+            self._close_run(url)
+            rec = {"ts": ts, "status": status, "url": url}
+            if matches is not None:
+                rec["matched"] = matches
+            if snippet:
+                rec["snippet"] = snippet
+            self._write(rec)
+            if status == 'FOUND':
+                # لا نريد فقدان نتيجة FOUND عند انهيار العملية
+                self.flush(fsync=True)
+        self._maybe_sync()
+
+    def _close_run(self, url: str):
+        run = self.runs.pop(url, None)
+        if run is None:
+            return
+        run.pop("_started", None)
+        if run["count"] == 1:
+            del run["until"], run["count"]
+        self._write(run)
+
+    def _write(self, rec: dict):
+        self.file.write(json.dumps(rec, ensure_ascii=False) + '\n')
+        if self.file.tell() >= self.max_bytes or time.time() - self.opened_at >= self.max_age:
+            self.rotate()
+
+    def _maybe_sync(self):
+        if time.time() - self.last_sync >= self.fsync_interval:
+            self.flush(fsync=True)
+
+    def flush(self, fsync: bool = False):
+        self.file.flush()
+        if fsync:
+            with metrics.span("results_log.fsync"):
+                os.fsync(self.file.fileno())
+            self.last_sync = time.time()
+
+    def rotate(self):
+        self.flush(fsync=True)
+        self.file.close()
+        base, ext = os.path.splitext(self.path)
+        stamp = datetime.datetime.now().strftime(ROTATED_FORMAT)
+        target = f"{base}.{stamp}{ext}"
+        # تدويران في نفس الثانية: لاحقة _01، _02 ... (تُرتب بعد الاسم الأول فيبقى الترتيب زمنياً)
+        n = 0
+        while os.path.exists(target) or os.path.exists(target + '.gz'):
+            n += 1
+            target = f"{base}.{stamp}_{n:02d}{ext}"
+        if os.path.getsize(self.path) > 0:
+            os.replace(self.path, target)
+            if self.compress:
+                with open(target, 'rb') as src, gzip.open(target + '.gz', 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(target)
+        self._open()
+
+    def close(self):
+        for url in list(self.runs):
+            self._close_run(url)
+        self.flush(fsync=True)
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_results_log() -> ResultsLog:
+    """إنشاء السجل من متغيرات البيئة."""
+    return ResultsLog(
+        path=os.getenv('RESULTS_FILE', 'minha_results.jsonl'),
+        max_bytes=int(float(os.getenv('RESULTS_MAX_MB', '10')) * 1024 * 1024),
+        max_age=float(os.getenv('RESULTS_MAX_HOURS', '24')) * 3600,
+        fsync_interval=float(os.getenv('RESULTS_FSYNC_SECONDS', '5')),
+    )
+
+
+# ---------- القراءة والاستعلام ----------
+
+def parse_legacy_line(line: str) -> Optional[dict]:
+    """تحويل سطر من السجل النصي القديم (timestamp | STATUS | url | matched: ... | snippet: ...)."""
+    parts = [p.strip() for p in line.rstrip('\n').split(' | ')]
+    if len(parts) < 3:
+        return None
+    try:
+        ts = datetime.datetime.strptime(parts[0], '%Y-%m-%d %H:%M:%S').strftime(TS_FORMAT)
+    except ValueError:
+        return None
+    rec = {"ts": ts, "status": parts[1], "url": parts[2]}
+    for extra in parts[3:]:
+        if extra.startswith('matched:'):
+            matched = extra[len('matched:'):].strip()
+            rec["matched"] = [m for m in matched.split(',') if m]
+        elif extra.startswith('snippet:'):
+            rec["snippet"] = extra[len('snippet:'):].strip()
+    return rec
+
+
+def log_files(path: str) -> List[str]:
+    """الملفات المدوَّرة (الأقدم أولاً) ثم الملف الحالي."""
+    base, ext = os.path.splitext(path)
+    rotated = sorted(glob.glob(f"{glob.escape(base)}.*{ext}*"))
+    rotated = [f for f in rotated if f != path]
+    return rotated + ([path] if os.path.exists(path) else [])
+
+
+def _rotated_at(path: str, base: str) -> Optional[str]:
+    stamp = path[len(base) + 1:].split('.')[0].split('_')[0]
+    try:
+        return datetime.datetime.strptime(stamp, ROTATED_FORMAT).strftime(TS_FORMAT)
+    except ValueError:
+        return None
+
+
+def _read_lines(path: str) -> Iterator[str]:
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as raw:
+        for line in io.TextIOWrapper(raw, encoding='utf-8'):
+            yield line
+
+
+def iter_records(path: str, since: str = None, until: str = None, status: str = None) -> Iterator[dict]:
+    """كل السجلات ضمن [since, until] بالحالة المطلوبة، عبر الملفات المدوَّرة والحالية."""
+    base = os.path.splitext(path)[0]
+    files = log_files(path) if path.endswith('.jsonl') else [path]
+    for f in files:
+        rotated_at = _rotated_at(f, base)
+        # كل سجلات ملف مدوَّر أقدم من لحظة تدويره -> نتجاوز الملف كاملاً دون قراءته
+        if since and rotated_at and rotated_at < since:
+            continue
+        for line in _read_lines(f):
+            if line.startswith('{'):
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+            else:
+                rec = parse_legacy_line(line)
+                if rec is None:
+                    continue
+            end = rec.get("until", rec["ts"])
+            if since and end < since:
+                continue
+            if until and rec["ts"] > until:
+                continue
+            if status and rec["status"] != status:
+                continue
+            yield rec
+
+
+def _normalize_time(s: Optional[str], fill: str = '0000-01-01T00:00:00') -> Optional[str]:
+    """إكمال التاريخ الجزئي (2025-11-03 أو 2025-11-03T08:00) ليُقارن نصياً مع ts."""
+    if not s:
+        return None
+    s = s.replace(' ', 'T')[:19]
+    return s + fill[len(s):]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="استعلام سجل نتائج minha_bot")
+    parser.add_argument('--path', default=os.getenv('RESULTS_FILE', 'minha_results.jsonl'))
+    parser.add_argument('--since')
+    parser.add_argument('--until')
+    parser.add_argument('--status', choices=['FOUND', 'NOT_FOUND', 'ERROR'])
+    parser.add_argument('--count', action='store_true', help="طباعة عدد الفحوص فقط")
+    args = parser.parse_args(argv)
+
+    since = _normalize_time(args.since)
+    # --until 2025-11-04 يشمل اليوم كاملاً
+    until = _normalize_time(args.until, '9999-12-31T23:59:59')
+    total = 0
+    for rec in iter_records(args.path, since, until, args.status):
+        total += rec.get("count", 1)
+        if not args.count:
+            print(json.dumps(rec, ensure_ascii=False))
+    if args.count:
+        print(total)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
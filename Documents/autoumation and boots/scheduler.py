@@ -0,0 +1,136 @@
+"""
+scheduler.py
+
+جدولة الفحوص بدل الاستيقاظ كل 15 ثانية ومقارنة الساعة والدقيقة:
+- Scheduler: كومة مواعيد (heap) تنام حتى أقرب موعد فقط، مع jitter عشوائي اختياري
+- DailySlots: أوقات يومية (TIMES) مع سياسة تعويض للمواعيد الفائتة:
+    skip  — تجاهل الفائت والانتقال للموعد التالي
+    once  — فحص واحد فوري مهما كان عدد المواعيد الفائتة (افتراضي)
+    all   — تنفيذ كل موعد فائت
+- AdaptiveInterval: فاصل فحص متكيّف يتعلم من نتائج FOUND السابقة في سجل النتائج؛
+  يفحص أسرع حول الأوقات التي فُتحت فيها المواعيد سابقاً وأبطأ في بقية اليوم،
+  مع الإبقاء على متوسط معدل الفحص اليومي مساوياً للفاصل الأساسي.
+
+متغيرات البيئة: JITTER، CATCH_UP، ADAPTIVE، MIN_INTERVAL، MAX_INTERVAL، ADAPTIVE_WINDOW
+"""
+
+import time
+import heapq
+import random
+import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+MINUTES_PER_DAY = 24 * 60
+
+
+class Scheduler:
+    """
+    كل مهمة دالة تستقبل موعدها الاسمي (epoch) وتعيد موعدها التالي أو None للتوقف.
+    """
+
+    def __init__(self, jitter: float = 0.0, clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.jitter = jitter
+        self.clock = clock
+        self.sleep = sleep
+        self._heap = []
+        self._seq = 0
+
+    def add(self, job: Callable[[float], Optional[float]], at: float):
+        # الـ jitter يؤخر لحظة الاستيقاظ فقط؛ المهمة تستقبل الموعد الاسمي لتحسب التالي منه
+        wake = at + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        self._seq += 1
+        heapq.heappush(self._heap, (wake, self._seq, at, job))
+
+    def run(self):
+        while self._heap:
+            wake, _, at, job = heapq.heappop(self._heap)
+            delay = wake - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            nxt = job(at)
+            if nxt is not None:
+                self.add(job, nxt)
+
+
+class DailySlots:
+    def __init__(self, times: List[Tuple[int, int]], catch_up: str = "once"):
+        if catch_up not in ("skip", "once", "all"):
+            raise ValueError(f"سياسة تعويض غير معروفة: {catch_up}")
+        self.times = sorted(set(times))
+        self.catch_up = catch_up
+
+    def next_slot(self, after: float) -> float:
+        """أول موعد يومي بعد اللحظة after تماماً (يتعامل مع تغيّر اليوم تلقائياً)."""
+        base = datetime.datetime.fromtimestamp(after)
+        for day in range(2):
+            d = base.date() + datetime.timedelta(days=day)
+            for hh, mm in self.times:
+                ts = datetime.datetime.combine(d, datetime.time(hh, mm)).timestamp()
+                if ts > after:
+                    return ts
+        raise ValueError("لا توجد أوقات مجدولة")
+
+    def after_run(self, nominal: float, now: float) -> float:
+        """الموعد التالي بعد تنفيذ الموعد nominal وانتهاء الفحص عند now."""
+        nxt = self.next_slot(nominal)
+        if nxt > now:
+            return nxt
+        # الفحص تجاوز موعداً أو أكثر
+        if self.catch_up == "all":
+            return nxt
+        if self.catch_up == "once":
+            return now
+        return self.next_slot(now)
+
+
+class AdaptiveInterval:
+    def __init__(self, base: float, min_interval: float, max_interval: float,
+                 window_minutes: int = 30, floor: float = 0.1):
+        self.base = base
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.window = window_minutes
+        self.floor = floor
+        self.intervals: Optional[List[float]] = None
+
+    def learn(self, events: Iterable[datetime.datetime]):
+        counts = [0] * MINUTES_PER_DAY
+        for ev in events:
+            counts[ev.hour * 60 + ev.minute] += 1
+        if not any(counts):
+            self.intervals = None
+            return
+        # تنعيم مثلثي حول كل دقيقة (دائري عبر منتصف الليل)
+        w = self.window
+        scores = [0.0] * MINUTES_PER_DAY
+        for m, c in enumerate(counts):
+            if not c:
+                continue
+            for d in range(-w, w + 1):
+                scores[(m + d) % MINUTES_PER_DAY] += c * (1 - abs(d) / (w + 1))
+        top = max(scores)
+        # معدل الفحص يتناسب مع floor + الوزن، ثم يُطبَّع ليبقى المتوسط 1/base
+        rates = [self.floor + s / top for s in scores]
+        scale = (1.0 / self.base) / (sum(rates) / MINUTES_PER_DAY)
+        self.intervals = [min(self.max_interval, max(self.min_interval, 1.0 / (r * scale))) for r in rates]
+
+    @classmethod
+    def from_results_log(cls, path: str, base: float, min_interval: float, max_interval: float,
+                         window_minutes: int = 30) -> "AdaptiveInterval":
+        from results_log import iter_records
+        policy = cls(base, min_interval, max_interval, window_minutes)
+        events = []
+        try:
+            for rec in iter_records(path, status="FOUND"):
+                events.append(datetime.datetime.fromisoformat(rec["ts"]))
+        except OSError:
+            pass
+        policy.learn(events)
+        return policy
+
+    def interval(self, when: float) -> float:
+        if self.intervals is None:
+            return self.base
+        t = datetime.datetime.fromtimestamp(when)
+        return self.intervals[t.hour * 60 + t.minute]
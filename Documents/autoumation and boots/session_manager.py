@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""
+session_manager.py
+
+إبقاء ذاكرة جلسة المتصفح ثابتة في التشغيل الطويل بدل انتظار الانهيار:
+- قياس RSS لـ chromedriver وكل عمليات Chrome التابعة له (psutil إن وُجد، وإلا /proc على لينكس)
+- تدوير الجلسة عند تجاوز أحد الحدود: الذاكرة، عدد تحميلات الصفحة، أخطاء متتالية، عمر الجلسة
+- الجلسة البديلة تُجهَّز مسبقاً (في الخلفية عند بلوغ PREWARM_AT من أي حد) بملف تعريف مختلف،
+  ثم تُستبدل وتُغلق القديمة — لا يتوقف الفحص أثناء إقلاع Chrome الجديد
+- سجل ذاكرة JSONL (SESSION_LOG) لكل عينة ولكل تدوير، وقياسات bots_browser_rss_bytes و
+  bots_session_recycles_total{reason} في metrics.py
+
+    sessions = SessionManager.from_env(lambda profile: MinhaBot(profile=profile), bot)
+    sessions.bot.open_page(url) ...
+    sessions.after_probe(error=False)     # قد يبدّل sessions.bot
+
+ملخص السجل:
+    python .\\session_manager.py --log session_memory.jsonl
+    python .\\session_manager.py --pid 1234          # ذاكرة شجرة عمليات
+
+متغيرات البيئة: SESSION_MAX_MB، SESSION_MAX_LOADS، SESSION_MAX_ERRORS، SESSION_MAX_HOURS (0 = بلا حد)،
+SESSION_SAMPLE_SECONDS، PREWARM_AT، SESSION_LOG
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import metrics
+from results_log import now_ts
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+class MemorySample(NamedTuple):
+    rss: int          # بالبايت، مجموع الشجرة
+    processes: int    # عدد العمليات المقيسة
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", encoding="utf-8", errors="replace") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # اسم العملية بين قوسين وقد يحوي مسافات -> الحقول بعد آخر ")"
+        ppid = int(stat[stat.rfind(")") + 2:].split()[1])
+        children.setdefault(ppid, []).append(int(name))
+    return children
+
+
+def _proc_rss(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def tree_rss(pid: int) -> Optional[MemorySample]:
+    """RSS العملية وكل أحفادها، أو None إن تعذر القياس (لا psutil ولا /proc)."""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            procs = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for p in procs:
+            try:
+                total += p.memory_info().rss
+            except psutil.Error:
+                pass
+        return MemorySample(total, len(procs))
+    if not os.path.isdir("/proc"):
+        return None
+    children = _proc_children()
+    total, count, stack = 0, 0, [pid]
+    while stack:
+        p = stack.pop()
+        rss = _proc_rss(p)
+        if rss is not None:
+            total += rss
+            count += 1
+        stack.extend(children.get(p, ()))
+    return MemorySample(total, count) if count else None
+
+
+def driver_pid(bot) -> Optional[int]:
+    """pid عملية chromedriver (Chrome وعمليات العرض أبناؤها)."""
+    try:
+        return bot.driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+class RecyclePolicy:
+    def __init__(self, max_mb: float = 1024, max_loads: int = 1000, max_errors: int = 5,
+                 max_hours: float = 24, prewarm_at: float = 0.9):
+        self.max_mb = max_mb
+        self.max_loads = max_loads
+        self.max_errors = max_errors
+        self.max_hours = max_hours
+        self.prewarm_at = prewarm_at
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_mb=float(os.getenv("SESSION_MAX_MB", "1024")),
+            max_loads=int(os.getenv("SESSION_MAX_LOADS", "1000")),
+            max_errors=int(os.getenv("SESSION_MAX_ERRORS", "5")),
+            max_hours=float(os.getenv("SESSION_MAX_HOURS", "24")),
+            prewarm_at=float(os.getenv("PREWARM_AT", "0.9")),
+        )
+
+    def _ratios(self, rss_mb: float, loads: int, age: float) -> List[Tuple[str, float]]:
+        ratios = []
+        if self.max_mb:
+            ratios.append(("memory", rss_mb / self.max_mb))
+        if self.max_loads:
+            ratios.append(("loads", loads / self.max_loads))
+        if self.max_hours:
+            ratios.append(("age", age / 3600 / self.max_hours))
+        return ratios
+
+    def reason(self, rss_mb: float, loads: int, errors: int, age: float) -> Optional[str]:
+        """سبب التدوير الآن أو None."""
+        if self.max_errors and errors >= self.max_errors:
+            return "errors"
+        for name, ratio in self._ratios(rss_mb, loads, age):
+            if ratio >= 1:
+                return name
+        return None
+
+    def should_prewarm(self, rss_mb: float, loads: int, age: float) -> bool:
+        return any(ratio >= self.prewarm_at for _, ratio in self._ratios(rss_mb, loads, age))
+
+
+class SessionManager:
+    """
+    يملك الجلسة الحالية (sessions.bot) ويدوّرها حسب RecyclePolicy.
+    factory(profile) تنشئ بوتاً جديداً بملف التعريف المعطى؛ ملفان بالتناوب لأن Chrome
+    لا يفتح ملف تعريف ما زالت الجلسة القديمة تستخدمه.
+    """
+
+    def __init__(self, factory: Callable[[str], object], bot=None, policy: RecyclePolicy = None,
+                 profile: str = "minha", memory_log: str = "session_memory.jsonl",
+                 sample_every: float = 60.0):
+        self.factory = factory
+        self.policy = policy or RecyclePolicy()
+        self.profiles = [profile, f"{profile}-b"]
+        self.memory_log = memory_log
+        self.sample_every = sample_every
+        self.generation = 0
+        self._spare = None
+        self._spare_thread: Optional[threading.Thread] = None
+        self._spare_error: Optional[Exception] = None
+        self.last_sample: Optional[MemorySample] = None
+        self._adopt(bot if bot is not None else factory(self.profiles[0]))
+        metrics.gauge_fn("bots_browser_rss_bytes",
+                         lambda: self.last_sample.rss if self.last_sample else float("nan"),
+                         "ذاكرة chromedriver و Chrome (RSS)")
+
+    @classmethod
+    def from_env(cls, factory: Callable[[str], object], bot=None):
+        return cls(factory, bot, RecyclePolicy.from_env(),
+                   profile=os.getenv("BROWSER_PROFILE", "minha"),
+                   memory_log=os.getenv("SESSION_LOG", "session_memory.jsonl"),
+                   sample_every=float(os.getenv("SESSION_SAMPLE_SECONDS", "60")))
+
+    def _adopt(self, bot):
+        self.bot = bot
+        self.started = time.time()
+        self.loads = 0
+        self.errors = 0
+        self.last_sample_at = 0.0
+        self.last_sample = None
+
+    @property
+    def rss_mb(self) -> float:
+        return self.last_sample.rss / 1024 / 1024 if self.last_sample else 0.0
+
+    def sample(self, event: str = "sample") -> Optional[MemorySample]:
+        pid = driver_pid(self.bot)
+        self.last_sample = tree_rss(pid) if pid else None
+        self.last_sample_at = time.time()
+        self._log(event)
+        return self.last_sample
+
+    def _log(self, event: str, **extra):
+        if not self.memory_log:
+            return
+        rec = {"ts": now_ts(), "event": event, "generation": self.generation,
+               "profile": self.profiles[self.generation % 2],
+               "rss_mb": round(self.rss_mb, 1) if self.last_sample else None,
+               "processes": self.last_sample.processes if self.last_sample else None,
+               "loads": self.loads, "errors": self.errors, "age_s": round(time.time() - self.started)}
+        rec.update(extra)
+        with open(self.memory_log, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def after_probe(self, error: bool = False) -> Optional[str]:
+        """يُستدعى بعد كل فحص؛ يعيد سبب التدوير إن دُوّرت الجلسة."""
+        self.loads += 1
+        self.errors = self.errors + 1 if error else 0
+        if time.time() - self.last_sample_at >= self.sample_every:
+            self.sample()
+        age = time.time() - self.started
+        reason = self.policy.reason(self.rss_mb, self.loads, self.errors, age)
+        if reason:
+            self.recycle(reason)
+            return reason
+        if self._spare_thread is None and self.policy.should_prewarm(self.rss_mb, self.loads, age):
+            self.prewarm()
+        return None
+
+    def _next_profile(self) -> str:
+        return self.profiles[(self.generation + 1) % 2]
+
+    def prewarm(self):
+        """إقلاع الجلسة البديلة في الخلفية بينما تستمر الحالية في الفحص."""
+        def build():
+            try:
+                self._spare = self.factory(self._next_profile())
+            except Exception as e:
+                self._spare_error = e
+        self._spare_error = None
+        self._spare_thread = threading.Thread(target=build, daemon=True)
+        self._spare_thread.start()
+        self._log("prewarm")
+
+    @metrics.span("session.recycle")
+    def recycle(self, reason: str):
+        metrics.inc("bots_session_recycles_total", reason=reason)
+        if self._spare_thread is None:
+            # سبب غير متوقع مسبقاً (أخطاء متتالية): نجهز البديلة الآن، والقديمة ما زالت مفتوحة
+            self.prewarm()
+        self._spare_thread.join()
+        spare, error = self._spare, self._spare_error
+        self._spare, self._spare_thread = None, None
+        if spare is None:
+            print(f"تعذر تجهيز جلسة بديلة ({reason}):", error)
+            self._log("recycle_failed", reason=reason, error=str(error)[:200])
+            return
+        old = self.bot
+        self.sample("retire")
+        print(f"تدوير جلسة المتصفح ({reason}): {self.rss_mb:.0f} MB، {self.loads} تحميل، "
+              f"عمر {(time.time() - self.started) / 3600:.1f} ساعة")
+        self.generation += 1
+        self._adopt(spare)
+        try:
+            old.close()
+        except Exception:
+            pass
+        self.sample("start")
+
+    def close(self):
+        if self._spare_thread is not None:
+            self._spare_thread.join()
+            if self._spare is not None:
+                self._spare.close()
+        self.bot.close()
+
+
+# ---------- ملخص السجل ----------
+
+def summarize_log(path: str) -> str:
+    """لكل جلسة: الذاكرة في البداية والنهاية والقصوى، والنمو بالميغابايت في الساعة."""
+    sessions: Dict[int, List[dict]] = {}
+    recycles: List[dict] = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                continue
+            if rec.get("event") == "retire":
+                recycles.append(rec)
+            if rec.get("rss_mb") is not None:
+                sessions.setdefault(rec["generation"], []).append(rec)
+    lines = []
+    for gen, recs in sorted(sessions.items()):
+        first, last = recs[0], recs[-1]
+        hours = max(last["age_s"] - first["age_s"], 1) / 3600
+        growth = (last["rss_mb"] - first["rss_mb"]) / hours
+        peak = max(r["rss_mb"] for r in recs)
+        lines.append(f"جلسة {gen:3} {first['ts']} → {last['ts']}  {first['rss_mb']:7.1f} → {last['rss_mb']:7.1f} MB"
+                     f"  أقصى {peak:7.1f}  نمو {growth:+7.1f} MB/ساعة  تحميلات {last['loads']}")
+    if recycles:
+        lines.append(f"تدويرات: {len(recycles)}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ذاكرة جلسات المتصفح")
+    parser.add_argument("--log", default=os.getenv("SESSION_LOG", "session_memory.jsonl"))
+    parser.add_argument("--pid", type=int, help="قياس RSS لعملية وأبنائها")
+    args = parser.parse_args(argv)
+    if args.pid:
+        sample = tree_rss(args.pid)
+        if sample is None:
+            print("تعذر القياس (ثبّت psutil على ويندوز).")
+            return 1
+        print(f"{sample.rss / 1024 / 1024:.1f} MB في {sample.processes} عملية")
+        return 0
+    if not os.path.exists(args.log):
+        print("لا يوجد سجل:", args.log)
+        return 1
+    print(summarize_log(args.log))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
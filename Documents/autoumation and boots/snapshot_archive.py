@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+snapshot_archive.py
+
+أرشيف لقطات HTML كاملة لكل فحص، وإعادة تقييم قواعد الكشف عليها دون متصفح:
+- كل لقطة تُخزن مضغوطة (gzip) باسم بصمة محتواها (blake2b): الصفحة المتطابقة تُخزن مرة واحدة
+  مهما تكررت، والفهرس (index.jsonl) يسجل لكل فحص: الوقت، الرابط، النتيجة، البصمة
+- التقييم دون اتصال: نفس مؤشرات check_appointment_open (XPaths، محددات CSS، الكلمات، النماذج،
+  فلاتر الوكالات) بـ lxml على آلاف اللقطات، موزعة على الأنوية (ProcessPoolExecutor)،
+  وكل بصمة تُقيَّم مرة واحدة
+- تقرير بالفرق بين النتيجة المسجلة أثناء الفحص والنتيجة بالقواعد الجديدة
+
+تفعيل الأرشفة في minha_bot.py:
+    set SNAPSHOTS=1
+    set SNAPSHOT_DIR=snapshots
+
+إعادة التقييم (PowerShell):
+    python .\\snapshot_archive.py stats
+    python .\\snapshot_archive.py eval --rules rules.json --since 2025-11-01 --workers 8
+    python .\\snapshot_archive.py show <البصمة>
+
+ملف القواعد (JSON، كل المفاتيح اختيارية؛ الافتراضي من minha_rules.py و AGENCIES_ALLOW/EXCLUDE):
+    {"xpaths": ["//button[contains(., 'حجز')]"], "selectors": ["div.alert"],
+     "keywords": ["rendez", "موعد"], "forms": true, "allow": ["Alger"], "exclude": []}
+
+ملاحظة: الظهور يُقدَّر من السمات (hidden، style، type=hidden) لعدم وجود CSS محسوب دون متصفح.
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from results_log import now_ts, _normalize_time
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:
+    etree = lxml_html = None
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "snapshots")
+
+
+def snapshot_hash(page: bytes) -> str:
+    return hashlib.blake2b(page, digest_size=16).hexdigest()
+
+
+class SnapshotArchive:
+    def __init__(self, directory: str = SNAPSHOT_DIR, level: int = 6):
+        self.directory = directory
+        self.level = level
+        self.index_path = os.path.join(directory, "index.jsonl")
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["SnapshotArchive"]:
+        """None إن لم تُفعَّل الأرشفة (SNAPSHOTS=1)."""
+        if os.getenv("SNAPSHOTS", "0") != "1":
+            return None
+        return cls(os.getenv("SNAPSHOT_DIR", SNAPSHOT_DIR))
+
+    def blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest[2:] + ".html.gz")
+
+    def put(self, url: str, page: str, status: str = None, matches: List[str] = None, ts: str = None) -> str:
+        """أرشفة لقطة وإضافة سطر في الفهرس؛ يعيد البصمة."""
+        data = page.encode("utf-8")
+        digest = snapshot_hash(data)
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # كتابة ملف مؤقت ثم إعادة تسمية: لا تُقرأ لقطة نصف مكتوبة
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp, "wb", compresslevel=self.level) as f:
+                f.write(data)
+            os.replace(tmp, path)
+        rec = {"ts": ts or now_ts(), "url": url, "hash": digest, "bytes": len(data)}
+        if status:
+            rec["status"] = status
+        if matches:
+            rec["matched"] = matches
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+        return digest
+
+    def load(self, digest: str) -> str:
+        with gzip.open(self.blob_path(digest), "rb") as f:
+            return f.read().decode("utf-8", errors="replace")
+
+    def entries(self, since: str = None, until: str = None, url: str = None) -> Iterator[dict]:
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if since and rec["ts"] < since:
+                    continue
+                if until and rec["ts"] > until:
+                    continue
+                if url and url not in rec["url"]:
+                    continue
+                yield rec
+
+    def stats(self) -> dict:
+        entries = list(self.entries())
+        unique = {e["hash"] for e in entries}
+        stored = 0
+        for digest in unique:
+            try:
+                stored += os.path.getsize(self.blob_path(digest))
+            except OSError:
+                pass
+        raw = sum(e["bytes"] for e in entries)
+        return {"snapshots": len(entries), "unique": len(unique), "raw_bytes": raw, "stored_bytes": stored,
+                "statuses": dict(Counter(e.get("status", "?") for e in entries))}
+
+
+# ---------- التقييم دون متصفح ----------
+
+def default_rules() -> dict:
+    """نفس مؤشرات check_appointment_open مع فلاتر AGENCIES_ALLOW/AGENCIES_EXCLUDE الحالية."""
+    # minha_rules لا يحمّل البوت (selenium، التنبيهات ...): التقييم يعمل على جهاز بلا متصفح
+    from minha_rules import APPOINTMENT_XPATHS, APPOINTMENT_SELECTORS, APPOINTMENT_KEYWORDS, parse_list
+    return {"xpaths": APPOINTMENT_XPATHS, "selectors": APPOINTMENT_SELECTORS,
+            "keywords": APPOINTMENT_KEYWORDS, "forms": True,
+            "allow": parse_list("AGENCIES_ALLOW"), "exclude": parse_list("AGENCIES_EXCLUDE")}
+
+
+def load_rules(path: str = None) -> dict:
+    rules = default_rules()
+    if path:
+        with open(path, encoding="utf-8") as f:
+            rules.update(json.load(f))
+    return rules
+
+
+_SIMPLE_CSS = re.compile(
+    r"^(?P<tag>[a-zA-Z][\w-]*|\*)?(?:#(?P<id>[\w-]+))?(?:\.(?P<cls>[\w-]+))?"
+    r"(?:\[(?P<attr>[\w-]+)(?:(?P<op>[*^$]?=)['\"]?(?P<val>[^'\"\]]*)['\"]?)?\])?$")
+
+
+def css_to_xpath(selector: str) -> str:
+    """cssselect إن وُجدت؛ وإلا ترجمة للمحددات البسيطة (tag، #id، .class، [attr*=v]) مع الأحفاد."""
+    try:
+        from cssselect import GenericTranslator
+        return GenericTranslator().css_to_xpath(selector)
+    except ImportError:
+        pass
+    parts = []
+    for token in selector.split():
+        m = _SIMPLE_CSS.match(token)
+        if not m:
+            raise ValueError(f"محدد CSS غير مدعوم بدون cssselect: {selector}")
+        conds = []
+        if m["id"]:
+            conds.append(f"@id='{m['id']}'")
+        if m["cls"]:
+            conds.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {m['cls']} ')")
+        if m["attr"]:
+            attr, op, val = m["attr"], m["op"], m["val"]
+            conds.append({None: f"@{attr}", "=": f"@{attr}='{val}'", "*=": f"contains(@{attr}, '{val}')",
+                          "^=": f"starts-with(@{attr}, '{val}')",
+                          "$=": f"substring(@{attr}, string-length(@{attr}) - {len(val) - 1})='{val}'"}[op])
+        parts.append((m["tag"] or "*") + "".join(f"[{c}]" for c in conds))
+    return "descendant-or-self::" + "//".join(parts)
+
+
+_HIDDEN_STYLE = re.compile(r"(display\s*:\s*none|visibility\s*:\s*hidden|opacity\s*:\s*0(?![.\d]))", re.I)
+
+
+def _visible(el) -> bool:
+    """تقدير is_displayed من السمات: العنصر وأسلافه غير مخفيين صراحة."""
+    while el is not None:
+        if el.get("hidden") is not None or el.get("type") == "hidden" or el.get("aria-hidden") == "true":
+            return False
+        if _HIDDEN_STYLE.search(el.get("style") or ""):
+            return False
+        el = el.getparent()
+    return True
+
+
+def _page_text(root) -> str:
+    # نفس ما يتجاوزه probe_dom عند جمع نص الصفحة
+    for el in list(root.iter("script", "style", "noscript", "template")):
+        if el.getparent() is not None:
+            el.drop_tree()
+    body = root.find("body")
+    return " ".join((body if body is not None else root).text_content().split())
+
+
+class Verdict(NamedTuple):
+    found: bool          # النتيجة النهائية بعد الفلاتر (مثل check_appointment_open)
+    indicator: bool      # مؤشر الفتح قبل الفلاتر
+    matches: List[str]
+    xpath_hits: List[int]
+    error: str = ""
+
+
+class _Evaluator:
+    """القواعد مترجمة مرة واحدة لكل عملية."""
+
+    def __init__(self, rules: dict):
+        if etree is None:
+            raise ImportError("lxml غير مثبتة: pip install lxml")
+        from agency_matcher import compile_filters
+        self.xpaths = []
+        for xp in rules.get("xpaths", []):
+            try:
+                self.xpaths.append(etree.XPath(xp))
+            except etree.XPathSyntaxError:
+                self.xpaths.append(None)
+        self.selectors = [etree.XPath(css_to_xpath(s)) for s in rules.get("selectors", [])]
+        self.keywords = [k.lower() for k in rules.get("keywords", [])]
+        self.forms = rules.get("forms", True)
+        self.filtered = bool(rules.get("allow") or rules.get("exclude"))
+        self.matcher = compile_filters(tuple(rules.get("allow") or ()), tuple(rules.get("exclude") or ()))
+
+    def evaluate(self, page: str) -> Verdict:
+        root = lxml_html.document_fromstring(page)
+        hits, xpath_visible = [], False
+        for xp in self.xpaths:
+            elems = xp(root) if xp is not None else []
+            hits.append(len(elems))
+            if not xpath_visible and any(_visible(el) for el in elems if hasattr(el, "getparent")):
+                xpath_visible = True
+        # مثل el.text في Selenium: نص العنصر المخفي لا يُحتسب
+        selector_text = any(
+            _visible(el) and any(k in " ".join(el.text_content().split()).lower() for k in self.keywords)
+            for sel in self.selectors for el in sel(root))
+        forms = bool(self.forms and root.xpath("count(//form)"))
+        indicator = xpath_visible or selector_text or forms
+        if not self.filtered:
+            return Verdict(indicator, indicator, [], hits)
+        ok, matches = self.matcher.decide(self.matcher.find(_page_text(root)))
+        return Verdict(indicator and ok, indicator, matches if indicator and ok else [], hits)
+
+
+_worker: Optional[_Evaluator] = None
+_archive_dir: Optional[str] = None
+
+
+def _init_worker(rules: dict, directory: str):
+    global _worker, _archive_dir
+    _worker = _Evaluator(rules)
+    _archive_dir = directory
+
+
+def _evaluate_hash(digest: str):
+    try:
+        page = SnapshotArchive(_archive_dir).load(digest)
+        return digest, _worker.evaluate(page)
+    except Exception as e:
+        return digest, Verdict(False, False, [], [], f"{type(e).__name__}: {e}")
+
+
+def evaluate(archive: SnapshotArchive, rules: dict, entries: List[dict], workers: int = None) -> Dict[str, Verdict]:
+    """تقييم كل بصمة فريدة مرة واحدة؛ workers=1 في نفس العملية."""
+    unique = list(dict.fromkeys(e["hash"] for e in entries))
+    if workers == 1 or len(unique) < 2:
+        _init_worker(rules, archive.directory)
+        return dict(map(_evaluate_hash, unique))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(rules, archive.directory)) as pool:
+        chunk = max(1, len(unique) // ((workers or os.cpu_count() or 1) * 4))
+        return dict(pool.map(_evaluate_hash, unique, chunksize=chunk))
+
+
+def report(entries: List[dict], verdicts: Dict[str, Verdict], show: int = 20) -> str:
+    counts, flips = Counter(), []
+    for e in entries:
+        v = verdicts[e["hash"]]
+        new = "ERROR" if v.error else ("FOUND" if v.found else "NOT_FOUND")
+        counts[new] += 1
+        old = e.get("status")
+        if old and old != new:
+            flips.append((e, old, new, v))
+    lines = [f"لقطات: {len(entries)} (فريدة {len(verdicts)}) | " + " | ".join(f"{k}: {n}" for k, n in sorted(counts.items())),
+             f"تغيّرت النتيجة في {len(flips)} لقطة مقارنة بالفحص الأصلي"]
+    for e, old, new, v in flips[:show]:
+        detail = v.error or (", ".join(v.matches) if v.matches else f"xpaths={v.xpath_hits}")
+        lines.append(f"  {e['ts']} {old:9} -> {new:9} {e['url'][:60]}  {e['hash'][:12]}  {detail}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="أرشيف لقطات الصفحات وإعادة تقييمها")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats")
+    ev = sub.add_parser("eval", help="تطبيق قواعد الكشف على اللقطات المؤرشفة")
+    ev.add_argument("--rules", help="ملف JSON يستبدل بعض القواعد الافتراضية")
+    ev.add_argument("--since")
+    ev.add_argument("--until")
+    ev.add_argument("--url", help="جزء من الرابط")
+    ev.add_argument("--workers", type=int, default=None, help="عدد العمليات (افتراضياً عدد الأنوية)")
+    ev.add_argument("--show", type=int, default=20, help="عدد اللقطات المتغيرة المعروضة")
+    ev.add_argument("--json", help="كتابة نتيجة كل لقطة في ملف JSONL")
+    show = sub.add_parser("show", help="طباعة HTML لقطة")
+    show.add_argument("hash")
+    args = parser.parse_args(argv)
+
+    archive = SnapshotArchive(args.dir)
+    if args.command == "stats":
+        st = archive.stats()
+        ratio = st["raw_bytes"] / st["stored_bytes"] if st["stored_bytes"] else 0
+        print(f"لقطات: {st['snapshots']} | فريدة: {st['unique']} | "
+              f"{st['raw_bytes'] / 1024 / 1024:.1f} MB -> {st['stored_bytes'] / 1024 / 1024:.1f} MB (x{ratio:.1f})")
+        print("النتائج المسجلة:", st["statuses"])
+    elif args.command == "show":
+        print(archive.load(args.hash))
+    elif args.command == "eval":
+        entries = list(archive.entries(_normalize_time(args.since),
+                                       _normalize_time(args.until, '9999-12-31T23:59:59'), args.url))
+        if not entries:
+            print("لا توجد لقطات مطابقة.")
+            return 1
+        start = time.perf_counter()
+        verdicts = evaluate(archive, load_rules(args.rules), entries, args.workers)
+        elapsed = time.perf_counter() - start
+        print(report(entries, verdicts, args.show))
+        print(f"الزمن: {elapsed:.2f} ث ({len(verdicts) / elapsed if elapsed else 0:.0f} لقطة فريدة/ث)")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                for e in entries:
+                    f.write(json.dumps(dict(e, verdict=verdicts[e["hash"]]._asdict()), ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
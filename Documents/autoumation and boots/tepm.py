@@ -2,8 +2,14 @@ import os
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 from dotenv import load_dotenv
-import requests
+import httpx
 import json
+from async_cache import TTLCache
+from quote_buffer import QuoteBuffer
+from intent_router import IntentRouter, INTENTS
+from update_processor import ChatOrderedUpdateProcessor
+from alerts import SubscriberStore
+import metrics
 
 # تحميل المتغيرات من ملف البيئة
 load_dotenv()
@@ -11,8 +17,49 @@ load_dotenv()
 class بوت_تليجرام_المتقدم:
     def __init__(self):
         self.token = os.getenv('TELEGRAM_BOT_TOKEN')
-        self.application = Application.builder().token(self.token).build()
+        البناء = (
+            Application.builder()
+            .token(self.token)
+            # معالجة متوازية محدودة مع الحفاظ على ترتيب كل محادثة (update_processor.py)
+            .concurrent_updates(ChatOrderedUpdateProcessor(int(os.getenv('MAX_CONCURRENT_UPDATES', '32'))))
+            .post_init(self.عند_البدء)
+            .post_shutdown(self.عند_الإيقاف)
+        )
+        # عنوان بديل لـ Bot API (مثلاً الخادم المحلي في webhook_loadtest.py)
+        if os.getenv('TELEGRAM_API_BASE'):
+            البناء = البناء.base_url(os.getenv('TELEGRAM_API_BASE').rstrip('/') + '/bot')
+        self.application = البناء.build()
+        # عميل HTTP غير متزامن مشترك (اتصالات مُعاد استخدامها) لكل الطلبات الخارجية
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        # كاش الطقس لكل مدينة: صلاحية WEATHER_TTL ثانية، وحد أقصى WEATHER_CACHE_SIZE مدينة
+        self.كاش_الطقس = TTLCache(
+            ttl=float(os.getenv('WEATHER_TTL', '600')),
+            maxsize=int(os.getenv('WEATHER_CACHE_SIZE', '256')),
+        )
+        # اقتباسات جاهزة في الذاكرة تُملأ في الخلفية وتُحفظ على القرص (QUOTES_FILE)
+        self.اقتباسات = QuoteBuffer(path=os.getenv('QUOTES_FILE', 'quotes_cache.json'))
+        # مشتركو تنبيهات minha_bot (ملف مشترك تقرؤه alerts.py عند FOUND)
+        self.المشتركون = SubscriberStore()
+        # كل كلمات النوايا مجمّعة في آلة بحث واحدة فوق النص الموحّد
+        self.موجه_النوايا = IntentRouter(INTENTS)
+        # قياسات الكاش والمخزن تُقرأ لحظة عرض /metrics (METRICS_PORT)
+        metrics.gauge_fn('bots_weather_cache_hits_total', lambda: self.كاش_الطقس.hits, kind='counter')
+        metrics.gauge_fn('bots_weather_cache_misses_total', lambda: self.كاش_الطقس.misses, kind='counter')
+        metrics.gauge_fn('bots_weather_cache_coalesced_total', lambda: self.كاش_الطقس.coalesced, kind='counter')
+        metrics.gauge_fn('bots_quote_buffer_fresh', lambda: len(self.اقتباسات.fresh))
         self.إعداد_المعالجات()
+
+    async def عند_البدء(self, application: Application):
+        """تشغيل المهام الخلفية بعد بدء حلقة البوت"""
+        self.اقتباسات.start(self.http)
+
+    async def عند_الإيقاف(self, application: Application):
+        """إغلاق الاتصالات المشتركة عند إيقاف البوت"""
+        await self.اقتباسات.stop()
+        await self.http.aclose()
     
     def إعداد_المعالجات(self):
         """إعداد معالجات الأوامر والرسائل"""
@@ -21,10 +68,13 @@ class بوت_تليجرام_المتقدم:
         self.application.add_handler(CommandHandler("help", self.مساعدة))
         self.application.add_handler(CommandHandler("weather", self.طقس))
         self.application.add_handler(CommandHandler("quote", self.اقتباس))
+        self.application.add_handler(CommandHandler("subscribe", self.اشتراك))
+        self.application.add_handler(CommandHandler("unsubscribe", self.إلغاء_الاشتراك))
         
         # معالجة الرسائل النصية العادية
         self.application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.معالجة_الرسالة))
     
+    @metrics.span('telegram.start')
     async def بدء(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالج أمر /start"""
         user = update.effective_user
@@ -35,12 +85,14 @@ class بوت_تليجرام_المتقدم:
         
         🌤️ /weather [مدينة] - طقس أي مدينة
         💬 /quote - اقتباس عشوائي
+        🔔 /subscribe - تنبيه عند فتح مواعيد minha
         ℹ️ /help - المساعدة
         
         أرسل لي أي رسالة وسأرد عليك!
         """
         await update.message.reply_text(رسالة_الترحيب)
     
+    @metrics.span('telegram.help')
     async def مساعدة(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالج أمر /help"""
         رسالة_المساعدة = """
@@ -50,11 +102,14 @@ class بوت_تليجرام_المتقدم:
         /help - عرض هذه المساعدة
         /weather [مدينة] - الحصول على الطقس
         /quote - اقتباس ملهم
+        /subscribe [وكالات] - تنبيه عند فتح المواعيد، مثال: /subscribe Alger, Oran, -Blida
+        /unsubscribe - إيقاف التنبيهات
         
         💡 يمكنك أيضاً محادثتي بشكل طبيعي!
         """
         await update.message.reply_text(رسالة_المساعدة)
     
+    @metrics.span('telegram.weather')
     async def طقس(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالج أمر /weather"""
         if not context.args:
@@ -62,7 +117,7 @@ class بوت_تليجرام_المتقدم:
             return
         
         المدينة = ' '.join(context.args)
-        بيانات_الطقس = self.الحصول_على_الطقس(المدينة)
+        بيانات_الطقس = await self.الحصول_على_الطقس(المدينة)
         
         if بيانات_الطقس:
             رسالة_الطقس = f"""
@@ -78,41 +133,67 @@ class بوت_تليجرام_المتقدم:
         else:
             await update.message.reply_text(f"❌ لم أتمكن من جلب طقس {المدينة}")
     
+    @metrics.span('telegram.quote')
     async def اقتباس(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالج أمر /quote"""
         اقتباس = self.الحصول_على_اقتباس()
         await update.message.reply_text(f"💬 {اقتباس}")
     
+    @metrics.span('telegram.subscribe')
+    async def اشتراك(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """معالج أمر /subscribe — وكالات مفصولة بفواصل، والمسبوقة بـ - تُستبعد"""
+        العناصر = [e.strip() for e in ' '.join(context.args).split(',') if e.strip()]
+        السماح = [e for e in العناصر if not e.startswith('-')]
+        الاستبعاد = [e[1:].strip() for e in العناصر if e.startswith('-') and e[1:].strip()]
+        self.المشتركون.subscribe(update.effective_chat.id, السماح, الاستبعاد)
+        رسالة = "🔔 تم الاشتراك في تنبيهات مواعيد minha"
+        if السماح:
+            رسالة += "\nالوكالات: " + "، ".join(السماح)
+        if الاستبعاد:
+            رسالة += "\nمستبعد: " + "، ".join(الاستبعاد)
+        await update.message.reply_text(رسالة)
+
+    @metrics.span('telegram.unsubscribe')
+    async def إلغاء_الاشتراك(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """معالج أمر /unsubscribe"""
+        if self.المشتركون.unsubscribe(update.effective_chat.id):
+            await update.message.reply_text("🔕 تم إلغاء الاشتراك")
+        else:
+            await update.message.reply_text("لست مشتركاً في التنبيهات")
+
+    @metrics.span('telegram.message')
     async def معالجة_الرسالة(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """معالجة الرسائل العادية"""
-        نص_الرسالة = update.message.text.lower()
         user = update.effective_user
         
-        # ردود ذكية بسيطة
-        if any(كلمة in نص_الرسالة for كلمة in ['مرحبا', 'اهلا', 'السلام']):
-            await update.message.reply_text(f"مرحباً {user.first_name}! 😊")
-        elif any(كلمة in نص_الرسالة for كلمة in ['شكرا', 'مشكور']):
-            await update.message.reply_text("العفو! 💙")
-        elif 'طقس' in نص_الرسالة:
-            await update.message.reply_text("استخدم /weather متبوعاً باسم المدينة 🌤️")
-        else:
-            await update.message.reply_text("💡 جرب /help لرؤية جميع الأوامر المتاحة")
+        # ردود ذكية بسيطة عبر جدول النوايا (intent_router.py)
+        await update.message.reply_text(self.موجه_النوايا.reply(update.message.text, name=user.first_name))
     
-    def الحصول_على_الطقس(self, المدينة):
-        """دالة مساعدة لجلب الطقس"""
+    async def الحصول_على_الطقس(self, المدينة):
+        """دالة مساعدة لجلب الطقس (من الكاش إن وُجد، والطلبات المتزامنة لنفس المدينة تتشارك طلباً واحداً)"""
+        المفتاح = ' '.join(المدينة.split()).casefold()
+        try:
+            return await self.كاش_الطقس.get_or_fetch(المفتاح, lambda: self.جلب_الطقس(المدينة))
+        except Exception:
+            return None
+
+    @metrics.span('telegram.weather_upstream')
+    async def جلب_الطقس(self, المدينة):
+        """طلب OpenWeather فعلي عبر العميل المشترك"""
         try:
             # استخدام API مجانية للطقس
-            response = requests.get(
-                f"http://api.openweathermap.org/data/2.5/weather",
+            # WEATHER_API_BASE: عنوان بديل (مثلاً الخادم المحلي في bench_suite.py)
+            response = await self.http.get(
+                os.getenv('WEATHER_API_BASE', 'http://api.openweathermap.org/data/2.5').rstrip('/') + '/weather',
                 params={
                     'q': المدينة,
                     'appid': os.getenv('WEATHER_API_KEY'),
                     'units': 'metric',
                     'lang': 'ar'
                 },
-                timeout=5
             )
-            
+
+            metrics.inc('bots_upstream_requests_total', target='openweather', status=str(response.status_code))
             if response.status_code == 200:
                 data = response.json()
                 return {
@@ -123,24 +204,43 @@ class بوت_تليجرام_المتقدم:
                     'الرطوبة': f"{data['main']['humidity']}%",
                     'سرعة_الرياح': f"{data['wind']['speed']} m/s"
                 }
-        except:
+        except httpx.HTTPError:
+            metrics.inc('bots_upstream_requests_total', target='openweather', status='error')
+        except (KeyError, ValueError):
             pass
         return None
     
     def الحصول_على_اقتباس(self):
-        """دالة مساعدة لجلب الاقتباس"""
-        try:
-            response = requests.get("https://api.quotable.io/random", timeout=5)
-            data = response.json()
-            return f"\"{data['content']}\" - {data['author']}"
-        except:
-            return "الحياة رحلة، استمتع بكل لحظة فيها. 🌟"
+        """دالة مساعدة لجلب الاقتباس (من المخزن في الذاكرة دون انتظار الشبكة)"""
+        return self.اقتباسات.take()
     
     def تشغيل(self):
-        """تشغيل البوت"""
+        """تشغيل البوت (BOT_MODE=polling افتراضياً، أو webhook)"""
         print("🤖 بدأ تشغيل بوت تليجرام...")
-        self.application.run_polling()
+        # METRICS_PORT=9110 -> زمن كل معالج وعدادات الكاش والطلبات الخارجية على /metrics
+        metrics.serve_from_env()
+        if os.getenv('BOT_MODE', 'polling') == 'webhook':
+            self.تشغيل_webhook()
+        else:
+            self.application.run_polling()
+
+    def تشغيل_webhook(self):
+        """
+        استقبال التحديثات عبر خادم HTTP محلي غير متزامن بدل الاستطلاع.
+        المتغيرات: WEBHOOK_URL (العنوان العام)، WEBHOOK_LISTEN، WEBHOOK_PORT، WEBHOOK_PATH، WEBHOOK_SECRET
+        عند الإيقاف (Ctrl+C / SIGTERM) تُكمل التحديثات الجارية ثم تُغلق الاتصالات.
+        """
+        self.application.run_webhook(
+            listen=os.getenv('WEBHOOK_LISTEN', '127.0.0.1'),
+            port=int(os.getenv('WEBHOOK_PORT', '8443')),
+            url_path=os.getenv('WEBHOOK_PATH', 'telegram'),
+            webhook_url=os.getenv('WEBHOOK_URL') or None,
+            secret_token=os.getenv('WEBHOOK_SECRET') or None,
+        )
 
 # ملف .env يجب أن يحتوي:
 # TELEGRAM_BOT_TOKEN=your_bot_token_here
-# WEATHER_API_KEY=your_weather_api_key_here
\ No newline at end of file
+# WEATHER_API_KEY=your_weather_api_key_here
+
+if __name__ == '__main__':
+    بوت_تليجرام_المتقدم().تشغيل()
@@ -0,0 +1,93 @@
+"""
+text_match.py
+
+أدوات مطابقة نصوص مشتركة:
+- normalize_arabic: توحيد الكتابة العربية (الهمزات وأشكال الألف، التاء المربوطة، الألف المقصورة،
+  التطويل، التشكيل) مع تخزين مؤقت للنتائج
+- AhoCorasick: آلة بحث متعددة الأنماط تمر على النص مرة واحدة مهما كان عدد الكلمات
+"""
+
+import re
+import unicodedata
+from collections import deque
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Tuple
+
+# التشكيل وعلامات القرآن والألف الخنجرية
+_DIACRITICS = re.compile(r"[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+_TATWEEL = "\u0640"
+_ARABIC_MAP = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و",
+    "ة": "ه",
+})
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_char_text(text: str) -> str:
+    """توحيد حرفاً بحرف (الطول لا يتغير إلا بحذف التشكيل والتطويل)."""
+    text = _DIACRITICS.sub("", text.replace(_TATWEEL, ""))
+    return text.casefold().translate(_ARABIC_MAP)
+
+
+@lru_cache(maxsize=4096)
+def normalize_arabic(text: str) -> str:
+    """توحيد النص للمطابقة: NFKC، حروف صغيرة، أشكال عربية موحدة، ومسافات مفردة."""
+    text = unicodedata.normalize("NFKC", text)
+    return _SPACES.sub(" ", normalize_char_text(text)).strip()
+
+
+class AhoCorasick:
+    """
+    آلة Aho-Corasick: تُبنى مرة من (نمط، قيمة) ثم تجد كل الأنماط في النص بمرور خطي واحد.
+    النصوص والأنماط يجب أن تكون موحدة مسبقاً بنفس الطريقة.
+    """
+
+    def __init__(self, patterns: List[Tuple[str, Any]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # لكل حالة: قائمة (طول النمط، القيمة) للأنماط التي تنتهي فيها (بعد دمج روابط الفشل)
+        self._out: List[List[Tuple[int, Any]]] = [[]]
+        for pattern, value in patterns:
+            self._add(pattern, value)
+        self._build()
+
+    def _add(self, pattern: str, value: Any):
+        if not pattern:
+            return
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """يعيد (بداية، نهاية، القيمة) لكل تطابق في النص."""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                for length, value in out[state]:
+                    yield i - length + 1, i + 1, value
@@ -0,0 +1,52 @@
+"""
+update_processor.py
+
+معالجة تحديثات تليجرام بالتوازي مع الحفاظ على ترتيب رسائل كل محادثة:
+- حتى max_concurrent_updates تحديثاً تُعالج في نفس الوقت (BaseUpdateProcessor)
+- تحديثات نفس المحادثة تمر عبر قفل خاص بها (asyncio.Lock عادل FIFO) يُؤخذ قبل مكان التوازي،
+  فلا يسبق ردُّ رسالةٍ ردَّ رسالةٍ أُرسلت قبلها في نفس المحادثة، ومحادثة كثيرة الرسائل
+  لا تحجز إلا مكاناً واحداً وتبقى الأماكن الأخرى لباقي المحادثات
+- الأقفال تُحذف عند انتهاء آخر تحديث للمحادثة حتى لا تكبر الذاكرة مع عدد المستخدمين
+"""
+
+import asyncio
+from typing import Any, Awaitable, Dict
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    def __init__(self, max_concurrent_updates: int = 32):
+        super().__init__(max_concurrent_updates)
+        # chat_id -> [القفل، عدد التحديثات التي تنتظره أو تحمله]
+        self._chats: Dict[int, list] = {}
+
+    async def process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        # الأصل يأخذ الـ semaphore ثم يستدعي do_process_update؛ هنا قفل المحادثة أولاً:
+        # التحديثات المنتظرة خلف رسالة من نفس المحادثة لا تحجز أماكن، وsemaphore في 3.9
+        # لا يضمن ترتيب الانتظار فلا يُعتمد عليه لترتيب المحادثة (@final في PTB للتوثيق فقط)
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await super().process_update(update, coroutine)
+            return
+        entry = self._chats.get(chat.id)
+        if entry is None:
+            entry = self._chats[chat.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await super().process_update(update, coroutine)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._chats[chat.id]
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        await coroutine
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+weather_collector.py
+
+جمع الطقس لمئات المدن دفعة واحدة وتخزين التاريخ بشكل عمودي:
+- طلبات متوازية محدودة (WEATHER_CONCURRENCY، افتراضياً 20) عبر عميل httpx واحد مشترك
+- المدن المعطاة برقم OpenWeather (id:2643743) تُجمع في طلبات group (حتى 20 مدينة للطلب)،
+  والمدن بالاسم تُطلب فردياً
+- المخزن عمودي: عمود array.array لكل حقل في ملف ثنائي مستقل (weather_store/<عمود>.bin)،
+  والإلحاق يكتب القيم الجديدة في آخر كل ملف دون إعادة كتابة التاريخ
+- استيراد/تصدير CSV بنفس أعمدة weather_data.csv (city,temp,description,humidity,wind_speed)
+- إحصاءات لكل مدينة (min/max/mean) ومتوسط متحرك زمني، بـ numpy إن كانت مثبتة وإلا بايثون فقط
+
+تشغيل:
+    python .\\weather_collector.py collect --cities cities.txt     # سطر لكل مدينة أو id:رقم
+    python .\\weather_collector.py import weather_data.csv
+    python .\\weather_collector.py export out.csv
+    python .\\weather_collector.py stats --column temp
+    python .\\weather_collector.py rolling --city Cairo --hours 24
+
+متغيرات البيئة: WEATHER_API_KEY، WEATHER_API_BASE، WEATHER_STORE، WEATHER_CONCURRENCY
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import asyncio
+import argparse
+from array import array
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+WEATHER_API_BASE = os.getenv("WEATHER_API_BASE", "http://api.openweathermap.org/data/2.5").rstrip("/")
+WEATHER_STORE = os.getenv("WEATHER_STORE", "weather_store")
+GROUP_SIZE = 20
+
+# اسم العمود -> نوع array
+COLUMNS = {"ts": "d", "city": "I", "temp": "d", "humidity": "d", "wind_speed": "d", "description": "I"}
+NUMERIC = ("temp", "humidity", "wind_speed")
+CSV_FIELDS = ["city", "temp", "description", "humidity", "wind_speed"]
+
+
+class WeatherStore:
+    """
+    جدول عمودي بإلحاق فقط. المدن والأوصاف نصوص مكررة فتُخزن كأرقام في قاموس (cities.json،
+    descriptions.json) والعمود يحمل الفهرس فقط.
+    """
+
+    def __init__(self, directory: str = WEATHER_STORE):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.columns: Dict[str, array] = {name: array(code) for name, code in COLUMNS.items()}
+        self.cities: List[str] = self._load_dict("cities")
+        self.descriptions: List[str] = self._load_dict("descriptions")
+        self._city_ids = {c: i for i, c in enumerate(self.cities)}
+        self._desc_ids = {d: i for i, d in enumerate(self.descriptions)}
+        self._load()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _load_dict(self, name: str) -> List[str]:
+        try:
+            with open(self._path(name + ".json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save_dict(self, name: str, values: List[str]):
+        tmp = self._path(name + ".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(values, f, ensure_ascii=False)
+        os.replace(tmp, self._path(name + ".json"))
+
+    def _load(self):
+        for name, col in self.columns.items():
+            path = self._path(name + ".bin")
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    col.frombytes(f.read())
+        # كتابة مقطوعة قد تترك عموداً أطول من غيره: نعتمد أقصر طول
+        rows = min(len(c) for c in self.columns.values())
+        for name, col in self.columns.items():
+            if len(col) > rows:
+                del col[rows:]
+                with open(self._path(name + ".bin"), "wb") as f:
+                    col.tofile(f)
+
+    def __len__(self):
+        return len(self.columns["ts"])
+
+    def _intern(self, value: str, values: List[str], ids: Dict[str, int]) -> int:
+        idx = ids.get(value)
+        if idx is None:
+            idx = ids[value] = len(values)
+            values.append(value)
+        return idx
+
+    def append(self, rows: List[dict], ts: float = None):
+        """rows: قواميس بمفاتيح CSV_FIELDS (و ts اختيارياً)."""
+        if not rows:
+            return
+        ts = ts or time.time()
+        n_cities, n_desc = len(self.cities), len(self.descriptions)
+        new = {name: array(code) for name, code in COLUMNS.items()}
+        for row in rows:
+            new["ts"].append(float(row.get("ts") or ts))
+            new["city"].append(self._intern(row["city"], self.cities, self._city_ids))
+            new["description"].append(self._intern(row.get("description") or "", self.descriptions, self._desc_ids))
+            for name in NUMERIC:
+                value = row.get(name)
+                new[name].append(float(value) if value not in (None, "") else float("nan"))
+        if len(self.cities) != n_cities:
+            self._save_dict("cities", self.cities)
+        if len(self.descriptions) != n_desc:
+            self._save_dict("descriptions", self.descriptions)
+        for name, values in new.items():
+            with open(self._path(name + ".bin"), "ab") as f:
+                values.tofile(f)
+            self.columns[name].extend(values)
+
+    def rows(self):
+        c = self.columns
+        for i in range(len(self)):
+            yield {"ts": c["ts"][i], "city": self.cities[c["city"][i]], "temp": c["temp"][i],
+                   "description": self.descriptions[c["description"][i]],
+                   "humidity": c["humidity"][i], "wind_speed": c["wind_speed"][i]}
+
+    # ---------- CSV ----------
+
+    def import_csv(self, path: str, ts: float = None) -> int:
+        """weather_data.csv بلا عمود وقت: نستخدم ts أو وقت تعديل الملف."""
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        self.append(rows, ts or os.path.getmtime(path))
+        return len(rows)
+
+    def export_csv(self, path: str, with_ts: bool = False):
+        fields = CSV_FIELDS + (["timestamp"] if with_ts else [])
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(fields)
+            for row in self.rows():
+                line = [row["city"], _fmt(row["temp"]), row["description"], _fmt(row["humidity"]),
+                        _fmt(row["wind_speed"])]
+                if with_ts:
+                    line.append(datetime.fromtimestamp(row["ts"]).isoformat(timespec="seconds"))
+                writer.writerow(line)
+
+    # ---------- التجميع ----------
+
+    def city_stats(self, column: str = "temp") -> Dict[str, dict]:
+        """min/max/mean/count لكل مدينة على كامل التاريخ (القيم المفقودة NaN تُستبعد)."""
+        if np is not None:
+            result = _city_stats_numpy(self.columns["city"], self.columns[column], len(self.cities))
+        else:
+            result = _city_stats_python(self.columns["city"], self.columns[column], len(self.cities))
+        return {self.cities[i]: stats for i, stats in result.items()}
+
+    def rolling_mean(self, city: str, column: str = "temp", window: float = 24 * 3600) -> List[Tuple[float, float]]:
+        """(الوقت، متوسط القيم خلال window ثانية السابقة) لكل قراءة لهذه المدينة."""
+        idx = self._city_ids.get(city)
+        if idx is None:
+            return []
+        if np is not None:
+            cities = np.frombuffer(self.columns["city"], dtype=np.uint32)
+            mask = cities == idx
+            ts = np.frombuffer(self.columns["ts"], dtype=np.float64)[mask]
+            values = np.frombuffer(self.columns[column], dtype=np.float64)[mask]
+            return _rolling_numpy(ts, values, window)
+        pairs = [(t, v) for t, c, v in zip(self.columns["ts"], self.columns["city"], self.columns[column]) if c == idx]
+        return _rolling_python(pairs, window)
+
+
+def _fmt(value: float) -> str:
+    return "" if value != value else f"{value:g}"
+
+
+def _city_stats_numpy(cities, values, n_cities: int) -> Dict[int, dict]:
+    cities = np.frombuffer(cities, dtype=np.uint32)
+    values = np.frombuffer(values, dtype=np.float64)
+    ok = ~np.isnan(values)
+    cities, values = cities[ok], values[ok]
+    counts = np.bincount(cities, minlength=n_cities)
+    sums = np.bincount(cities, weights=values, minlength=n_cities)
+    mins = np.full(n_cities, np.inf)
+    maxs = np.full(n_cities, -np.inf)
+    np.minimum.at(mins, cities, values)
+    np.maximum.at(maxs, cities, values)
+    return {i: {"min": float(mins[i]), "max": float(maxs[i]), "mean": float(sums[i] / counts[i]),
+                "count": int(counts[i])} for i in np.nonzero(counts)[0]}
+
+
+def _city_stats_python(cities, values, n_cities: int) -> Dict[int, dict]:
+    acc: Dict[int, list] = {}
+    for c, v in zip(cities, values):
+        if v != v:
+            continue
+        a = acc.get(c)
+        if a is None:
+            acc[c] = [v, v, v, 1]
+        else:
+            if v < a[0]:
+                a[0] = v
+            if v > a[1]:
+                a[1] = v
+            a[2] += v
+            a[3] += 1
+    return {c: {"min": a[0], "max": a[1], "mean": a[2] / a[3], "count": a[3]} for c, a in acc.items()}
+
+
+def _rolling_numpy(ts, values, window: float) -> List[Tuple[float, float]]:
+    order = np.argsort(ts, kind="stable")
+    ts, values = ts[order], values[order]
+    ok = ~np.isnan(values)
+    csum = np.concatenate(([0.0], np.cumsum(np.where(ok, values, 0.0))))
+    ccount = np.concatenate(([0], np.cumsum(ok)))
+    start = np.searchsorted(ts, ts - window, side="right")
+    end = np.arange(1, len(ts) + 1)
+    counts = ccount[end] - ccount[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = (csum[end] - csum[start]) / counts
+    return list(zip(ts.tolist(), means.tolist()))
+
+
+def _rolling_python(pairs, window: float) -> List[Tuple[float, float]]:
+    pairs.sort(key=lambda p: p[0])
+    out = []
+    total, count, start = 0.0, 0, 0
+    for t, v in pairs:
+        if v == v:
+            total += v
+            count += 1
+        while pairs[start][0] <= t - window:
+            old = pairs[start][1]
+            if old == old:
+                total -= old
+                count -= 1
+            start += 1
+        out.append((t, total / count if count else float("nan")))
+    return out
+
+
+# ---------- الجلب ----------
+
+def parse_city(spec: str):
+    """'id:2643743' -> 2643743، وإلا الاسم كما هو."""
+    spec = spec.strip()
+    if spec.startswith("id:") and spec[3:].isdigit():
+        return int(spec[3:])
+    return spec
+
+
+def _row(data: dict) -> dict:
+    return {"city": data["name"], "temp": data["main"]["temp"],
+            "description": data["weather"][0]["description"],
+            "humidity": data["main"]["humidity"], "wind_speed": data["wind"]["speed"],
+            "ts": data.get("dt")}
+
+
+class WeatherCollector:
+    def __init__(self, api_key: str = None, concurrency: int = None, api_base: str = WEATHER_API_BASE,
+                 timeout: float = 10.0, max_retries: int = 3):
+        self.api_key = api_key or os.getenv("WEATHER_API_KEY")
+        self.concurrency = concurrency or int(os.getenv("WEATHER_CONCURRENCY", "20"))
+        self.api_base = api_base
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.errors: List[str] = []
+
+    async def _get(self, http, sem: asyncio.Semaphore, path: str, params: dict) -> Optional[dict]:
+        import httpx
+        params = dict(params, appid=self.api_key, units="metric", lang="ar")
+        delay = 1.0
+        for _ in range(self.max_retries):
+            async with sem:
+                try:
+                    response = await http.get(f"{self.api_base}/{path}", params=params)
+                except httpx.HTTPError:
+                    response = None
+            if response is not None:
+                if response.status_code == 200:
+                    return response.json()
+                if response.status_code not in (429,) and response.status_code < 500:
+                    self.errors.append(f"{path} {params.get('q') or params.get('id')}: {response.status_code}")
+                    return None
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay *= 2
+        self.errors.append(f"{path} {params.get('q') or params.get('id')}: فشل بعد {self.max_retries} محاولات")
+        return None
+
+    async def _by_name(self, http, sem, name: str) -> List[dict]:
+        data = await self._get(http, sem, "weather", {"q": name})
+        return [_row(data)] if data else []
+
+    async def _group(self, http, sem, ids: List[int]) -> List[dict]:
+        data = await self._get(http, sem, "group", {"id": ",".join(map(str, ids))})
+        return [_row(item) for item in (data or {}).get("list", [])]
+
+    async def collect(self, cities: List) -> List[dict]:
+        import httpx
+        ids = [c for c in cities if isinstance(c, int)]
+        names = [c for c in cities if not isinstance(c, int)]
+        sem = asyncio.Semaphore(self.concurrency)
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(timeout=httpx.Timeout(self.timeout), limits=limits) as http:
+            tasks = [self._group(http, sem, ids[i:i + GROUP_SIZE]) for i in range(0, len(ids), GROUP_SIZE)]
+            tasks += [self._by_name(http, sem, name) for name in names]
+            batches = await asyncio.gather(*tasks)
+        return [row for batch in batches for row in batch]
+
+
+def load_cities(path: str) -> List:
+    with open(path, encoding="utf-8") as f:
+        return [parse_city(line) for line in f if line.strip() and not line.lstrip().startswith("#")]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="جمع الطقس وتخزينه بشكل عمودي")
+    parser.add_argument("--store", default=WEATHER_STORE)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("collect")
+    p.add_argument("--cities", required=True, help="ملف: سطر لكل مدينة أو id:رقم")
+    p = sub.add_parser("import")
+    p.add_argument("csv")
+    p = sub.add_parser("export")
+    p.add_argument("csv")
+    p.add_argument("--with-ts", action="store_true")
+    p = sub.add_parser("stats")
+    p.add_argument("--column", default="temp", choices=NUMERIC)
+    p = sub.add_parser("rolling")
+    p.add_argument("--city", required=True)
+    p.add_argument("--column", default="temp", choices=NUMERIC)
+    p.add_argument("--hours", type=float, default=24)
+    args = parser.parse_args(argv)
+
+    store = WeatherStore(args.store)
+    if args.command == "collect":
+        from dotenv import load_dotenv
+        load_dotenv()
+        cities = load_cities(args.cities)
+        collector = WeatherCollector()
+        start = time.perf_counter()
+        rows = asyncio.run(collector.collect(cities))
+        store.append(rows)
+        print(f"✓ {len(rows)}/{len(cities)} مدينة خلال {time.perf_counter() - start:.2f} ث "
+              f"(المجموع في المخزن {len(store)} قراءة)")
+        for err in collector.errors[:10]:
+            print("  ⚠️", err)
+    elif args.command == "import":
+        print(f"✓ استيراد {store.import_csv(args.csv)} صف")
+    elif args.command == "export":
+        store.export_csv(args.csv, args.with_ts)
+        print(f"✓ تصدير {len(store)} صف إلى {args.csv}")
+    elif args.command == "stats":
+        for city, s in sorted(store.city_stats(args.column).items()):
+            print(f"{city:20} min {s['min']:7.2f}  max {s['max']:7.2f}  mean {s['mean']:7.2f}  n={s['count']}")
+    elif args.command == "rolling":
+        for t, mean in store.rolling_mean(args.city, args.column, args.hours * 3600):
+            print(f"{datetime.fromtimestamp(t).isoformat(timespec='seconds')}  {mean:.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
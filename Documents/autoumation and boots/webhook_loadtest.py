@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+webhook_loadtest.py
+
+اختبار حمل لوضع webhook في tepm.py بدون إنترنت:
+- خادم محلي يقوم مقام Telegram Bot API (getMe، setWebhook، sendMessage ...) مع تأخير اختياري
+- تشغيل البوت الحقيقي في عملية منفصلة بوضع webhook موجّهاً إلى هذا الخادم
+- إرسال تحديثات نصية من عدة محادثات (كل محادثة ترسل رسائلها بالتتابع كما يفعل تليجرام)
+- قياس عدد التحديثات في الثانية وزمن الرد (p50/p99) من لحظة إرسال التحديث حتى وصول sendMessage،
+  والتحقق من أن ردود كل محادثة وصلت بنفس ترتيب رسائلها
+
+تشغيل:
+    python .\\webhook_loadtest.py --updates 2000 --chats 200 --api-latency 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from collections import defaultdict, deque
+
+import httpx
+
+from local_server import Request, json_response, server_port, start
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SECRET = "loadtest-secret"
+
+
+class FakeBotAPI:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.webhook_set = asyncio.Event()
+        # chat_id -> (رقم التسلسل، وقت الإرسال) بانتظار الرد
+        self.pending = defaultdict(deque)
+        self.latencies = []
+        self.out_of_order = 0
+        self.all_replied = asyncio.Event()
+        self.expected = 0
+        self.message_id = 0
+
+    async def handle(self, req: Request):
+        method = req.path.rsplit("/", 1)[-1]
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method == "getMe":
+            return json_response({"ok": True, "result": {
+                "id": 1, "is_bot": True, "first_name": "Stub", "username": "stub_bot"}})
+        if method == "setWebhook":
+            self.webhook_set.set()
+            return json_response({"ok": True, "result": True})
+        if method == "sendMessage":
+            data = req.form()
+            chat_id = int(data["chat_id"])
+            self._reply_arrived(chat_id, data.get("text", ""))
+            self.message_id += 1
+            return json_response({"ok": True, "result": {
+                "message_id": self.message_id, "date": int(time.time()),
+                "chat": {"id": chat_id, "type": "private"}, "text": data.get("text", "")}})
+        return json_response({"ok": True, "result": True})
+
+    def _reply_arrived(self, chat_id: int, text: str):
+        queue = self.pending[chat_id]
+        if not queue:
+            return
+        seq, sent_at = queue.popleft()
+        self.latencies.append(time.perf_counter() - sent_at)
+        # الرد على التحية يحتوي الاسم الأول، ونضع فيه رقم التسلسل
+        if f"#{seq}!" not in text:
+            self.out_of_order += 1
+        if len(self.latencies) >= self.expected:
+            self.all_replied.set()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _update(update_id: int, chat_id: int, seq: int) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"#{seq}"}
+    return {"update_id": update_id, "message": {
+        "message_id": update_id, "date": int(time.time()), "text": "مرحبا",
+        "chat": {"id": chat_id, "type": "private"}, "from": user}}
+
+
+async def _wait_listening(port: int, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError("خادم webhook لم يبدأ")
+
+
+def _percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))] if ordered else 0.0
+
+
+async def run(updates: int, chats: int, concurrency: int, api_latency: float, workers: int) -> dict:
+    api = FakeBotAPI(api_latency)
+    api.expected = updates
+    server = await start(api.handle)
+    webhook_port = _free_port()
+    env = dict(os.environ,
+               TELEGRAM_BOT_TOKEN="123456:LOADTEST",
+               TELEGRAM_API_BASE=f"http://127.0.0.1:{server_port(server)}",
+               BOT_MODE="webhook",
+               WEBHOOK_LISTEN="127.0.0.1",
+               WEBHOOK_PORT=str(webhook_port),
+               WEBHOOK_PATH="hook",
+               WEBHOOK_URL=f"http://127.0.0.1:{webhook_port}/hook",
+               WEBHOOK_SECRET=SECRET,
+               MAX_CONCURRENT_UPDATES=str(workers),
+               QUOTES_FILE=os.path.join(tempfile.gettempdir(), "loadtest_quotes.json"))
+    proc = subprocess.Popen([sys.executable, os.path.join(HERE, "tepm.py")], cwd=HERE, env=env)
+    try:
+        await asyncio.wait_for(api.webhook_set.wait(), 60)
+        await _wait_listening(webhook_port, 30)
+        url = f"http://127.0.0.1:{webhook_port}/hook"
+        headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+        per_chat = defaultdict(list)
+        for i in range(updates):
+            per_chat[1000 + i % chats].append(i)
+        sem = asyncio.Semaphore(concurrency)
+
+        async with httpx.AsyncClient(limits=httpx.Limits(max_connections=concurrency)) as client:
+            async def chat_sender(chat_id, seqs):
+                for seq in seqs:
+                    async with sem:
+                        api.pending[chat_id].append((seq, time.perf_counter()))
+                        await client.post(url, json=_update(seq + 1, chat_id, seq), headers=headers)
+
+            start_t = time.perf_counter()
+            await asyncio.gather(*(chat_sender(c, s) for c, s in per_chat.items()))
+            try:
+                await asyncio.wait_for(api.all_replied.wait(), 120)
+            except asyncio.TimeoutError:
+                print("⚠️ لم تصل كل الردود خلال المهلة")
+            elapsed = time.perf_counter() - start_t
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        server.close()
+
+    lat = api.latencies
+    return {
+        "updates": updates, "chats": chats, "workers": workers, "api_latency": api_latency,
+        "replied": len(lat), "seconds": round(elapsed, 3),
+        "updates_per_second": round(len(lat) / elapsed, 1) if elapsed else 0,
+        "p50_ms": round(_percentile(lat, 0.50) * 1000, 1),
+        "p99_ms": round(_percentile(lat, 0.99) * 1000, 1),
+        "out_of_order": api.out_of_order,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="اختبار حمل وضع webhook")
+    parser.add_argument("--updates", type=int, default=1000)
+    parser.add_argument("--chats", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=64, help="طلبات webhook المتزامنة من المرسل")
+    parser.add_argument("--workers", type=int, default=32, help="MAX_CONCURRENT_UPDATES للبوت")
+    parser.add_argument("--api-latency", type=float, default=0.05, help="تأخير Bot API المحاكى بالثواني")
+    args = parser.parse_args(argv)
+    result = asyncio.run(run(args.updates, args.chats, args.concurrency, args.api_latency, args.workers))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,46 +1,352 @@
-import requests
-from bs4 import BeautifulSoup
+#!/usr/bin/env python3
+"""
+wiki_headlines.py
+
+استخراج عناوين من صفحة HTML بمحدد CSS بسيط (مثل "#mp-upper ul li a") دون بناء شجرة كاملة:
+- محلل تدفقي يُغذّى بأجزاء الصفحة أثناء تنزيلها ويتوقف (ويوقف التنزيل) فور جمع العدد المطلوب
+- يستخدم lxml (HTMLPullParser) إن كانت مثبتة، وإلا html.parser المدمج
+- المحدد يدعم: وسم، #id، .class وتركيبها، مع علاقة السلالة (المسافة) فقط
+
+كمكتبة:
+    from wiki_headlines import extract_headlines, fetch_headlines
+    fetch_headlines("https://en.wikipedia.org/wiki/Main_Page", "#mp-upper ul li a", limit=5)
+
+كبرنامج (يحفظ wiki_headlines.json كما في السابق، ويلحق الجديد في headline_store):
+    python .\\wiki_headlines.py
+قياس الأداء مقارنة بـ BeautifulSoup:
+    python .\\wiki_headlines.py --bench [ملف.html]
+"""
+
+import re
+import sys
 import json
+import time
+import argparse
 from datetime import datetime
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple
 
 try:
-    # نضيف هوية المتصفح لتجنب رفض الطلب
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                      "AppleWebKit/537.36 (KHTML, like Gecko) "
-                      "Chrome/118.0.0.0 Safari/537.36"
-    }
+    from lxml import etree
+except ImportError:
+    etree = None
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                  "AppleWebKit/537.36 (KHTML, like Gecko) "
+                  "Chrome/118.0.0.0 Safari/537.36"
+}
+WIKI_URL = "https://en.wikipedia.org/wiki/Main_Page"
+WIKI_SELECTOR = "#mp-upper ul li a"
+
+# وسوم بلا إغلاق لا تدخل في مكدس العناصر المفتوحة
+VOID = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+        "param", "source", "track", "wbr"}
+# وسوم يغلقها ضمنياً بدء وسم مماثل داخل نفس الحاوية
+IMPLIED = {"li": {"ul", "ol"}, "p": {"div", "body"}, "option": {"select"},
+           "tr": {"table", "tbody"}, "td": {"tr"}, "th": {"tr"}, "dt": {"dl"}, "dd": {"dl"}}
+
+_PART = re.compile(r"([a-zA-Z][a-zA-Z0-9]*)|#([\w-]+)|\.([\w-]+)")
+
+
+class _Compound:
+    __slots__ = ("tag", "id", "classes")
+
+    def __init__(self, text: str):
+        self.tag, self.id, self.classes = None, None, set()
+        pos = 0
+        for m in _PART.finditer(text):
+            if m.start() != pos:
+                raise ValueError(f"محدد غير مدعوم: {text}")
+            pos = m.end()
+            if m.group(1):
+                self.tag = m.group(1).lower()
+            elif m.group(2):
+                self.id = m.group(2)
+            else:
+                self.classes.add(m.group(3))
+        if pos != len(text):
+            raise ValueError(f"محدد غير مدعوم: {text}")
+
+    def matches(self, tag: str, el_id: Optional[str], classes: Iterable[str]) -> bool:
+        if self.tag and self.tag != tag:
+            return False
+        if self.id and self.id != el_id:
+            return False
+        return not self.classes or self.classes.issubset(classes)
+
+
+class Selector:
+    """محدد سلالة بسيط: "A B C" يعني C داخل B داخل A."""
+
+    def __init__(self, css: str):
+        self.parts = [_Compound(p) for p in css.split()]
+
+    def matches(self, stack: List[Tuple[str, Optional[str], frozenset]]) -> bool:
+        """stack: العناصر المفتوحة من الجذر حتى العنصر الحالي (آخرها هو المرشح)."""
+        tag, el_id, classes = stack[-1]
+        if not self.parts[-1].matches(tag, el_id, classes):
+            return False
+        i = len(self.parts) - 2
+        for tag, el_id, classes in reversed(stack[:-1]):
+            if i < 0:
+                break
+            if self.parts[i].matches(tag, el_id, classes):
+                i -= 1
+        return i < 0
+
+
+def _element_key(tag: str, attrs) -> Tuple[str, Optional[str], frozenset]:
+    attrs = dict(attrs)
+    return tag, attrs.get("id"), frozenset((attrs.get("class") or "").split())
+
+
+class _Done(Exception):
+    pass
+
+
+class _StdlibExtractor(HTMLParser):
+    def __init__(self, selector: Selector, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.selector = selector
+        self.limit = limit
+        self.stack = []
+        self.results: List[str] = []
+        self._capture_depth = None
+        self._pieces: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID:
+            return
+        containers = IMPLIED.get(tag)
+        if containers:
+            # <li> جديد يغلق <li> السابق في نفس القائمة
+            for i in range(len(self.stack) - 1, -1, -1):
+                t = self.stack[i][0]
+                if t == tag:
+                    self._pop_to(i)
+                    break
+                if t in containers:
+                    break
+        self.stack.append(_element_key(tag, attrs))
+        if self._capture_depth is None and self.selector.matches(self.stack):
+            self._capture_depth = len(self.stack)
+            self._pieces = []
+
+    def handle_endtag(self, tag):
+        for i in range(len(self.stack) - 1, -1, -1):
+            if self.stack[i][0] == tag:
+                self._pop_to(i)
+                return
+
+    def _pop_to(self, index: int):
+        if self._capture_depth is not None and index < self._capture_depth:
+            # مثل BeautifulSoup get_text(strip=True): تقليم كل قطعة ودمجها
+            text = "".join(self._pieces)
+            self._capture_depth = None
+            # العناصر الفارغة (صورة فقط مثلاً) لا تُحتسب ضمن الحد
+            if text:
+                self.results.append(text)
+                if len(self.results) >= self.limit:
+                    raise _Done
+        del self.stack[index:]
 
-    url = "https://en.wikipedia.org/wiki/Main_Page"
-    response = requests.get(url, headers=headers, timeout=10)
+    def handle_data(self, data):
+        if self._capture_depth is not None:
+            data = data.strip()
+            if data:
+                self._pieces.append(data)
 
-    if response.status_code != 200:
-        print(f"❌ Error: Failed to fetch page (status code {response.status_code})")
-        exit()
 
-    # تحليل الصفحة
-    soup = BeautifulSoup(response.text, "html.parser")
+class _LxmlExtractor:
+    def __init__(self, selector: Selector, limit: int):
+        self.selector = selector
+        self.limit = limit
+        self.stack = []
+        self.results: List[str] = []
+        self._capture_depth = None
+        self.parser = etree.HTMLPullParser(events=("start", "end"))
 
-    # استخراج أول 5 عناوين من الصفحة الرئيسية
-    headlines = [a.get_text(strip=True) for a in soup.select("#mp-upper ul li a")[:5]]
+    def feed(self, chunk: str):
+        self.parser.feed(chunk)
+        for event, el in self.parser.read_events():
+            if not isinstance(el.tag, str):
+                continue
+            if event == "start":
+                self.stack.append(_element_key(el.tag, el.attrib.items()))
+                if self._capture_depth is None and self.selector.matches(self.stack):
+                    self._capture_depth = len(self.stack)
+                continue
+            depth = len(self.stack)
+            self.stack.pop()
+            if depth == self._capture_depth:
+                self._capture_depth = None
+                text = "".join(t.strip() for t in el.itertext())
+                if text:
+                    self.results.append(text)
+                    if len(self.results) >= self.limit:
+                        raise _Done
+            if self._capture_depth is None:
+                # العناصر المكتملة خارج أي تطابق لا نحتاجها: تحرير الذاكرة أثناء التدفق
+                el.clear()
+
+    def close(self):
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            pass
+
+
+def _make(backend: str, selector: Selector, limit: int):
+    if backend == "auto":
+        backend = "lxml" if etree is not None else "html.parser"
+    if backend == "lxml":
+        if etree is None:
+            raise ImportError("lxml غير مثبتة")
+        return _LxmlExtractor(selector, limit)
+    return _StdlibExtractor(selector, limit)
+
+
+class HeadlineExtractor:
+    """
+    واجهة تزايدية لمصادر تصل أجزاؤها بطرق أخرى (مثل httpx غير المتزامن):
+        ex = HeadlineExtractor(selector, limit)
+        async for chunk in response.aiter_text():
+            if ex.feed(chunk): break
+        headlines = ex.close()
+    """
+
+    def __init__(self, selector: str = WIKI_SELECTOR, limit: int = 5, backend: str = "auto"):
+        self.limit = limit
+        self.done = False
+        self._impl = _make(backend, Selector(selector), limit)
+
+    def feed(self, chunk: str) -> bool:
+        """يعيد True عند اكتمال العدد المطلوب (لا داعي لمزيد من البيانات)."""
+        if not self.done:
+            try:
+                self._impl.feed(chunk)
+            except _Done:
+                self.done = True
+        return self.done
+
+    def close(self) -> List[str]:
+        if not self.done:
+            try:
+                self._impl.close()
+            except _Done:
+                pass
+            self.done = True
+        return [t for t in self._impl.results if t][:self.limit]
+
+
+def extract_headlines(chunks, selector: str = WIKI_SELECTOR, limit: int = 5, backend: str = "auto") -> List[str]:
+    """
+    استخراج أول limit نصوص للعناصر المطابقة لـ selector.
+    chunks: نص HTML كامل أو أي مُكرِّر لأجزاء نصية (يتوقف عن استهلاكه عند اكتمال العدد).
+    """
+    if isinstance(chunks, str):
+        html = chunks
+        chunks = (html[i:i + 65536] for i in range(0, len(html), 65536))
+    extractor = HeadlineExtractor(selector, limit, backend)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.close()
+
+
+def fetch_headlines(url: str, selector: str, limit: int = 5, session=None, backend: str = "auto",
+                    timeout: int = 10) -> List[str]:
+    """تنزيل تدفقي مع إيقاف التنزيل فور جمع العناوين المطلوبة."""
+    import requests
+    http = session or requests
+    with http.get(url, headers=HEADERS, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        response.encoding = response.encoding or "utf-8"
+        return extract_headlines(response.iter_content(chunk_size=16384, decode_unicode=True),
+                                 selector, limit, backend)
+
+
+# ---------- قياس الأداء ----------
+
+def _bs4_path(html: str, selector: str, limit: int) -> List[str]:
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html, "html.parser")
+    texts = (a.get_text(strip=True) for a in soup.select(selector))
+    return [t for t in texts if t][:limit]
+
+
+def bench(html: str, selector: str = WIKI_SELECTOR, limit: int = 5, repeat: int = 5):
+    import tracemalloc
+    candidates = [("streaming html.parser", lambda: extract_headlines(html, selector, limit, "html.parser"))]
+    if etree is not None:
+        candidates.append(("streaming lxml", lambda: extract_headlines(html, selector, limit, "lxml")))
+    try:
+        import bs4  # noqa: F401
+        candidates.insert(0, ("BeautifulSoup كامل", lambda: _bs4_path(html, selector, limit)))
+    except ImportError:
+        print("bs4 غير مثبتة — تخطي المسار القديم")
+    print(f"حجم الصفحة: {len(html) / 1024:.0f} KB، المحدد: {selector}، العدد: {limit}")
+    for name, fn in candidates:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"{name:24} {best * 1000:8.1f} ms  ذروة الذاكرة {peak / 1024 / 1024:6.1f} MB  {result[:2]}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="استخراج عناوين ويكيبيديا")
+    parser.add_argument("--bench", nargs="?", const="", metavar="HTML_FILE")
+    parser.add_argument("--url", default=WIKI_URL)
+    parser.add_argument("--selector", default=WIKI_SELECTOR)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.bench is not None:
+        if args.bench:
+            with open(args.bench, encoding="utf-8") as f:
+                html = f.read()
+        else:
+            import requests
+            html = requests.get(args.url, headers=HEADERS, timeout=10).text
+        bench(html, args.selector, args.limit)
+        return
+
+    import requests
+    try:
+        headlines = fetch_headlines(args.url, args.selector, args.limit)
+    except requests.exceptions.HTTPError as e:
+        print(f"❌ Error: Failed to fetch page ({e})")
+        return 1
+    except requests.exceptions.RequestException as e:
+        print(f"🌐 Network error: {e}")
+        return 1
 
     if not headlines:
         print("⚠️ No headlines found on Wikipedia main page.")
-        exit()
+        return 1
 
     # حفظها في JSON مع التوقيت
     data = {
         "timestamp": datetime.now().isoformat(),
         "headlines": headlines
     }
-
     with open("wiki_headlines.json", "w", encoding="utf-8") as f:
         json.dump(data, f, indent=4, ensure_ascii=False)
 
-    print(f"✅ Saved {len(headlines)} headlines:")
+    # السجل التراكمي: يحتفظ بالتاريخ ويسمح للمستهلكين بقراءة الجديد فقط (headline_store.py)
+    from headline_store import HeadlineStore
+    new = HeadlineStore().add_many(headlines, source="wikipedia", url=args.url)
+
+    print(f"✅ Saved {len(headlines)} headlines ({len(new)} new):")
     print(headlines)
 
-except requests.exceptions.RequestException as e:
-    print(f"🌐 Network error: {e}")
-except Exception as e:
-    print(f"⚠️ Unexpected error: {e}")
+
+if __name__ == "__main__":
+    sys.exit(main())
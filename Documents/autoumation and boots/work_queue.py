@@ -0,0 +1,596 @@
+#!/usr/bin/env python3
+"""
+work_queue.py
+
+توزيع أهداف المراقبة على عدة عمليات وأجهزة بدل حلقة مستقلة لكل رابط:
+- الأهداف (نفس صيغة TARGETS_FILE في minha_multi.py) تُوضع في طابور مشترك؛ كل هدف له موعد استحقاق
+- العامل (worker) يستأجر (lease) الأهداف المستحقة لمدة LEASE_SECONDS ويجدد الإيجار بنبض دوري
+  (heartbeat) أثناء الفحص، ثم يعيد النتيجة ويُجدول الهدف للفحص التالي
+- إن توقف عامل (انهيار، فصل الجهاز) ينتهي إيجاره فيأخذ الهدف أول عامل آخر متاح — إعادة توزيع تلقائية
+- نتيجة عامل فقد إيجاره تُهمل (لا يُكتب الهدف مرتين)
+- كل النتائج تعود إلى مكان واحد: المنسق (coordinator) ينقلها إلى سجل النتائج (results_log.py)
+
+الواجهة الخلفية قابلة للاستبدال (QueueBackend):
+- SQLiteBackend: ملف SQLite على نفس الجهاز (عدة عمليات)
+- HttpBackend: عمال على أجهزة أخرى يتصلون بالمنسق عبر HTTP (coordinator --serve)
+- register_backend("redis", RedisBackend) لإضافة واجهة أخرى بنفس الدوال
+
+تشغيل (PowerShell):
+    python .\\work_queue.py add targets.json
+    python .\\work_queue.py coordinator --serve 8765           # يجمع النتائج (127.0.0.1 فقط)
+    python .\\work_queue.py worker --processes 4                # 4 متصفحات على هذا الجهاز
+    set WORK_QUEUE_TOKEN=<سر مشترك>                              # مطلوب عند الاستماع خارج هذا الجهاز
+    python .\\work_queue.py coordinator --serve 8765 --host 0.0.0.0
+    python .\\work_queue.py worker --queue http://192.168.1.10:8765   # عامل على جهاز آخر (بنفس الرمز)
+    python .\\work_queue.py status
+
+متغيرات البيئة: WORK_QUEUE (مسار SQLite أو http://host:port، افتراضياً work_queue.db)،
+LEASE_SECONDS، WORKER_ID، WORK_QUEUE_TOKEN (رمز مشترك يُرسل في ترويسة X-Work-Queue-Token)
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, NamedTuple, Optional, Sequence
+
+import metrics
+
+WORK_QUEUE = os.getenv("WORK_QUEUE", "work_queue.db")
+LEASE_SECONDS = float(os.getenv("LEASE_SECONDS", "120"))
+WORK_QUEUE_TOKEN = os.getenv("WORK_QUEUE_TOKEN", "")
+TOKEN_HEADER = "X-Work-Queue-Token"
+_LOOPBACK = {"127.0.0.1", "localhost", "::1"}
+
+
+def default_worker_id() -> str:
+    return os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Lease(NamedTuple):
+    id: int
+    url: str
+    allow: List[str]
+    exclude: List[str]
+    interval: int
+    expires: float
+
+
+class QueueBackend:
+    """
+    واجهة الطابور المشتركة. كل الدوال ذرية: عاملان لا يستأجران نفس الهدف في نفس الوقت.
+    """
+
+    def add_targets(self, targets: Sequence[dict]) -> int:
+        """إضافة أو تحديث أهداف ({url, allow, exclude, interval}) — يعيد عدد الأهداف الجديدة."""
+        raise NotImplementedError
+
+    def lease(self, worker: str, limit: int = 1, ttl: float = LEASE_SECONDS) -> List[Lease]:
+        """استئجار حتى limit هدف مستحق (أو انتهى إيجاره)."""
+        raise NotImplementedError
+
+    def heartbeat(self, worker: str, ids: Sequence[int], ttl: float = LEASE_SECONDS) -> List[int]:
+        """تمديد إيجار الأهداف المحجوزة لهذا العامل — يعيد ما زال محجوزاً له فعلاً."""
+        raise NotImplementedError
+
+    def complete(self, worker: str, lease_id: int, status: str, matches: List[str] = None,
+                 snippet: str = "") -> bool:
+        """تسجيل النتيجة وجدولة الفحص التالي؛ False إن لم يعد الإيجار لهذا العامل."""
+        raise NotImplementedError
+
+    def release(self, worker: str) -> int:
+        """إرجاع كل أهداف العامل للطابور فوراً (عند الإيقاف النظامي)."""
+        raise NotImplementedError
+
+    def drain_results(self, limit: int = 500) -> List[dict]:
+        """سحب النتائج المتراكمة (تُحذف من الطابور بعد سحبها)."""
+        raise NotImplementedError
+
+    def status(self) -> dict:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    url TEXT UNIQUE NOT NULL,
+    allow TEXT NOT NULL DEFAULT '[]',
+    exclude TEXT NOT NULL DEFAULT '[]',
+    interval INTEGER NOT NULL DEFAULT 60,
+    next_due REAL NOT NULL DEFAULT 0,
+    last_checked REAL NOT NULL DEFAULT 0,
+    leased_by TEXT,
+    lease_expires REAL NOT NULL DEFAULT 0,
+    last_status TEXT
+);
+CREATE INDEX IF NOT EXISTS targets_due ON targets (next_due);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    worker TEXT NOT NULL,
+    url TEXT NOT NULL,
+    status TEXT NOT NULL,
+    matched TEXT,
+    snippet TEXT
+);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    last_seen REAL NOT NULL,
+    checks INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class SQLiteBackend(QueueBackend):
+    def __init__(self, path: str = WORK_QUEUE):
+        self.path = path
+        # اتصال واحد تحميه قفل (خيوط خادم HTTP)؛ العمليات الأخرى تتزامن عبر أقفال SQLite نفسها
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _tx(self):
+        return _Transaction(self)
+
+    def _touch(self, worker: str, now: float, checks: int = 0):
+        self.conn.execute(
+            "INSERT INTO workers (name, last_seen, checks) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET last_seen = excluded.last_seen, checks = checks + excluded.checks",
+            (worker, now, checks))
+
+    def add_targets(self, targets: Sequence[dict]) -> int:
+        added = 0
+        with self._tx():
+            for t in targets:
+                cur = self.conn.execute(
+                    "UPDATE targets SET allow = ?, exclude = ?, interval = ? WHERE url = ?",
+                    (json.dumps(t.get("allow") or [], ensure_ascii=False),
+                     json.dumps(t.get("exclude") or [], ensure_ascii=False), int(t.get("interval", 60)), t["url"]))
+                if cur.rowcount == 0:
+                    self.conn.execute(
+                        "INSERT INTO targets (url, allow, exclude, interval) VALUES (?, ?, ?, ?)",
+                        (t["url"], json.dumps(t.get("allow") or [], ensure_ascii=False),
+                         json.dumps(t.get("exclude") or [], ensure_ascii=False), int(t.get("interval", 60))))
+                    added += 1
+        return added
+
+    def lease(self, worker: str, limit: int = 1, ttl: float = LEASE_SECONDS) -> List[Lease]:
+        now = time.time()
+        expires = now + ttl
+        with self._tx():
+            self._touch(worker, now)
+            # الأقدم استحقاقاً أولاً ثم الأقدم فحصاً (نفس ترتيب pick_due في minha_multi.py)
+            rows = self.conn.execute(
+                "SELECT * FROM targets WHERE next_due <= ? AND (leased_by IS NULL OR lease_expires < ?) "
+                "ORDER BY next_due, last_checked LIMIT ?", (now, now, limit)).fetchall()
+            for row in rows:
+                if row["leased_by"] and row["leased_by"] != worker:
+                    metrics.inc("bots_queue_lease_takeovers_total")
+                self.conn.execute("UPDATE targets SET leased_by = ?, lease_expires = ? WHERE id = ?",
+                                  (worker, expires, row["id"]))
+        return [Lease(r["id"], r["url"], json.loads(r["allow"]), json.loads(r["exclude"]), r["interval"], expires)
+                for r in rows]
+
+    def heartbeat(self, worker: str, ids: Sequence[int], ttl: float = LEASE_SECONDS) -> List[int]:
+        now = time.time()
+        held = []
+        with self._tx():
+            self._touch(worker, now)
+            for lease_id in ids:
+                cur = self.conn.execute(
+                    "UPDATE targets SET lease_expires = ? WHERE id = ? AND leased_by = ?",
+                    (now + ttl, lease_id, worker))
+                if cur.rowcount:
+                    held.append(lease_id)
+        return held
+
+    def complete(self, worker: str, lease_id: int, status: str, matches: List[str] = None,
+                 snippet: str = "") -> bool:
+        now = time.time()
+        with self._tx():
+            self._touch(worker, now, checks=1)
+            cur = self.conn.execute(
+                "UPDATE targets SET leased_by = NULL, lease_expires = 0, last_checked = ?, "
+                "next_due = ? + interval, last_status = ? WHERE id = ? AND leased_by = ?",
+                (now, now, status, lease_id, worker))
+            if not cur.rowcount:
+                return False
+            url = self.conn.execute("SELECT url FROM targets WHERE id = ?", (lease_id,)).fetchone()["url"]
+            self.conn.execute(
+                "INSERT INTO results (ts, worker, url, status, matched, snippet) VALUES (?, ?, ?, ?, ?, ?)",
+                (now, worker, url, status, None if matches is None else json.dumps(matches, ensure_ascii=False),
+                 snippet or ""))
+        return True
+
+    def release(self, worker: str) -> int:
+        with self._tx():
+            cur = self.conn.execute(
+                "UPDATE targets SET leased_by = NULL, lease_expires = 0 WHERE leased_by = ?", (worker,))
+            self.conn.execute("DELETE FROM workers WHERE name = ?", (worker,))
+        return cur.rowcount
+
+    def drain_results(self, limit: int = 500) -> List[dict]:
+        with self._tx():
+            rows = self.conn.execute("SELECT * FROM results ORDER BY id LIMIT ?", (limit,)).fetchall()
+            if rows:
+                self.conn.execute("DELETE FROM results WHERE id <= ?", (rows[-1]["id"],))
+        return [{"ts": r["ts"], "worker": r["worker"], "url": r["url"], "status": r["status"],
+                 "matched": None if r["matched"] is None else json.loads(r["matched"]), "snippet": r["snippet"]}
+                for r in rows]
+
+    def status(self) -> dict:
+        now = time.time()
+        with self._lock:
+            targets = [dict(r) for r in self.conn.execute(
+                "SELECT url, interval, next_due, last_checked, leased_by, lease_expires, last_status "
+                "FROM targets ORDER BY id")]
+            workers = [dict(r) for r in self.conn.execute("SELECT * FROM workers ORDER BY name")]
+            pending = self.conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        return {
+            "now": now,
+            "targets": targets,
+            "due": sum(1 for t in targets if t["next_due"] <= now and not _held(t, now)),
+            "leased": sum(1 for t in targets if _held(t, now)),
+            "workers": workers,
+            "pending_results": pending,
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def _held(target: dict, now: float) -> bool:
+    return bool(target["leased_by"]) and target["lease_expires"] >= now
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE: قفل الكتابة من البداية فلا يقرأ عاملان نفس الأهداف المستحقة."""
+
+    def __init__(self, backend: SQLiteBackend):
+        self.backend = backend
+
+    def __enter__(self):
+        self.backend._lock.acquire()
+        try:
+            self.backend.conn.execute("BEGIN IMMEDIATE")
+        except Exception:
+            self.backend._lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.backend.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.backend._lock.release()
+        return False
+
+
+# ---------- عبر الشبكة ----------
+
+class HttpBackend(QueueBackend):
+    """عامل على جهاز آخر: نفس الدوال كطلبات JSON إلى المنسق (coordinator --serve)."""
+
+    def __init__(self, base_url: str, timeout: float = 15, token: str = None):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.token = WORK_QUEUE_TOKEN if token is None else token
+
+    def _call(self, method: str, **params):
+        body = json.dumps(params, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        req = urllib.request.Request(f"{self.base_url}/{method}", data=body, headers=headers)
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return json.loads(resp.read().decode("utf-8"))
+
+    def add_targets(self, targets: Sequence[dict]) -> int:
+        return self._call("add_targets", targets=list(targets))
+
+    def lease(self, worker: str, limit: int = 1, ttl: float = LEASE_SECONDS) -> List[Lease]:
+        return [Lease(*row) for row in self._call("lease", worker=worker, limit=limit, ttl=ttl)]
+
+    def heartbeat(self, worker: str, ids: Sequence[int], ttl: float = LEASE_SECONDS) -> List[int]:
+        return self._call("heartbeat", worker=worker, ids=list(ids), ttl=ttl)
+
+    def complete(self, worker: str, lease_id: int, status: str, matches: List[str] = None,
+                 snippet: str = "") -> bool:
+        return self._call("complete", worker=worker, lease_id=lease_id, status=status,
+                          matches=matches, snippet=snippet)
+
+    def release(self, worker: str) -> int:
+        return self._call("release", worker=worker)
+
+    def drain_results(self, limit: int = 500) -> List[dict]:
+        return self._call("drain_results", limit=limit)
+
+    def status(self) -> dict:
+        return self._call("status")
+
+
+# الدوال المسموح باستدعائها عبر HTTP (drain_results للمنسق فقط)
+_REMOTE_METHODS = {"add_targets", "lease", "heartbeat", "complete", "release", "status"}
+
+
+def serve(backend: QueueBackend, port: int, host: str = "127.0.0.1", token: str = None) -> ThreadingHTTPServer:
+    """
+    عرض الطابور للعمال البعيدين: POST /<method> بجسم JSON.
+    خارج 127.0.0.1 يلزم رمز مشترك (token أو WORK_QUEUE_TOKEN) في ترويسة X-Work-Queue-Token،
+    وإلا يستطيع أي جهاز في الشبكة إضافة أهداف أو تزوير النتائج.
+    """
+    token = WORK_QUEUE_TOKEN if token is None else token
+    if host not in _LOOPBACK and not token:
+        raise ValueError(f"الاستماع على {host} يتطلب WORK_QUEUE_TOKEN")
+    expected = token.encode("utf-8")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            if expected and not hmac.compare_digest(self.headers.get(TOKEN_HEADER, "").encode("utf-8"), expected):
+                self.send_error(403)
+                return
+            method = self.path.strip("/")
+            if method not in _REMOTE_METHODS:
+                self.send_error(404)
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                params = json.loads(self.rfile.read(length) or b"{}")
+                result = getattr(backend, method)(**params)
+            except Exception as e:
+                self.send_error(400, str(e)[:200])
+                return
+            body = json.dumps(result, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+BACKENDS = {"sqlite": SQLiteBackend, "http": HttpBackend, "https": HttpBackend}
+
+
+def register_backend(scheme: str, factory):
+    """factory(location) -> QueueBackend، ويُختار حسب بادئة WORK_QUEUE (scheme://...)."""
+    BACKENDS[scheme] = factory
+
+
+def open_backend(location: str = None) -> QueueBackend:
+    location = location or WORK_QUEUE
+    scheme, sep, rest = location.partition("://")
+    if not sep:
+        return SQLiteBackend(location)
+    if scheme not in BACKENDS:
+        raise ValueError(f"واجهة طابور غير معروفة: {scheme}")
+    # http(s) يحتاج الرابط كاملاً، بقية الواجهات تأخذ ما بعد البادئة
+    return BACKENDS[scheme](location if scheme in ("http", "https") else rest)
+
+
+# ---------- العامل ----------
+
+class _Heartbeat:
+    """خيط يجدد إيجار الأهداف المحجوزة كل ttl/3 أثناء فحص قد يطول (تحميل بطيء)."""
+
+    def __init__(self, backend: QueueBackend, worker: str, ttl: float):
+        self.backend = backend
+        self.worker = worker
+        self.ttl = ttl
+        self.ids: List[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.ttl / 3):
+            ids = list(self.ids)
+            if not ids:
+                continue
+            try:
+                # إيجار لم يتجدد يُرفض عند complete() فلا حاجة لتتبعه هنا
+                self.backend.heartbeat(self.worker, ids, self.ttl)
+            except Exception as e:
+                print("تعذر تجديد الإيجار:", e)
+
+    def stop(self):
+        self._stop.set()
+
+
+def run_worker(bot, backend: QueueBackend, worker: str = None, ttl: float = LEASE_SECONDS,
+               idle: float = 2.0, max_checks: int = 0):
+    """حلقة العامل: استئجار هدف مستحق، فحصه بالمتصفح، إعادة النتيجة. max_checks=0 بلا حد."""
+    worker = worker or default_worker_id()
+    heartbeat = _Heartbeat(backend, worker, ttl)
+    checks = 0
+    print(f"العامل {worker} يعمل — الطابور: {getattr(backend, 'path', getattr(backend, 'base_url', ''))}")
+    try:
+        while not max_checks or checks < max_checks:
+            try:
+                leases = backend.lease(worker, limit=1, ttl=ttl)
+            except Exception as e:
+                print("تعذر الوصول للطابور:", e)
+                time.sleep(idle * 5)
+                continue
+            if not leases:
+                time.sleep(idle)
+                continue
+            for lease in leases:
+                heartbeat.ids = [lease.id]
+                matches, snippet = None, ""
+                try:
+                    with metrics.span("queue.check"):
+                        bot.open_page(lease.url)
+                        found, matches, snippet = bot.check_appointment_open(lease.allow or None,
+                                                                             lease.exclude or None)
+                    status = 'FOUND' if found else 'NOT_FOUND'
+                    if found:
+                        bot.notify(lease.url, matches, snippet)
+                    else:
+                        matches, snippet = None, ""
+                except Exception as e:
+                    status, snippet = 'ERROR', str(e)[:200]
+                heartbeat.ids = []
+                try:
+                    # الطابور هو الحكم: complete() يعيد False إن انتقل الهدف لعامل آخر
+                    kept = backend.complete(worker, lease.id, status, matches, snippet)
+                except Exception as e:
+                    print("تعذر إرسال النتيجة:", e)
+                    continue
+                metrics.inc("bots_queue_checks_total", status=status if kept else "LOST")
+                if not kept:
+                    print(f"فُقد إيجار {lease.url} أثناء الفحص — أُهملت النتيجة")
+                    continue
+                print(f"{time.strftime('%H:%M:%S')} | {worker} | {status} | {lease.url}")
+                checks += 1
+    finally:
+        heartbeat.stop()
+        try:
+            backend.release(worker)
+        except Exception:
+            pass
+
+
+def _worker_process(location: str, index: Optional[int], ttl: float):
+    worker = default_worker_id()
+    if index is not None:
+        # ملف تعريف Chrome لا يُشارك بين متصفحين يعملان معاً -> ملف لكل عملية
+        os.environ["BROWSER_PROFILE"] = f"{os.getenv('BROWSER_PROFILE', 'minha')}-w{index}"
+        worker = f"{worker}-w{index}"
+    from minha_bot import MinhaBot
+    bot = MinhaBot(headless=os.getenv("HEADLESS", "1") == "1")
+    try:
+        run_worker(bot, open_backend(location), worker, ttl)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bot.close()
+
+
+def run_workers(location: str, processes: int, ttl: float = LEASE_SECONDS):
+    """عدة عمال على نفس الجهاز، كل عامل عملية بمتصفحها (توزيع على الأنوية)."""
+    import multiprocessing
+    procs = [multiprocessing.Process(target=_worker_process, args=(location, i, ttl), daemon=True)
+             for i in range(processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+
+
+# ---------- المنسق ----------
+
+def run_coordinator(backend: QueueBackend, poll: float = 2.0, report_every: float = 60.0):
+    """ينقل نتائج كل العمال إلى سجل نتائج واحد ويطبع حالة الطابور دورياً."""
+    from results_log import open_results_log, TS_FORMAT
+    results = open_results_log()
+    metrics.gauge_fn("bots_queue_leased", lambda: backend.status()["leased"], "أهداف مستأجرة حالياً")
+    print("المنسق يعمل — السجل:", results.path)
+    last_report = 0.0
+    try:
+        while True:
+            drained = backend.drain_results()
+            for r in drained:
+                results.record(r["status"], r["url"], r["matched"], r["snippet"],
+                               ts=time.strftime(TS_FORMAT, time.localtime(r["ts"])))
+            if time.time() - last_report >= report_every:
+                last_report = time.time()
+                print(format_status(backend.status()))
+            if not drained:
+                time.sleep(poll)
+    finally:
+        results.close()
+
+
+def format_status(st: dict, stale: float = LEASE_SECONDS) -> str:
+    now = st["now"]
+    lines = [f"أهداف: {len(st['targets'])} | مستحقة: {st['due']} | مستأجرة: {st['leased']} "
+             f"| نتائج بانتظار السجل: {st['pending_results']}"]
+    for w in st["workers"]:
+        age = now - w["last_seen"]
+        state = "متوقف؟" if age > stale else "نشط"
+        lines.append(f"  {w['name']:30} {state:7} آخر ظهور قبل {age:6.0f} ث  فحوص {w['checks']}")
+    for t in st["targets"]:
+        owner = t["leased_by"] if _held(t, now) else "-"
+        due = max(0, t["next_due"] - now)
+        lines.append(f"  {t['url'][:60]:60} كل {t['interval']:>4} ث  التالي بعد {due:5.0f} ث  "
+                     f"{t['last_status'] or '':9} {owner}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="طابور عمل مشترك لأهداف المراقبة")
+    parser.add_argument("--queue", default=WORK_QUEUE, help="مسار SQLite أو http://host:port")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="مدة الإيجار بالثواني")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="إضافة أهداف من ملف JSON (نفس صيغة TARGETS_FILE)")
+    add.add_argument("targets_file")
+    add.add_argument("--interval", type=int, default=int(os.getenv("INTERVAL", "60")))
+    coord = sub.add_parser("coordinator", help="جمع النتائج في سجل واحد وخدمة العمال البعيدين")
+    coord.add_argument("--serve", type=int, default=0, help="منفذ HTTP للعمال على أجهزة أخرى")
+    coord.add_argument("--host", default="127.0.0.1", help="0.0.0.0 للعمال على أجهزة أخرى (مع WORK_QUEUE_TOKEN)")
+    work = sub.add_parser("worker", help="استئجار الأهداف وفحصها")
+    work.add_argument("--processes", type=int, default=1)
+    sub.add_parser("status")
+    args = parser.parse_args(argv)
+
+    if args.command == "worker":
+        metrics.serve_from_env()
+        if args.processes > 1:
+            run_workers(args.queue, args.processes, args.lease)
+        else:
+            _worker_process(args.queue, None, args.lease)
+        return 0
+
+    backend = open_backend(args.queue)
+    try:
+        if args.command == "add":
+            with open(args.targets_file, encoding="utf-8") as f:
+                raw = json.load(f)
+            items = [{"url": t} if isinstance(t, str) else t for t in raw]
+            items = [dict(t, interval=t.get("interval", args.interval)) for t in items if t.get("url")]
+            print(f"أُضيف {backend.add_targets(items)} هدف جديد ({len(items)} في الملف)")
+        elif args.command == "status":
+            print(format_status(backend.status(), args.lease))
+        elif args.command == "coordinator":
+            metrics.serve_from_env()
+            if args.serve:
+                try:
+                    server = serve(backend, args.serve, args.host)
+                except ValueError as e:
+                    print(e)
+                    return 2
+                print(f"العمال البعيدون: --queue http://<هذا الجهاز>:{server.server_address[1]}")
+            try:
+                run_coordinator(backend)
+            except KeyboardInterrupt:
+                pass
+    finally:
+        backend.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,3 +1,13 @@
+import array
+import operator
+from itertools import repeat
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
 def add(a, b):
     return a + b
 
@@ -5,4 +15,135 @@ def subtract(a, b):
     return a - b
 
 def multiply(a, b):
-    return a * b    
\ No newline at end of file
+    return a * b
+
+
+# Batch variants: sequences, array.array buffers or NumPy arrays with
+# NumPy-style broadcasting. NumPy is used when installed; otherwise a
+# pure-Python path built on map() runs without per-element calls.
+
+_SEQUENCES = (list, tuple, range, array.array)
+
+
+def _is_seq(x):
+    return isinstance(x, _SEQUENCES) or (np is not None and isinstance(x, np.ndarray))
+
+
+def _ndim(x):
+    n = 0
+    while _is_seq(x):
+        n += 1
+        if not len(x):
+            break
+        x = x[0]
+    return n
+
+
+def _as_array(x):
+    # array.array is wrapped through the buffer protocol, without a copy
+    if isinstance(x, array.array):
+        return np.asarray(memoryview(x))
+    return x
+
+
+def _broadcast(op, a, b, na, nb, lazy=False):
+    # lazy: a 1-D result is returned as an iterator, so out= buffers are filled without a temporary list
+    collect = iter if lazy else list
+    if na == 0 and nb == 0:
+        return op(a, b)
+    if na > nb:
+        if nb == 0 and na == 1:
+            return collect(map(op, a, repeat(b)))
+        return [_broadcast(op, x, b, na - 1, nb) for x in a]
+    if nb > na:
+        if na == 0 and nb == 1:
+            return collect(map(op, repeat(a), b))
+        return [_broadcast(op, a, y, na, nb - 1) for y in b]
+    if len(a) != len(b):
+        if len(a) == 1:
+            a = repeat(a[0], len(b))
+        elif len(b) == 1:
+            b = repeat(b[0], len(a))
+        else:
+            raise ValueError(f"operands could not be broadcast together ({len(a)} vs {len(b)})")
+    if na == 1:
+        return collect(map(op, a, b))
+    return [_broadcast(op, x, y, na - 1, nb - 1) for x, y in zip(a, b)]
+
+
+def _check_len(out, values):
+    if len(values) != len(out):
+        raise ValueError(f"out has length {len(out)}, result has {len(values)}")
+
+
+def _fill(out, values):
+    if isinstance(out, array.array):
+        values = array.array(out.typecode, values)
+    elif isinstance(values, list) and values and isinstance(values[0], list):
+        # every row is checked before any is written, so a mismatch leaves out untouched
+        _check_len(out, values)
+        for row, vals in zip(out, values):
+            _check_len(row, vals)
+        for row, vals in zip(out, values):
+            _fill(row, vals)
+        return out
+    else:
+        values = list(values)
+    _check_len(out, values)
+    out[:] = values
+    return out
+
+
+def _batch(ufunc, op, a, b, out):
+    if np is not None:
+        if out is None:
+            return ufunc(_as_array(a), _as_array(b))
+        if isinstance(out, (np.ndarray, array.array)):
+            ufunc(_as_array(a), _as_array(b), out=_as_array(out))
+            return out
+        # atleast_1d: two scalars give a 0-d result, filled like the pure-Python path ([op(a, b)])
+        return _fill(out, np.atleast_1d(ufunc(_as_array(a), _as_array(b))).tolist())
+    na, nb = _ndim(a), _ndim(b)
+    if out is None:
+        return _broadcast(op, a, b, na, nb)
+    if na == nb == 0:
+        return _fill(out, [op(a, b)])
+    return _fill(out, _broadcast(op, a, b, na, nb, lazy=True))
+
+
+def add_batch(a, b, out=None):
+    return _batch(np and np.add, operator.add, a, b, out)
+
+def subtract_batch(a, b, out=None):
+    return _batch(np and np.subtract, operator.sub, a, b, out)
+
+def multiply_batch(a, b, out=None):
+    return _batch(np and np.multiply, operator.mul, a, b, out)
+
+
+def _flatten(x):
+    for item in x:
+        if _is_seq(item):
+            yield from _flatten(item)
+        else:
+            yield item
+
+
+def sum_batch(a):
+    if np is not None:
+        return np.sum(_as_array(a)).item()
+    if _ndim(a) <= 1:
+        return sum(a)
+    return sum(_flatten(a))
+
+
+def dot(a, b):
+    # 1-D inner product; with NumPy also matrix products (np.dot)
+    if np is not None:
+        result = np.dot(_as_array(a), _as_array(b))
+        return result.item() if np.ndim(result) == 0 else result
+    if _ndim(a) != 1 or _ndim(b) != 1:
+        raise ValueError("dot without NumPy supports 1-D sequences only")
+    if len(a) != len(b):
+        raise ValueError(f"shapes not aligned ({len(a)} vs {len(b)})")
+    return sum(map(operator.mul, a, b))
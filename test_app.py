@@ -1,5 +1,26 @@
+import os
+import sys
+import time
+import array
+import asyncio
 import unittest
+from unittest import mock
+
+import test
 from test import add, subtract,multiply
+from test import add_batch, subtract_batch, multiply_batch, sum_batch, dot
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import telegram
+except ImportError:
+    telegram = None
+
+BOTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Documents", "autoumation and boots")
 
 class TestMathOperations(unittest.TestCase):
     def test_add(self):
@@ -8,5 +29,161 @@ class TestMathOperations(unittest.TestCase):
         self.assertEqual(subtract(5, 3), 2)
     def test_multiply(self):
         self.assertEqual(multiply(4, 3), 12)
+
+
+class BatchCases:
+    # shared cases, run once with NumPy (if installed) and once with the pure-Python path
+    def as_list(self, x):
+        return x.tolist() if hasattr(x, "tolist") else list(x)
+
+    def test_elementwise(self):
+        self.assertEqual(self.as_list(add_batch([1, 2, 3], [10, 20, 30])), [11, 22, 33])
+        self.assertEqual(self.as_list(subtract_batch((5, 6), (1, 2))), [4, 4])
+        self.assertEqual(self.as_list(multiply_batch(range(4), range(4))), [0, 1, 4, 9])
+
+    def test_scalar_broadcast(self):
+        self.assertEqual(self.as_list(add_batch([1, 2, 3], 1)), [2, 3, 4])
+        self.assertEqual(self.as_list(subtract_batch(10, [1, 2])), [9, 8])
+        self.assertEqual(self.as_list(multiply_batch([2.5], [2, 4])), [5.0, 10.0])
+
+    def test_row_broadcast(self):
+        result = add_batch([[1, 2], [3, 4]], [10, 20])
+        self.assertEqual(self.as_list(result), [[11, 22], [13, 24]])
+        result = multiply_batch([[1], [2]], [1, 10])
+        self.assertEqual(self.as_list(result), [[1, 10], [2, 20]])
+
+    def test_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            add_batch([1, 2, 3], [1, 2])
+
+    def test_nested_out_shape_mismatch(self):
+        with self.assertRaises(ValueError):
+            add_batch([[1, 2], [3, 4]], [[10, 20]], out=[[0, 0]])
+
+    def test_array_buffers_and_out(self):
+        a = array.array("d", [1.0, 2.0, 3.0])
+        b = array.array("d", [0.5, 0.5, 0.5])
+        out = array.array("d", [0.0] * 3)
+        self.assertIs(add_batch(a, b, out=out), out)
+        self.assertEqual(list(out), [1.5, 2.5, 3.5])
+        target = [0, 0, 0]
+        self.assertIs(multiply_batch([1, 2, 3], 2, out=target), target)
+        self.assertEqual(target, [2, 4, 6])
+        with self.assertRaises(ValueError):
+            add_batch([1, 2, 3], 1, out=[0, 0])
+        scalar = [0]
+        self.assertIs(add_batch(2, 3, out=scalar), scalar)
+        self.assertEqual(scalar, [5])
+
+    def test_reductions(self):
+        self.assertEqual(sum_batch([1, 2, 3, 4]), 10)
+        self.assertEqual(sum_batch([[1, 2], [3, 4]]), 10)
+        self.assertAlmostEqual(sum_batch(array.array("d", [0.1] * 10)), 1.0)
+        self.assertEqual(dot([1, 2, 3], [4, 5, 6]), 32)
+        self.assertAlmostEqual(dot(array.array("d", [0.5, 1.5]), [2, 2]), 4.0)
+        with self.assertRaises(ValueError):
+            dot([1, 2], [1, 2, 3])
+
+
+class TestBatchPurePython(BatchCases, unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(test, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@unittest.skipIf(np is None, "numpy not installed")
+class TestBatchNumPy(BatchCases, unittest.TestCase):
+    def test_ndarray_out_without_copy(self):
+        a = np.arange(5.0)
+        out = np.empty(5)
+        self.assertIs(add_batch(a, a, out=out), out)
+        np.testing.assert_array_equal(out, [0, 2, 4, 6, 8])
+
+    def test_array_buffer_is_written_in_place(self):
+        out = array.array("d", [0.0] * 4)
+        subtract_batch(np.ones(4), array.array("d", [1, 2, 3, 4]), out=out)
+        self.assertEqual(list(out), [0.0, -1.0, -2.0, -3.0])
+
+    def test_matrix_dot(self):
+        np.testing.assert_array_equal(dot([[1, 0], [0, 1]], [[2, 3], [4, 5]]), [[2, 3], [4, 5]])
+
+
+@unittest.skipUnless(os.getenv("BENCH_N"), "set BENCH_N (e.g. 1000000) to run the throughput comparison")
+class TestBatchThroughput(unittest.TestCase):
+    # timing assertions are only meaningful on a quiet machine, so this never runs in CI by default
+    N = int(os.getenv("BENCH_N") or 0)
+
+    def run_bench(self):
+        a = array.array("d", range(self.N))
+        b = array.array("d", range(self.N, 0, -1))
+
+        # the pipeline's current pattern: one scalar call per element into a preallocated buffer
+        expected = array.array("d", bytes(8 * self.N))
+        start = time.perf_counter()
+        for i in range(self.N):
+            expected[i] = add(a[i], b[i])
+        scalar = time.perf_counter() - start
+
+        out = array.array("d", bytes(8 * self.N))
+        start = time.perf_counter()
+        add_batch(a, b, out=out)
+        batch = time.perf_counter() - start
+
+        self.assertEqual(out, expected)
+        print(f"\nadd x{self.N}: scalar {self.N / scalar / 1e6:.1f} M/s, "
+              f"batch {self.N / batch / 1e6:.1f} M/s (x{scalar / batch:.1f})")
+        return scalar, batch
+
+    @unittest.skipIf(np is None, "numpy not installed")
+    def test_numpy_batch_faster_than_scalar_loop(self):
+        scalar, batch = self.run_bench()
+        self.assertLess(batch * 10, scalar)
+
+    def test_pure_python_batch_faster_than_scalar_loop(self):
+        with mock.patch.object(test, "np", None):
+            scalar, batch = self.run_bench()
+        self.assertLess(batch, scalar)
+
+
+@unittest.skipIf(telegram is None, "python-telegram-bot not installed")
+class TestChatOrderedUpdateProcessor(unittest.TestCase):
+    def setUp(self):
+        sys.path.insert(0, BOTS_DIR)
+        self.addCleanup(sys.path.remove, BOTS_DIR)
+
+    def test_per_chat_order_and_fairness(self):
+        from datetime import datetime
+        from update_processor import ChatOrderedUpdateProcessor
+
+        events = []
+
+        async def handler(name, delay):
+            events.append(("start", name))
+            await asyncio.sleep(delay)
+            events.append(("end", name))
+
+        def update(update_id, chat_id):
+            chat = telegram.Chat(chat_id, "private")
+            return telegram.Update(update_id, message=telegram.Message(update_id, datetime.now(), chat))
+
+        async def scenario():
+            processor = ChatOrderedUpdateProcessor(2)
+            # a busy chat sends five slow messages before two other chats send one quick message each
+            jobs = [(f"a{i}", 1, 0.05 - i * 0.01) for i in range(5)] + [("b", 2, 0.001), ("c", 3, 0.001)]
+            tasks = [asyncio.ensure_future(processor.process_update(update(n, chat_id), handler(name, delay)))
+                     for n, (name, chat_id, delay) in enumerate(jobs)]
+            await asyncio.gather(*tasks)
+            return processor
+
+        processor = asyncio.run(scenario())
+        ended = [name for kind, name in events if kind == "end"]
+        self.assertEqual([name for name in ended if name.startswith("a")], ["a0", "a1", "a2", "a3", "a4"])
+        # the busy chat holds one slot; the others are served before its second message
+        self.assertLess(ended.index("b"), ended.index("a0"))
+        self.assertLess(ended.index("c"), ended.index("a0"))
+        self.assertEqual(processor._chats, {})
+
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()